@@ -1,41 +1,159 @@
 import uvicorn
-from fastapi import FastAPI, Depends, HTTPException
+import os
+import json
+import time
+import zlib
+import hashlib
+import heapq
+import orjson
+from fastapi import FastAPI, Depends, HTTPException, Request, Query
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import datetime
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Enum as SQLAlchemyEnum
+from sqlalchemy import create_engine, event, Column, Integer, Float, String, DateTime, LargeBinary, ForeignKey, Index, UniqueConstraint, and_, insert, Enum as SQLAlchemyEnum
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.exc import OperationalError, ProgrammingError, IntegrityError
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.dialects import sqlite, postgresql
 from sqlalchemy.ext.declarative import declarative_base
-from typing import List, Literal, Dict
+from typing import List, Literal, Dict, Optional
 import enum
+from checklist import get_checklist_registry, score_answers, COMPLIANCE_AREAS
+from metrics import Counter, Histogram, render_prometheus
+import run_archive
+
+# Question text lives in the versioned checklist; the database only stores short question IDs.
+CHECKLIST_REGISTRY = get_checklist_registry()
 
 # --- Database Setup ---
-DATABASE_URL = "sqlite:///./audit_findings.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# SQLite (the default) suits a single host; point DATABASE_URL at Postgres (e.g. postgresql+psycopg2://...) to run
+# several workers or hosts against one database. Pool settings apply per worker process.
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./audit_findings.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 30000))
+
+def make_engine(database_url: str):
+    if database_url.startswith("sqlite"):
+        if database_url in ("sqlite://", "sqlite:///:memory:"):
+            return create_engine(database_url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        sqlite_engine = create_engine(database_url, connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+                                      pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+
+        @event.listens_for(sqlite_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            # WAL lets readers proceed while one worker writes; the busy timeout makes other writers wait instead of failing.
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            cursor.close()
+        return sqlite_engine
+    return create_engine(database_url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT,
+                         pool_recycle=DB_POOL_RECYCLE, pool_pre_ping=True)
+
+engine = make_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+if hasattr(os, "register_at_fork"):
+    # Workers forked from a preloaded app (gunicorn --preload) must not reuse the parent's pooled connections.
+    os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+
 class RunStatus(str, enum.Enum):
     in_progress = "in_progress"
     completed = "completed"
 
 # --- SQLAlchemy Models ---
 class AuditFinding(Base):
+    """The current answer for each (run, question); earlier values live in FindingRevision."""
     __tablename__ = "findings"
+    __table_args__ = (UniqueConstraint("run_id", "question_id"), {"sqlite_autoincrement": True})
     id = Column(Integer, primary_key=True, index=True)
     run_id = Column(String, index=True)
-    question = Column(String, index=True)
+    question_id = Column(String(16), index=True)
     answer = Column(String)
     explanation = Column(String)
     timestamp = Column(DateTime)
 
+class FindingRevision(Base):
+    __tablename__ = "finding_revisions"
+    __table_args__ = {"sqlite_autoincrement": True}
+    id = Column(Integer, primary_key=True, index=True)
+    finding_id = Column(Integer, index=True)
+    run_id = Column(String, index=True)
+    question_id = Column(String(16))
+    answer = Column(String)
+    explanation = Column(String)
+    timestamp = Column(DateTime) # When the superseded answer was produced
+    superseded_at = Column(DateTime, default=datetime.datetime.utcnow)
+    reason = Column(String(16)) # "resubmitted" (AI re-run) or "edited" (manual override)
+
+class CustomQuestion(Base):
+    __tablename__ = "custom_questions"
+    __table_args__ = (UniqueConstraint("run_id", "question_id"), {"sqlite_autoincrement": True})
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, index=True)
+    question_id = Column(String(16))
+    question = Column(String)
+    weight = Column(Integer, default=0)
+
+class QuestionMetrics(Base):
+    __tablename__ = "question_metrics"
+    __table_args__ = (UniqueConstraint("run_id", "question_id"), {"sqlite_autoincrement": True})
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, index=True)
+    question_id = Column(String(64))
+    stages = Column(String, default="{}") # JSON: {stage: seconds}
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    llm_calls = Column(Integer, default=0)
+    cache_hits = Column(String, default="{}") # JSON: {cache: hits}
+
+class EvidenceBlob(Base):
+    """Extracted document text, stored once per distinct content no matter how many runs or projects use it."""
+    __tablename__ = "evidence_blobs"
+    sha256 = Column(String(64), primary_key=True) # Of the uncompressed UTF-8 text
+    compression = Column(String(16), default="zlib")
+    content = Column(LargeBinary)
+    size = Column(Integer) # Uncompressed bytes
+    stored_size = Column(Integer)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class RunEvidence(Base):
+    __tablename__ = "run_evidence"
+    __table_args__ = (UniqueConstraint("run_id", "doc_name"), {"sqlite_autoincrement": True})
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, index=True)
+    doc_name = Column(String)
+    sha256 = Column(String(64), ForeignKey("evidence_blobs.sha256"), index=True)
+
 class AuditRun(Base):
     __tablename__ = "audit_runs"
     id = Column(Integer, primary_key=True, index=True)
     run_id = Column(String, unique=True, index=True)
+    project_name = Column(String, index=True, nullable=True)
     scope = Column(String)
     start_time = Column(DateTime, default=datetime.datetime.utcnow)
     end_time = Column(DateTime, nullable=True)
     status = Column(SQLAlchemyEnum(RunStatus), default=RunStatus.in_progress)
+    archive_path = Column(String, nullable=True) # Parquet partition holding the run's details once archived (see run_archive)
+
+class ScoreRollup(Base):
+    """Per-area score of a completed run, maintained as runs complete so trends never scan the findings table."""
+    __tablename__ = "score_rollups"
+    __table_args__ = (UniqueConstraint("run_id", "area"), Index("ix_score_rollups_area_project_completed", "area", "project_name", "completed_at"))
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, index=True)
+    project_name = Column(String)
+    area = Column(String(16)) # A compliance area, or OVERALL_AREA for the run's whole scope
+    percentage = Column(Float)
+    achieved = Column(Float)
+    max_score = Column(Float)
+    completed_at = Column(DateTime)
+    computed_at = Column(DateTime, default=datetime.datetime.utcnow)
 
 class Project(Base):
     __tablename__ = "projects"
@@ -43,7 +161,39 @@ class Project(Base):
     company_name = Column(String, default="Google")
     project_name = Column(String, unique=True, index=True)
 
-Base.metadata.create_all(bind=engine)
+ON_CONFLICT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def insert_if_absent(db: Session, model, **values) -> bool:
+    """INSERT ... ON CONFLICT DO NOTHING, so concurrent workers inserting the same row never fail. True if this call inserted it."""
+    dialect_insert = ON_CONFLICT_INSERTS.get(engine.dialect.name)
+    if dialect_insert is not None:
+        return db.execute(dialect_insert(model).values(**values).on_conflict_do_nothing()).rowcount == 1
+    # Other databases have no portable ON CONFLICT: insert in a savepoint and take a constraint violation to mean the row exists
+    try:
+        with db.begin_nested():
+            db.execute(insert(model).values(**values))
+        return True
+    except IntegrityError:
+        return False
+
+def init_database(attempts: int = 5):
+    """Creates missing tables. Safe when several workers start at once against the same database."""
+    for attempt in range(attempts):
+        try:
+            if engine.dialect.name == "postgresql":
+                with engine.begin() as connection:
+                    connection.exec_driver_sql("SELECT pg_advisory_xact_lock(4242001)") # Serializes create_all across workers
+                    Base.metadata.create_all(bind=connection)
+            else:
+                Base.metadata.create_all(bind=engine)
+            return
+        except (OperationalError, ProgrammingError, IntegrityError) as e:
+            # Another worker created a table (or held the write lock) between our existence check and CREATE.
+            if attempt == attempts - 1: raise
+            print(f"WARNING: Database initialisation raced with another worker ({type(e).__name__}); retrying.")
+            time.sleep(0.2 * (attempt + 1))
+
+init_database()
 
 # --- Pydantic Models ---
 class ProjectCreate(BaseModel):
@@ -53,10 +203,12 @@ class ProjectCreate(BaseModel):
 class RunStartRequest(BaseModel):
     run_id: str
     scope: List[str]
+    project_name: Optional[str] = None
 
 class AuditResultCreate(BaseModel):
     run_id: str
-    question: str
+    question_id: str
+    question: Optional[str] = None # Only kept for questions that are not in the checklist registry
     answer: Literal["Yes", "No", "Partial", "N/A"]
     explanation: str
     timestamp: datetime.datetime
@@ -65,13 +217,102 @@ class AuditResultUpdate(BaseModel):
     answer: Literal["Yes", "No", "Partial", "N/A"]
     explanation: str
 
-class AuditResultResponse(AuditResultCreate):
+class AuditResultBatchUpdate(AuditResultUpdate):
+    id: int
+
+class AuditResultResponse(BaseModel):
     id: int
+    run_id: str
+    question_id: str
+    question: str
+    answer: Literal["Yes", "No", "Partial", "N/A"]
+    explanation: str
+    timestamp: datetime.datetime
+
+class FindingRevisionResponse(BaseModel):
+    id: int
+    finding_id: int
+    run_id: str
+    question_id: str
+    answer: str
+    explanation: str
+    timestamp: Optional[datetime.datetime]
+    superseded_at: datetime.datetime
+    reason: str
+
     class Config:
         from_attributes = True
 
+class CustomQuestionCreate(BaseModel):
+    run_id: str
+    question_id: str
+    question: str
+    weight: int = 0
+
+class CustomQuestionResponse(CustomQuestionCreate):
+    class Config:
+        from_attributes = True
+
+class QuestionMetricsRecord(BaseModel):
+    run_id: str
+    question_id: str
+    stages: Dict[str, float] = {}
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_calls: int = 0
+    cache_hits: Dict[str, int] = {}
+
+class ScoreTrendPoint(BaseModel):
+    project_name: str
+    run_id: str
+    area: str
+    percentage: float
+    achieved: float
+    max_score: float
+    completed_at: datetime.datetime
+
+class EvidenceDocument(BaseModel):
+    doc_name: str
+    text: str
+
+class EvidenceManifestEntry(BaseModel):
+    doc_name: str
+    sha256: str
+    size: int
+    stored_size: int
+
 app = FastAPI(title="Real IRF Tool Backend", version="6.0.0")
 
+# --- Fast JSON for bulk reads ---
+# The findings and runs endpoints return plain rows rendered by orjson, skipping per-row model validation; their
+# response models still document the shape. /get_findings/stream sends the same rows as NDJSON while the cursor reads.
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+FINDINGS_STREAM_BATCH = int(os.getenv("FINDINGS_STREAM_BATCH", 500)) # Rows fetched from the cursor and sent per chunk
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+# --- Prometheus Metrics (per worker process) ---
+HTTP_REQUESTS = Counter("irf_http_requests_total", "HTTP requests handled, by method, route and status.")
+HTTP_LATENCY = Histogram("irf_http_request_duration_seconds", "HTTP request latency, by method and route.")
+AUDIT_STAGE_SECONDS = Counter("irf_audit_stage_seconds_total", "Time spent per audit pipeline stage, as reported by the frontend.")
+LLM_TOKENS = Counter("irf_llm_tokens_total", "Model tokens used by audits, by kind.")
+LLM_CALLS = Counter("irf_llm_calls_total", "Model calls made by audits.")
+CACHE_HITS = Counter("irf_cache_hits_total", "Cache hits reported by the frontend, by cache.")
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start_time = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    route_path = route.path if route else "unmatched"
+    HTTP_LATENCY.observe(time.perf_counter() - start_time, method=request.method, route=route_path)
+    HTTP_REQUESTS.inc(method=request.method, route=route_path, status=response.status_code)
+    return response
+
 def get_db():
     db = SessionLocal()
     try:
@@ -79,6 +320,181 @@ def get_db():
     finally:
         db.close()
 
+def to_finding_response(db_finding: AuditFinding, custom_question: Optional[str] = None) -> AuditResultResponse:
+    return AuditResultResponse(**finding_row(db_finding.id, db_finding.run_id, db_finding.question_id, db_finding.answer,
+                                             db_finding.explanation, db_finding.timestamp, custom_question))
+
+def finding_row(finding_id, run_id, question_id, answer, explanation, timestamp, custom_question=None) -> dict:
+    """The AuditResultResponse fields as a plain dict, for endpoints that serialize rows directly."""
+    item = CHECKLIST_REGISTRY.get(question_id)
+    return {"id": finding_id, "run_id": run_id, "question_id": question_id, "question": item.question if item else (custom_question or question_id),
+            "answer": answer, "explanation": explanation, "timestamp": timestamp}
+
+def iter_finding_rows(db: Session, run_id: Optional[str] = None):
+    """Yields findings as finding_row dicts in ID order, live ones as the cursor produces them, merged with archived runs'."""
+    archived_runs = db.query(AuditRun).filter(AuditRun.archive_path.isnot(None))
+    if run_id: archived_runs = archived_runs.filter(AuditRun.run_id == run_id)
+    archived = []
+    for db_run in archived_runs.all():
+        custom_questions = {q.question_id: q.question for q in read_archived(db_run, "custom_questions")}
+        archived.append([finding_row(f.id, f.run_id, f.question_id, f.answer, f.explanation, f.timestamp, custom_questions.get(f.question_id))
+                         for f in read_archived(db_run, "findings")])
+    if run_id and archived and archived[0]:
+        yield from archived[0]
+        return
+
+    query = db.query(AuditFinding.id, AuditFinding.run_id, AuditFinding.question_id, AuditFinding.answer, AuditFinding.explanation,
+                     AuditFinding.timestamp, CustomQuestion.question).outerjoin(
+        CustomQuestion, and_(CustomQuestion.run_id == AuditFinding.run_id, CustomQuestion.question_id == AuditFinding.question_id)
+    )
+    if run_id: query = query.filter(AuditFinding.run_id == run_id)
+    live = (finding_row(*row) for row in query.order_by(AuditFinding.id.asc()).yield_per(FINDINGS_STREAM_BATCH))
+    yield from heapq.merge(live, *archived, key=lambda row: row["id"]) if archived else live
+
+def revise_finding(db: Session, db_finding: AuditFinding, answer: str, explanation: str, reason: str, timestamp: Optional[datetime.datetime] = None):
+    """Moves the finding's current values into the revision history (if they change) and applies the new ones."""
+    if db_finding.answer == answer and db_finding.explanation == explanation: return
+    db.add(FindingRevision(finding_id=db_finding.id, run_id=db_finding.run_id, question_id=db_finding.question_id, answer=db_finding.answer,
+                           explanation=db_finding.explanation, timestamp=db_finding.timestamp, reason=reason))
+    db_finding.answer, db_finding.explanation = answer, explanation
+    if timestamp: db_finding.timestamp = timestamp
+
+def get_custom_question_text(db: Session, run_id: str, question_id: str) -> Optional[str]:
+    if CHECKLIST_REGISTRY.get(question_id): return None
+    db_question = db.query(CustomQuestion).filter(CustomQuestion.run_id == run_id, CustomQuestion.question_id == question_id).first()
+    return db_question.question if db_question else None
+
+EVIDENCE_COMPRESSION_LEVEL = 6
+
+def compress_evidence(text: str):
+    """Returns (sha256, uncompressed size, zlib-compressed bytes) for a document's text."""
+    raw = text.encode("utf-8")
+    return hashlib.sha256(raw).hexdigest(), len(raw), zlib.compress(raw, EVIDENCE_COMPRESSION_LEVEL)
+
+def decompress_evidence(compression: str, content: bytes) -> str:
+    if compression != "zlib": raise ValueError(f"Unsupported evidence compression '{compression}'")
+    return zlib.decompress(content).decode("utf-8")
+
+def select_passages(text: str, keywords: List[str]) -> str:
+    """Keeps only the paragraphs (blank-line or line separated blocks) that mention one of the keywords."""
+    keywords = [kw.lower() for kw in keywords]
+    blocks = [block for block in text.split("\n\n") if block.strip()]
+    if len(blocks) <= 1: blocks = [line for line in text.splitlines() if line.strip()]
+    return "\n\n".join(block for block in blocks if any(kw in block.lower() for kw in keywords))
+
+OVERALL_AREA = "Overall"
+UNASSIGNED_PROJECT = "Unassigned" # Runs started before runs were linked to projects
+
+def refresh_score_rollups(db: Session, db_run: AuditRun):
+    """Recomputes one completed run's rollups from that run's findings only; other runs are untouched."""
+    custom_items = [CHECKLIST_REGISTRY.make_custom_item(q.question, q.weight, q.question_id) for q in db.query(CustomQuestion).filter(CustomQuestion.run_id == db_run.run_id)]
+    registry = CHECKLIST_REGISTRY.extend(custom_items)
+    answers = dict(db.query(AuditFinding.question_id, AuditFinding.answer).filter(AuditFinding.run_id == db_run.run_id).order_by(AuditFinding.id.asc()).all())
+    scope = db_run.scope.split(",") if db_run.scope else []
+    if custom_items and "Custom" not in scope: scope.append("Custom")
+    areas = {area: registry.filter([area]) for area in COMPLIANCE_AREAS if area in scope}
+    areas[OVERALL_AREA] = registry.filter(scope)
+
+    db.query(ScoreRollup).filter(ScoreRollup.run_id == db_run.run_id).delete()
+    for area, items in areas.items():
+        score = score_answers(items, answers)
+        if score["max"] > 0:
+            db.add(ScoreRollup(run_id=db_run.run_id, project_name=db_run.project_name or UNASSIGNED_PROJECT, area=area, percentage=score["percentage"],
+                               achieved=score["achieved"], max_score=score["max"], completed_at=db_run.end_time or db_run.start_time))
+
+def refresh_rollups_if_completed(db: Session, run_ids):
+    """Keeps rollups current when findings of an already completed run are added or edited."""
+    for db_run in db.query(AuditRun).filter(AuditRun.run_id.in_(set(run_ids)), AuditRun.status == RunStatus.completed).all():
+        refresh_score_rollups(db, db_run)
+
+# --- Tiered Storage ---
+# Completed runs past the retention window keep their audit_runs row and score rollups here (so run listings and
+# trends are unchanged) while their detail rows move to compressed Parquet. Reads of an archived run are served
+# from the archive; any write first restores the run into the database. Archived rows keep their IDs, so their tables
+# use AUTOINCREMENT on SQLite, which never hands an ID freed by archiving to a new row.
+ARCHIVED_TABLES = {"findings": AuditFinding, "finding_revisions": FindingRevision, "custom_questions": CustomQuestion, "question_metrics": QuestionMetrics}
+ARCHIVED_EVIDENCE_TABLE = "run_evidence"
+
+def row_to_dict(row) -> dict:
+    return {column.name: getattr(row, column.name) for column in row.__table__.columns}
+
+def get_archived_run(db: Session, run_id: str) -> Optional[AuditRun]:
+    return db.query(AuditRun).filter(AuditRun.run_id == run_id, AuditRun.archive_path.isnot(None)).first()
+
+def read_archived(db_run: AuditRun, table: str) -> list:
+    """An archived run's rows as detached model instances, so endpoints can format them like live rows."""
+    model = ARCHIVED_TABLES[table]
+    return sorted((model(**row) for row in run_archive.read_run_rows(db_run.archive_path, table, db_run.run_id)), key=lambda row: row.id)
+
+def read_archived_evidence(db_run: AuditRun) -> list:
+    return sorted(run_archive.read_run_rows(db_run.archive_path, ARCHIVED_EVIDENCE_TABLE, db_run.run_id), key=lambda row: row["id"])
+
+def archive_run(db: Session, db_run: AuditRun):
+    """Writes a run's detail rows to its project/month partition and deletes them here; the caller commits."""
+    partition = run_archive.partition_key(db_run.project_name or UNASSIGNED_PROJECT, (db_run.end_time or db_run.start_time).strftime("%Y-%m"))
+    for table, model in ARCHIVED_TABLES.items():
+        query = db.query(model).filter(model.run_id == db_run.run_id)
+        run_archive.write_run_rows(partition, table, db_run.run_id, [row_to_dict(row) for row in query.all()])
+        query.delete(synchronize_session=False)
+    # Evidence is archived with its text, and blobs no other live run links to are dropped from the database.
+    evidence = db.query(RunEvidence, EvidenceBlob).join(EvidenceBlob, EvidenceBlob.sha256 == RunEvidence.sha256).filter(RunEvidence.run_id == db_run.run_id).all()
+    run_archive.write_run_rows(partition, ARCHIVED_EVIDENCE_TABLE, db_run.run_id, [{**row_to_dict(blob), **row_to_dict(link)} for link, blob in evidence])
+    db.query(RunEvidence).filter(RunEvidence.run_id == db_run.run_id).delete(synchronize_session=False)
+    sha256s = {link.sha256 for link, _ in evidence}
+    if sha256s:
+        still_linked = {sha256 for (sha256,) in db.query(RunEvidence.sha256).filter(RunEvidence.sha256.in_(sha256s)).distinct()}
+        db.query(EvidenceBlob).filter(EvidenceBlob.sha256.in_(sha256s - still_linked)).delete(synchronize_session=False)
+    db_run.archive_path = partition
+
+def add_with_free_ids(db: Session, model, rows: list) -> dict:
+    """Adds rows keeping their IDs, except IDs a live row already holds, which get new ones. Returns {old ID: new ID}.
+
+    Only databases created before the archived tables used AUTOINCREMENT can have handed an archived row's ID out again.
+    """
+    taken = {row_id for (row_id,) in db.query(model.id).filter(model.id.in_([row.id for row in rows]))} if rows else set()
+    db.add_all(row for row in rows if row.id not in taken)
+    db.flush() # Before the new IDs are assigned, so they are drawn above the restored ones
+    remapped = {}
+    for row in rows:
+        if row.id in taken:
+            old_id, row.id = row.id, None
+            db.add(row)
+            db.flush()
+            remapped[old_id] = row.id
+    return remapped
+
+def restore_archived_run(db: Session, db_run: AuditRun):
+    """Moves an archived run's rows back into the database (with their original IDs where still free) and commits."""
+    partition, run_id = db_run.archive_path, db_run.run_id
+    finding_ids = {}
+    for table, model in ARCHIVED_TABLES.items():
+        rows = read_archived(db_run, table)
+        if model is FindingRevision: # Findings are restored first, so revisions can follow their finding to a new ID
+            for row in rows: row.finding_id = finding_ids.get(row.finding_id, row.finding_id)
+        remapped = add_with_free_ids(db, model, rows)
+        if model is AuditFinding: finding_ids = remapped
+    evidence = read_archived_evidence(db_run)
+    for row in evidence:
+        insert_if_absent(db, EvidenceBlob, sha256=row["sha256"], compression=row["compression"], content=row["content"], size=row["size"],
+                         stored_size=row["stored_size"], created_at=row["created_at"])
+    add_with_free_ids(db, RunEvidence, [RunEvidence(id=row["id"], run_id=run_id, doc_name=row["doc_name"], sha256=row["sha256"]) for row in evidence])
+    db_run.archive_path = None
+    db.commit()
+    for table in (*ARCHIVED_TABLES, ARCHIVED_EVIDENCE_TABLE): # Only once the rows are safely back in the database
+        run_archive.remove_run(partition, table, run_id)
+    print(f"--- ♻️ Run {run_id} restored from the archive ---")
+
+def restore_if_archived(db: Session, run_ids):
+    """Called before any write that touches these runs, so archived data is never modified in place."""
+    for db_run in db.query(AuditRun).filter(AuditRun.run_id.in_(set(run_ids)), AuditRun.archive_path.isnot(None)).all():
+        run_id = db_run.run_id
+        try:
+            restore_archived_run(db, db_run)
+        except IntegrityError:
+            db.rollback()
+            # Only a worker that restored the run first explains the conflict; anything else must not lose the write
+            if db.query(AuditRun.archive_path).filter(AuditRun.run_id == run_id).scalar() is not None: raise
+
 # --- API Endpoints ---
 @app.post("/projects/", response_model=ProjectCreate)
 async def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
@@ -97,9 +513,8 @@ async def get_projects(db: Session = Depends(get_db)):
     grouped_projects = {}
     if not projects: # Add default projects if the table is empty
         default_projects = ["Project_Alpha", "Project_Beta", "Project_Gamma"]
-        for proj_name in default_projects:
-            db_project = Project(company_name="Google", project_name=proj_name)
-            db.add(db_project)
+        for proj_name in default_projects: # Another worker may be seeding them at the same time
+            insert_if_absent(db, Project, company_name="Google", project_name=proj_name)
         db.commit()
         projects = db.query(Project).all()
 
@@ -112,17 +527,19 @@ async def get_projects(db: Session = Depends(get_db)):
 @app.post("/start_run/")
 async def start_run(run_request: RunStartRequest, db: Session = Depends(get_db)):
     scope_str = ",".join(run_request.scope)
-    db_run = AuditRun(run_id=run_request.run_id, scope=scope_str, status=RunStatus.in_progress)
+    db_run = AuditRun(run_id=run_request.run_id, project_name=run_request.project_name, scope=scope_str, status=RunStatus.in_progress)
     db.add(db_run)
     db.commit()
     return {"message": "Run started", "run_id": run_request.run_id, "scope": run_request.scope, "status": "in_progress"}
 
 @app.put("/complete_run/{run_id}")
 async def complete_run(run_id: str, db: Session = Depends(get_db)):
+    restore_if_archived(db, [run_id])
     db_run = db.query(AuditRun).filter(AuditRun.run_id == run_id).first()
     if not db_run: raise HTTPException(status_code=404, detail="Run not found")
     db_run.status = RunStatus.completed
     db_run.end_time = datetime.datetime.utcnow()
+    refresh_score_rollups(db, db_run)
     db.commit()
     return {"message": "Run completed", "run_id": run_id, "status": "completed"}
 
@@ -139,36 +556,256 @@ async def get_run_scope(run_id: str, db: Session = Depends(get_db)):
         return []
     return db_run.scope.split(',')
 
+@app.post("/custom_questions/", response_model=CustomQuestionResponse)
+async def create_custom_question(custom_question: CustomQuestionCreate, db: Session = Depends(get_db)):
+    restore_if_archived(db, [custom_question.run_id])
+    db_question = db.query(CustomQuestion).filter(CustomQuestion.run_id == custom_question.run_id, CustomQuestion.question_id == custom_question.question_id).first()
+    if db_question is None:
+        db_question = CustomQuestion(**custom_question.dict())
+        db.add(db_question)
+    else:
+        db_question.question = custom_question.question
+        db_question.weight = custom_question.weight
+    db.commit()
+    db.refresh(db_question)
+    return db_question
+
+@app.get("/custom_questions/", response_model=List[CustomQuestionResponse])
+async def get_custom_questions(run_id: str, db: Session = Depends(get_db)):
+    db_run = get_archived_run(db, run_id)
+    if db_run: return read_archived(db_run, "custom_questions")
+    return db.query(CustomQuestion).filter(CustomQuestion.run_id == run_id).order_by(CustomQuestion.id.asc()).all()
+
 @app.post("/submit_finding/", response_model=AuditResultResponse)
 async def submit_finding(result: AuditResultCreate, db: Session = Depends(get_db)):
-    db_finding = AuditFinding(**result.dict())
-    db.add(db_finding)
+    restore_if_archived(db, [result.run_id])
+    custom_question = None
+    if CHECKLIST_REGISTRY.get(result.question_id) is None:
+        custom_question = get_custom_question_text(db, result.run_id, result.question_id)
+        if custom_question is None and result.question:
+            db.add(CustomQuestion(run_id=result.run_id, question_id=result.question_id, question=result.question))
+            custom_question = result.question
+    # One row per (run, question): a re-run replaces the current answer and keeps the old one as a revision.
+    inserted = insert_if_absent(db, AuditFinding, **result.dict(exclude={"question"}))
+    db_finding = db.query(AuditFinding).filter(AuditFinding.run_id == result.run_id, AuditFinding.question_id == result.question_id).with_for_update().one()
+    if not inserted:
+        revise_finding(db, db_finding, result.answer, result.explanation, "resubmitted", result.timestamp)
+    db.flush()
+    refresh_rollups_if_completed(db, [result.run_id])
     db.commit()
     db.refresh(db_finding)
-    print(f"--- ✅ Finding #{db_finding.id} (Run: {db_finding.run_id}) saved to database ---")
-    return db_finding
+    print(f"--- ✅ Finding #{db_finding.id} (Run: {db_finding.run_id}) {'saved to' if inserted else 'updated in'} database ---")
+    return to_finding_response(db_finding, custom_question)
 
 @app.get("/get_findings/", response_model=List[AuditResultResponse])
 async def get_findings(run_id: str = None, db: Session = Depends(get_db)):
-    query = db.query(AuditFinding)
-    if run_id: query = query.filter(AuditFinding.run_id == run_id)
-    return query.order_by(AuditFinding.id.asc()).all()
+    return FastJSONResponse(list(iter_finding_rows(db, run_id)))
+
+@app.get("/get_findings/stream", response_class=StreamingResponse)
+def stream_findings(run_id: str = None):
+    """The same findings as /get_findings/, one JSON object per line, sent in chunks while the cursor is read."""
+    def generate():
+        db = SessionLocal() # Owned by the generator: the response body is produced after the endpoint returns
+        try:
+            chunk = []
+            for row in iter_finding_rows(db, run_id):
+                chunk.append(orjson.dumps(row))
+                if len(chunk) == FINDINGS_STREAM_BATCH:
+                    yield b"\n".join(chunk) + b"\n"
+                    chunk = []
+            if chunk: yield b"\n".join(chunk) + b"\n"
+        finally:
+            db.close()
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
+
+@app.get("/finding_revisions/", response_model=List[FindingRevisionResponse])
+async def get_finding_revisions(run_id: str, question_id: Optional[str] = None, db: Session = Depends(get_db)):
+    """Audit trail of superseded answers for a run (optionally one question), newest first."""
+    db_run = get_archived_run(db, run_id)
+    if db_run:
+        revisions = [r for r in read_archived(db_run, "finding_revisions") if not question_id or r.question_id == question_id]
+        return sorted(revisions, key=lambda r: (r.superseded_at, r.id), reverse=True)
+    query = db.query(FindingRevision).filter(FindingRevision.run_id == run_id)
+    if question_id: query = query.filter(FindingRevision.question_id == question_id)
+    return query.order_by(FindingRevision.superseded_at.desc(), FindingRevision.id.desc()).all()
+
+@app.post("/run_metrics/")
+async def submit_run_metrics(records: List[QuestionMetricsRecord], db: Session = Depends(get_db)):
+    """Adds per-question metric deltas to the stored totals for each (run, question)."""
+    restore_if_archived(db, [record.run_id for record in records])
+    for record in records:
+        db_metrics = db.query(QuestionMetrics).filter(QuestionMetrics.run_id == record.run_id, QuestionMetrics.question_id == record.question_id).first()
+        if db_metrics is None:
+            db_metrics = QuestionMetrics(run_id=record.run_id, question_id=record.question_id, stages="{}", cache_hits="{}", prompt_tokens=0, completion_tokens=0, llm_calls=0)
+            db.add(db_metrics)
+        stages = json.loads(db_metrics.stages)
+        for stage, seconds in record.stages.items():
+            stages[stage] = stages.get(stage, 0.0) + seconds
+            AUDIT_STAGE_SECONDS.inc(seconds, stage=stage)
+        cache_hits = json.loads(db_metrics.cache_hits)
+        for cache, hits in record.cache_hits.items():
+            cache_hits[cache] = cache_hits.get(cache, 0) + hits
+            CACHE_HITS.inc(hits, cache=cache)
+        db_metrics.stages, db_metrics.cache_hits = json.dumps(stages), json.dumps(cache_hits)
+        db_metrics.prompt_tokens += record.prompt_tokens
+        db_metrics.completion_tokens += record.completion_tokens
+        db_metrics.llm_calls += record.llm_calls
+        LLM_TOKENS.inc(record.prompt_tokens, kind="prompt")
+        LLM_TOKENS.inc(record.completion_tokens, kind="completion")
+        LLM_CALLS.inc(record.llm_calls)
+    db.commit()
+    return {"message": "Metrics recorded", "count": len(records)}
+
+@app.get("/run_metrics/{run_id}", response_model=List[QuestionMetricsRecord])
+async def get_run_metrics(run_id: str, db: Session = Depends(get_db)):
+    db_run = get_archived_run(db, run_id)
+    rows = read_archived(db_run, "question_metrics") if db_run else db.query(QuestionMetrics).filter(QuestionMetrics.run_id == run_id).order_by(QuestionMetrics.id.asc()).all()
+    return [
+        QuestionMetricsRecord(run_id=row.run_id, question_id=row.question_id, stages=json.loads(row.stages), prompt_tokens=row.prompt_tokens,
+                              completion_tokens=row.completion_tokens, llm_calls=row.llm_calls, cache_hits=json.loads(row.cache_hits))
+        for row in rows
+    ]
+
+@app.post("/runs/{run_id}/evidence/")
+async def store_run_evidence(run_id: str, documents: List[EvidenceDocument], db: Session = Depends(get_db)):
+    """Links extracted documents to a run, storing each distinct text once (compressed, keyed by its SHA-256)."""
+    restore_if_archived(db, [run_id])
+    new_blobs, stored_bytes = 0, 0
+    for document in documents:
+        sha256, size, content = compress_evidence(document.text)
+        if insert_if_absent(db, EvidenceBlob, sha256=sha256, compression="zlib", content=content, size=size, stored_size=len(content), created_at=datetime.datetime.utcnow()):
+            new_blobs, stored_bytes = new_blobs + 1, stored_bytes + len(content)
+        db_link = db.query(RunEvidence).filter(RunEvidence.run_id == run_id, RunEvidence.doc_name == document.doc_name).first()
+        if db_link is None:
+            db.add(RunEvidence(run_id=run_id, doc_name=document.doc_name, sha256=sha256))
+        else:
+            db_link.sha256 = sha256
+    db.commit()
+    return {"message": "Evidence stored", "run_id": run_id, "documents": len(documents), "new_blobs": new_blobs, "deduplicated": len(documents) - new_blobs, "stored_bytes": stored_bytes}
+
+@app.get("/runs/{run_id}/evidence/", response_model=List[EvidenceManifestEntry])
+async def get_run_evidence_manifest(run_id: str, db: Session = Depends(get_db)):
+    db_run = get_archived_run(db, run_id)
+    if db_run:
+        return [EvidenceManifestEntry(doc_name=row["doc_name"], sha256=row["sha256"], size=row["size"], stored_size=row["stored_size"]) for row in read_archived_evidence(db_run)]
+    rows = db.query(RunEvidence.doc_name, EvidenceBlob.sha256, EvidenceBlob.size, EvidenceBlob.stored_size).join(
+        EvidenceBlob, EvidenceBlob.sha256 == RunEvidence.sha256
+    ).filter(RunEvidence.run_id == run_id).order_by(RunEvidence.id.asc()).all()
+    return [EvidenceManifestEntry(doc_name=doc_name, sha256=sha256, size=size, stored_size=stored_size) for doc_name, sha256, size, stored_size in rows]
+
+@app.get("/runs/{run_id}/evidence/content", response_model=Dict[str, str])
+async def get_run_evidence_content(run_id: str, doc_names: Optional[List[str]] = Query(None), keywords: Optional[List[str]] = Query(None), db: Session = Depends(get_db)):
+    """Returns {doc_name: text} for the requested documents (all by default), trimmed to matching passages if keywords are given."""
+    db_run = get_archived_run(db, run_id)
+    if db_run:
+        rows = [(row["doc_name"], row["compression"], row["content"]) for row in read_archived_evidence(db_run) if not doc_names or row["doc_name"] in doc_names]
+    else:
+        query = db.query(RunEvidence.doc_name, EvidenceBlob.compression, EvidenceBlob.content).join(EvidenceBlob, EvidenceBlob.sha256 == RunEvidence.sha256).filter(RunEvidence.run_id == run_id)
+        if doc_names: query = query.filter(RunEvidence.doc_name.in_(doc_names))
+        rows = query.order_by(RunEvidence.id.asc()).all()
+    documents = {}
+    for doc_name, compression, content in rows:
+        text = decompress_evidence(compression, content)
+        if keywords:
+            text = select_passages(text, keywords)
+            if not text: continue
+        documents[doc_name] = text
+    return documents
+
+@app.get("/trends/", response_model=List[ScoreTrendPoint])
+async def get_score_trends(area: str = OVERALL_AREA, project_names: Optional[List[str]] = Query(None), since: Optional[datetime.datetime] = None, db: Session = Depends(get_db)):
+    """Score trajectories across projects and runs, read from the precomputed rollups."""
+    query = db.query(ScoreRollup).filter(ScoreRollup.area == area)
+    if project_names: query = query.filter(ScoreRollup.project_name.in_(project_names))
+    if since: query = query.filter(ScoreRollup.completed_at >= since)
+    return [
+        ScoreTrendPoint(project_name=row.project_name, run_id=row.run_id, area=row.area, percentage=row.percentage, achieved=row.achieved, max_score=row.max_score, completed_at=row.completed_at)
+        for row in query.order_by(ScoreRollup.project_name.asc(), ScoreRollup.completed_at.asc()).all()
+    ]
+
+@app.post("/trends/rebuild")
+async def rebuild_score_rollups(db: Session = Depends(get_db)):
+    """Recomputes the rollups of every completed run, e.g. after upgrading a database that predates them."""
+    # Archived runs keep the rollups computed before they were archived.
+    completed_runs = db.query(AuditRun).filter(AuditRun.status == RunStatus.completed, AuditRun.archive_path.is_(None)).all()
+    for db_run in completed_runs:
+        refresh_score_rollups(db, db_run)
+    db.commit()
+    return {"message": "Rollups rebuilt", "runs": len(completed_runs)}
+
+@app.post("/archive/")
+async def archive_completed_runs(older_than_days: int = run_archive.ARCHIVE_RETENTION_DAYS, vacuum: bool = True, db: Session = Depends(get_db)):
+    """Moves completed runs that ended more than `older_than_days` ago to the Parquet archive, one commit per run."""
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=older_than_days)
+    db_runs = db.query(AuditRun).filter(AuditRun.status == RunStatus.completed, AuditRun.archive_path.is_(None), AuditRun.end_time < cutoff).order_by(AuditRun.end_time.asc()).all()
+    for db_run in db_runs:
+        archive_run(db, db_run)
+        db.commit()
+    if vacuum and db_runs and engine.dialect.name == "sqlite":
+        # Deleted rows only free pages; VACUUM returns them to the filesystem so the hot file actually shrinks.
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.exec_driver_sql("VACUUM")
+    print(f"--- 🗄️ Archived {len(db_runs)} runs completed before {cutoff:%Y-%m-%d} ---")
+    return {"message": "Runs archived", "runs": len(db_runs), "cutoff": cutoff}
+
+@app.get("/archive/")
+async def get_archive_summary(db: Session = Depends(get_db)):
+    archived_runs = db.query(AuditRun).filter(AuditRun.archive_path.isnot(None)).count()
+    summary = {"archived_runs": archived_runs, **run_archive.archive_summary()}
+    if engine.dialect.name == "sqlite" and engine.url.database and os.path.exists(engine.url.database):
+        summary["database_bytes"] = os.path.getsize(engine.url.database)
+    return summary
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    body = render_prometheus(HTTP_REQUESTS, HTTP_LATENCY, AUDIT_STAGE_SECONDS, LLM_TOKENS, LLM_CALLS, CACHE_HITS)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
 
 @app.get("/get_runs/", response_model=List[str])
 async def get_runs(db: Session = Depends(get_db)):
     runs = db.query(AuditRun.run_id).distinct().order_by(AuditRun.start_time.desc()).all()
-    return [run[0] for run in runs]
+    return FastJSONResponse([run[0] for run in runs])
 
 @app.put("/update_finding/{finding_id}", response_model=AuditResultResponse)
 async def update_finding(finding_id: int, result_update: AuditResultUpdate, db: Session = Depends(get_db)):
     db_finding = db.query(AuditFinding).filter(AuditFinding.id == finding_id).first()
+    if db_finding is None: # The finding may belong to an archived run
+        restore_if_archived(db, run_archive.find_runs_by_finding_ids([finding_id]))
+        db_finding = db.query(AuditFinding).filter(AuditFinding.id == finding_id).first()
     if db_finding is None: raise HTTPException(status_code=404, detail="Finding not found")
-    db_finding.answer = result_update.answer
-    db_finding.explanation = result_update.explanation
+    revise_finding(db, db_finding, result_update.answer, result_update.explanation, "edited")
+    db.flush()
+    refresh_rollups_if_completed(db, [db_finding.run_id])
     db.commit()
     db.refresh(db_finding)
     print(f"--- 📝 Finding #{db_finding.id} updated in database ---")
-    return db_finding
+    return to_finding_response(db_finding, get_custom_question_text(db, db_finding.run_id, db_finding.question_id))
+
+@app.put("/update_findings/", response_model=List[AuditResultResponse])
+async def update_findings(updates: List[AuditResultBatchUpdate], db: Session = Depends(get_db)):
+    """Applies several edits in one transaction; nothing is saved if any finding is missing."""
+    db_findings = {f.id: f for f in db.query(AuditFinding).filter(AuditFinding.id.in_([u.id for u in updates])).all()}
+    missing_ids = sorted({u.id for u in updates} - db_findings.keys())
+    archived_run_ids = run_archive.find_runs_by_finding_ids(missing_ids) if missing_ids else set()
+    if archived_run_ids:
+        restore_if_archived(db, archived_run_ids)
+        db_findings = {f.id: f for f in db.query(AuditFinding).filter(AuditFinding.id.in_([u.id for u in updates])).all()}
+        missing_ids = sorted({u.id for u in updates} - db_findings.keys())
+    if missing_ids: raise HTTPException(status_code=404, detail=f"Findings not found: {', '.join(map(str, missing_ids))}")
+    for update in updates:
+        revise_finding(db, db_findings[update.id], update.answer, update.explanation, "edited")
+    db.flush()
+    refresh_rollups_if_completed(db, [f.run_id for f in db_findings.values()])
+    db.commit()
+    print(f"--- 📝 {len(updates)} findings updated in database ---")
+    custom_questions = {}
+    for db_finding in db_findings.values():
+        key = (db_finding.run_id, db_finding.question_id)
+        if key not in custom_questions:
+            custom_questions[key] = get_custom_question_text(db, *key)
+    return [to_finding_response(db_findings[u.id], custom_questions[(db_findings[u.id].run_id, db_findings[u.id].question_id)]) for u in updates]
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    workers = int(os.getenv("BACKEND_WORKERS", 1))
+    # Multiple workers need the app as an import string so each process can load it.
+    uvicorn.run("IRF_Backend:app" if workers > 1 else app, host=os.getenv("BACKEND_HOST", "127.0.0.1"), port=int(os.getenv("BACKEND_PORT", 8000)), workers=workers)
\ No newline at end of file
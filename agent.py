@@ -0,0 +1,222 @@
+import os
+import time
+import hashlib
+from typing import List, Literal
+from pydantic import BaseModel, Field
+import streamlit as st
+from langchain_core.callbacks import BaseCallbackHandler
+from integrations import update_irf_and_ui
+from metrics import record_cache_hit, record_llm_call, stage_timer
+from llm_scheduler import scheduled_chat_model
+
+# langchain, langchain_openai and the LangChain hub are imported where they are used, so importing this module stays cheap.
+
+# --- AGENT SETUP ---
+class PerformanceCallbackHandler(BaseCallbackHandler):
+    """Times every model call and records its token usage against the current run and question."""
+
+    def __init__(self):
+        self._start_times = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start_times[run_id] = time.perf_counter()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start_times[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start_time = self._start_times.pop(run_id, None)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        record_llm_call(usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0), time.perf_counter() - start_time if start_time else None)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._start_times.pop(run_id, None)
+
+PERFORMANCE_CALLBACK = PerformanceCallbackHandler()
+
+class AuditFindingInput(BaseModel):
+    question: str = Field(description="The full text of the audit question that was answered.")
+    answer: Literal["Yes", "No", "Partial"] = Field(description="The final answer based on the context.")
+    explanation: str = Field(description="A short explanation justifying the answer.")
+
+# The strong model answers everything unless the cascade is used; the fast model is only the cascade's first pass.
+STRONG_MODEL = os.getenv("LLM_STRONG_MODEL", "gpt-4-turbo")
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4o-mini")
+
+def make_chat_model(model_name: str):
+    from langchain_openai import ChatOpenAI
+    # Retries are left to the scheduler, which also backs off concurrency when the provider throttles us.
+    return scheduled_chat_model(ChatOpenAI)(model_name=model_name, temperature=0, max_retries=0, callbacks=[PERFORMANCE_CALLBACK])
+
+# --- Simple LLM instance for direct calls without agent logic ---
+@st.cache_resource
+def get_llm():
+    print("INFO: Creating new ChatOpenAI instance.")
+    return make_chat_model(STRONG_MODEL)
+
+@st.cache_resource
+def get_fast_llm():
+    print(f"INFO: Creating new ChatOpenAI instance for the fast model ({FAST_MODEL}).")
+    return make_chat_model(FAST_MODEL)
+
+def build_agent_executor(llm, agent_prompt=None, verbose=True):
+    """Builds the audit agent around any tool-calling chat model (the benchmarks pass a local fake)."""
+    from langchain.tools import StructuredTool
+    from langchain.agents import AgentExecutor, create_openai_tools_agent
+    tools = [ StructuredTool.from_function( func=update_irf_and_ui, name="SubmitAuditFinding", description="Use this tool to submit the final answer for a single audit question.", args_schema=AuditFindingInput ) ]
+    if agent_prompt is None:
+        from langchain import hub
+        agent_prompt = hub.pull("hwchase17/openai-tools-agent")
+    agent = create_openai_tools_agent(llm, tools, agent_prompt)
+    return AgentExecutor(agent=agent, tools=tools, verbose=verbose)
+
+@st.cache_resource
+def get_agent_executor():
+    print("INFO: Creating new LangChain AgentExecutor instance.")
+    return build_agent_executor(make_chat_model(STRONG_MODEL))
+
+# --- MODEL CASCADE (FAST MODEL FIRST, STRONG MODEL WHEN UNSURE) ---
+CASCADE_CONFIDENCE_THRESHOLD = float(os.getenv("CASCADE_CONFIDENCE_THRESHOLD", "0.8"))
+
+class ScoredAuditFinding(BaseModel):
+    answer: Literal["Yes", "No", "Partial"] = Field(description="The final answer based on the context.")
+    explanation: str = Field(description="A short explanation justifying the answer.")
+    confidence: float = Field(description="How certain the answer is, from 0.0 (a guess) to 1.0 (stated explicitly in the documents).")
+
+def should_escalate(finding: dict, threshold: float = CASCADE_CONFIDENCE_THRESHOLD) -> bool:
+    return finding["answer"] == "Partial" or finding["confidence"] < threshold
+
+def _scored_finding(llm, prompt: str) -> dict:
+    result = llm.with_structured_output(ScoredAuditFinding).invoke(prompt)
+    return {"answer": result.answer, "explanation": result.explanation, "confidence": min(1.0, max(0.0, result.confidence))}
+
+def cascade_prompt(question: str, document_context: str) -> str:
+    """The prompt both tiers of the cascade answer."""
+    return (
+        "Answer the audit question based *only* on the provided document content. Your answer MUST be one of 'Yes', 'No', or 'Partial'. "
+        "Give a short explanation and your confidence that the answer is correct."
+        f"\n\nAUDIT QUESTION:\n{question}\n\nDOCUMENT CONTENT:\n---\n{document_context}\n---"
+    )
+
+def evaluate_question_cascade(question: str, document_context: str, fast_llm=None, strong_llm=None, threshold: float = CASCADE_CONFIDENCE_THRESHOLD) -> dict:
+    """Answers with the fast model and re-asks the strong model when the answer is "Partial" or below `threshold`.
+
+    Returns the finding plus the tier that produced it ("fast" or "strong"). The time spent in each tier is
+    recorded as the `cascade_fast` and `cascade_strong` stages of the current question (see summarize_cascade).
+    """
+    prompt = cascade_prompt(question, document_context)
+    with stage_timer("cascade_fast"):
+        finding = _scored_finding(fast_llm or get_fast_llm(), prompt)
+    if not should_escalate(finding, threshold):
+        return {**finding, "tier": "fast"}
+    with stage_timer("cascade_strong"):
+        return {**_scored_finding(strong_llm or get_llm(), prompt), "tier": "strong"}
+
+# --- BATCHED EVALUATION (QUESTIONS SHARING THE SAME EVIDENCE) ---
+class BatchedAuditFinding(BaseModel):
+    question_number: int = Field(description="The number of the audit question being answered, as listed in the prompt.")
+    answer: Literal["Yes", "No", "Partial"] = Field(description="The final answer based on the context.")
+    explanation: str = Field(description="A short explanation justifying the answer.")
+
+class BatchedAuditFindings(BaseModel):
+    findings: List[BatchedAuditFinding] = Field(description="Exactly one finding for every numbered audit question.")
+
+def evaluate_question_batch(questions: list, document_context: str) -> list:
+    """Answers several questions against the same evidence in one model call.
+
+    Returns a list aligned with `questions`; each entry is a finding dict, or None if the model skipped that question.
+    """
+    numbered_questions = "\n".join(f"{number}. {question}" for number, question in enumerate(questions, 1))
+    prompt = (
+        "Answer each numbered audit question based *only* on the provided document content. "
+        "Each answer MUST be one of 'Yes', 'No', or 'Partial', with a short explanation. "
+        "Evaluate every question independently and return exactly one finding per question number."
+        f"\n\nAUDIT QUESTIONS:\n{numbered_questions}\n\nDOCUMENT CONTENT:\n---\n{document_context}\n---"
+    )
+    result = get_llm().with_structured_output(BatchedAuditFindings).invoke(prompt)
+    findings_by_number = {finding.question_number: finding for finding in result.findings}
+    return [
+        {"answer": finding.answer, "explanation": finding.explanation} if (finding := findings_by_number.get(number)) else None
+        for number in range(1, len(questions) + 1)
+    ]
+
+# --- LONG DOCUMENT MODE (MAP-REDUCE DIGESTS) ---
+CONTEXT_CHAR_BUDGET = int(os.getenv("CONTEXT_CHAR_BUDGET", "300000")) # ~75k tokens, leaves headroom in gpt-4-turbo's 128k window
+DIGEST_CHUNK_CHARS = 40000
+DIGEST_MAX_CONCURRENCY = 4
+DIGEST_MAX_ROUNDS = 3 # Map plus reduce passes before a digest that still does not fit is truncated
+DIGEST_CACHE_DIR = os.getenv("DIGEST_CACHE_DIR", os.path.join(".audit_cache", "digests"))
+
+DIGEST_PROMPT = (
+    """
+    You are condensing part of an audit evidence document so it can be reviewed later against many different audit questions.
+    Summarize the EXCERPT below. Keep every auditable fact: document titles and section headings, approvals and sign-offs,
+    dates, named roles and owners, plans, risks and mitigations, metrics, phase gates, reviews and their outcomes.
+    Do not add information and do not answer any question.
+
+    EXCERPT:\n---\n{content}\n---
+    SUMMARY:
+    """
+)
+
+def split_into_chunks(text: str, chunk_chars: int = DIGEST_CHUNK_CHARS) -> list:
+    """Splits text into chunks of at most `chunk_chars`, preferring paragraph and line boundaries."""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            boundary = text.rfind("\n\n", start, end)
+            if boundary <= start: boundary = text.rfind("\n", start, end)
+            if boundary > start: end = boundary
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+def get_document_digest(text: str) -> str:
+    """Returns a question-independent digest of a long document, cached on disk by content hash."""
+    cache_path = os.path.join(DIGEST_CACHE_DIR, f"{hashlib.sha256(text.encode('utf-8')).hexdigest()}.txt")
+    if os.path.exists(cache_path):
+        record_cache_hit("document_digest")
+        with open(cache_path, encoding="utf-8") as f:
+            return f.read()
+
+    from langchain.prompts import PromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+    chain = PromptTemplate.from_template(DIGEST_PROMPT) | get_llm() | StrOutputParser()
+    summaries = [text]
+    previous_chars = len(text)
+    # Map the chunks in parallel, then reduce until the digest fits in a single chunk. After DIGEST_MAX_ROUNDS passes,
+    # or once the summaries stop shrinking, the digest is truncated instead of paying for more calls.
+    for _ in range(DIGEST_MAX_ROUNDS):
+        chunks = [chunk for summary in summaries for chunk in split_into_chunks(summary)]
+        summaries = chain.batch([{"content": chunk} for chunk in chunks], config={"max_concurrency": DIGEST_MAX_CONCURRENCY})
+        digest = "\n\n".join(summary.strip() for summary in summaries)
+        if len(digest) <= DIGEST_CHUNK_CHARS or len(chunks) == 1 or len(digest) >= previous_chars:
+            break
+        previous_chars = len(digest)
+        summaries = [digest]
+    digest = digest[:DIGEST_CHUNK_CHARS]
+
+    os.makedirs(DIGEST_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(digest)
+    os.replace(tmp_path, cache_path)
+    return digest
+
+def fit_documents_to_budget(docs: dict, char_budget: int = CONTEXT_CHAR_BUDGET) -> dict:
+    """Replaces the largest documents with their digests until the combined text fits in `char_budget`.
+
+    Values can be strings or doc_store DocumentHandles; a handle is only decoded when it is digested."""
+    total_chars = sum(len(text) for text in docs.values())
+    if total_chars <= char_budget:
+        return dict(docs)
+
+    fitted_docs = dict(docs)
+    for doc_name in sorted(docs, key=lambda name: len(docs[name]), reverse=True):
+        if total_chars <= char_budget:
+            break
+        fitted_docs[doc_name] = f"[Digest of a long document]\n{get_document_digest(str(docs[doc_name]))}"
+        total_chars -= len(docs[doc_name]) - len(fitted_docs[doc_name])
+    return fitted_docs
@@ -0,0 +1,98 @@
+"""DOCX extraction benchmark: the streaming extractor versus python-docx on large documents.
+
+Run from the repository root, for example:
+
+    python -m benchmarks.bench_docx --paragraphs 20000 --table-rows 2000 --output docx.json
+
+A synthetic document with a header, a footer, body paragraphs and a risk-register style table is extracted by
+`extraction.extract_text_from_docx` and by python-docx (paragraphs only, as the app used to, and paragraphs plus
+table cells for a like-for-like comparison). The report gives time, peak Python memory and characters extracted.
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import datetime
+import statistics
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from docx import Document
+import extraction
+from benchmarks.synthetic import make_paragraphs
+
+def make_large_docx(paragraphs: int, table_rows: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    document = Document()
+    document.sections[0].header.paragraphs[0].text = "Confidential - Project Risk Register"
+    document.sections[0].footer.paragraphs[0].text = "Document owner: Delivery Manager"
+    for paragraph in make_paragraphs(rng, paragraphs, "risk register"):
+        document.add_paragraph(paragraph)
+    table = document.add_table(rows=table_rows, cols=4)
+    for r, row in enumerate(table.rows):
+        for cell, value in zip(row.cells, (f"R{r:05d}", f"Risk {rng.randint(1, 999)}", rng.choice(("High", "Medium", "Low")), "Mitigation and contingency in place")):
+            cell.text = value
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+def python_docx_paragraphs(file_bytes: bytes) -> str:
+    return "\n".join(paragraph.text for paragraph in Document(io.BytesIO(file_bytes)).paragraphs)
+
+def python_docx_with_tables(file_bytes: bytes) -> str:
+    document = Document(io.BytesIO(file_bytes))
+    rows = [" | ".join(cell.text for cell in row.cells) for table in document.tables for row in table.rows]
+    return "\n".join([paragraph.text for paragraph in document.paragraphs] + rows)
+
+def measure(func, file_bytes: bytes, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = func(file_bytes)
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(file_bytes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"median_ms": round(statistics.median(samples) * 1000, 1), "peak_mib": round(peak / 2 ** 20, 1), "chars": len(text)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--table-rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    file_bytes = make_large_docx(args.paragraphs, args.table_rows, args.seed)
+    results = {
+        "streaming": measure(extraction.extract_text_from_docx, file_bytes, args.repeat),
+        "python_docx_paragraphs": measure(python_docx_paragraphs, file_bytes, args.repeat),
+        "python_docx_with_tables": measure(python_docx_with_tables, file_bytes, args.repeat),
+    }
+    report = {
+        "benchmark": "docx",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "config": vars(args),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "document_bytes": len(file_bytes),
+        "results": results,
+        "speedup_vs_python_docx_with_tables": round(results["python_docx_with_tables"]["median_ms"] / results["streaming"]["median_ms"], 2),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Cold-start import benchmark for each Streamlit page.
+
+Run from the repository root, for example:
+
+    python -m benchmarks.bench_imports --repeat 5 --output imports.json
+
+Each page's top-level imports are executed in a fresh interpreter (so nothing is already cached in
+sys.modules) and timed. The same is done for the imports the monolithic utils module used to pull in on
+every page, which is the baseline the per-page numbers are compared against.
+"""
+import os
+import ast
+import sys
+import json
+import argparse
+import platform
+import datetime
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["Home.py"] + sorted(os.path.join("pages", name) for name in os.listdir(os.path.join(REPO_ROOT, "pages")) if name.endswith(".py"))
+
+# Everything `import utils` loaded before the shared code was split into lazily-importing modules.
+MONOLITHIC_UTILS_IMPORTS = """
+import pandas, requests, datetime, io, os, time, re, zlib, hashlib, threading
+import numpy
+import streamlit
+from pydantic import BaseModel, Field
+from langchain_openai import ChatOpenAI
+from langchain.tools import StructuredTool
+from langchain.agents import AgentExecutor, create_openai_tools_agent
+from langchain import hub
+from langchain.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.callbacks import BaseCallbackHandler
+from PyPDF2 import PdfReader
+from docx import Document
+import plotly.graph_objects
+from openpyxl.styles import Alignment
+from shareplum import Site, Office365
+from github import Github, Auth
+from thefuzz import fuzz
+import checklist, metrics
+"""
+
+_TIMING_HARNESS = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+exec(compile({source!r}, {label!r}, "exec"), {{"__name__": "__bench__"}})
+print(time.perf_counter() - start)
+print(len(sys.modules))
+"""
+
+def page_import_source(path: str) -> str:
+    """The top-level import statements of a page, i.e. what Streamlit executes before rendering anything."""
+    with open(os.path.join(REPO_ROOT, path), encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+def time_imports(label: str, source: str, repeat: int) -> dict:
+    samples, module_count = [], 0
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", _TIMING_HARNESS.format(root=REPO_ROOT, source=source, label=label)],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        )
+        seconds, module_count = completed.stdout.strip().splitlines()[-2:]
+        samples.append(float(seconds))
+    return {"median_ms": round(statistics.median(samples) * 1000, 1), "min_ms": round(min(samples) * 1000, 1), "modules_loaded": int(module_count)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement (the median is reported).")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    baseline_utils = time_imports("monolithic_utils", MONOLITHIC_UTILS_IMPORTS, args.repeat)
+    pages = {}
+    for page in PAGES:
+        source = page_import_source(page)
+        result = time_imports(page, source, args.repeat)
+        # Before the split every page that touched utils paid for all of its imports.
+        uses_shared_code = any(module in source for module in ("utils", "checklist", "extraction", "integrations", "agent", "scoring"))
+        if uses_shared_code:
+            baseline = time_imports(f"{page} (monolithic)", source + "\n" + MONOLITHIC_UTILS_IMPORTS, args.repeat)
+            result["monolithic_median_ms"] = baseline["median_ms"]
+            result["speedup"] = round(baseline["median_ms"] / result["median_ms"], 2) if result["median_ms"] else None
+        pages[page] = result
+
+    report = {
+        "benchmark": "imports",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "config": vars(args),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "monolithic_utils": baseline_utils,
+        "utils_facade": time_imports("utils", "import utils", args.repeat),
+        "pages": pages,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Concurrent-auditor load test for the IRF backend, with pass/fail thresholds.
+
+Run from the repository root, for example:
+
+    python -m benchmarks.bench_load --auditors 16 --dashboards 8
+    python -m benchmarks.bench_load --in-process --auditors 4 --dashboards 2 --runs-per-auditor 1
+    python -m benchmarks.bench_load --backend-url http://127.0.0.1:8000 --max-p95-ms submit_finding=250 --max-error-rate 0.01
+
+An async HTTP client (httpx) plays N auditors and M dashboards at once. Each auditor starts a run, submits a finding
+per question, reads the run back, updates some findings one by one and completes the run. Each dashboard polls
+/get_findings/, /get_run_status/ and /get_run_scope/ for the runs in progress, as the Summary Dashboard does, until
+the auditors finish.
+
+The backend is, by default, a local uvicorn (`--workers`) on a fresh SQLite database, as in bench_db_load.
+`--backend-url` targets a running server instead, and `--in-process` calls the app directly with no network or
+server in between (requests then share one event loop, so it measures the handlers rather than concurrency).
+
+The report gives throughput, per-operation latency percentiles and error rates. Thresholds (`--max-p95-ms`,
+`--max-p99-ms`, `--max-error-rate`, `--min-requests-per-s`) are checked against it; any violation is listed in the
+report and makes the command exit with status 1, so it can gate a CI job.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import datetime
+import statistics
+import contextlib
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import httpx
+from checklist import get_checklist_registry
+from benchmarks.bench_pipeline import percentile
+from benchmarks.bench_db_load import start_backend
+
+class AsyncLoadRecorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    async def call(self, operation, request):
+        start = time.perf_counter()
+        try:
+            response = await request
+            response.raise_for_status()
+            return response
+        except httpx.HTTPError as e:
+            self.errors.setdefault(operation, []).append(str(e)[:200] or type(e).__name__)
+            return None
+        finally:
+            self.samples.setdefault(operation, []).append(time.perf_counter() - start)
+
+async def auditor(client: httpx.AsyncClient, recorder: AsyncLoadRecorder, auditor_id: int, runs: int, questions: list, updates: int, active_runs: list):
+    for r in range(runs):
+        run_id = f"load_{auditor_id:03d}_{r:03d}_{time.time_ns()}"
+        if await recorder.call("start_run", client.post("/start_run/", json={"run_id": run_id, "scope": ["PCI"], "project_name": f"Load_{auditor_id % 10}"})) is None:
+            continue
+        active_runs.append(run_id)
+        for item in questions:
+            payload = {"run_id": run_id, "question_id": item.id, "answer": "Partial", "explanation": "Load test finding.", "timestamp": datetime.datetime.utcnow().isoformat()}
+            await recorder.call("submit_finding", client.post("/submit_finding/", json=payload))
+        response = await recorder.call("get_findings", client.get("/get_findings/", params={"run_id": run_id}))
+        for finding in (response.json()[:updates] if response is not None else []):
+            await recorder.call("update_finding", client.put(f"/update_finding/{finding['id']}", json={"answer": "Yes", "explanation": "Reviewed."}))
+        await recorder.call("complete_run", client.put(f"/complete_run/{run_id}"))
+        active_runs.remove(run_id)
+
+async def dashboard(client: httpx.AsyncClient, recorder: AsyncLoadRecorder, dashboard_id: int, poll_interval: float, active_runs: list, stop: asyncio.Event):
+    polls = 0
+    while not stop.is_set():
+        if active_runs:
+            run_id = active_runs[(dashboard_id + polls) % len(active_runs)]
+            await recorder.call("dashboard_get_findings", client.get("/get_findings/", params={"run_id": run_id}))
+            await recorder.call("dashboard_get_run_status", client.get(f"/get_run_status/{run_id}"))
+            await recorder.call("dashboard_get_run_scope", client.get(f"/get_run_scope/{run_id}"))
+            polls += 1
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(stop.wait(), poll_interval)
+
+async def drive_load(client: httpx.AsyncClient, args, questions: list) -> tuple:
+    recorder = AsyncLoadRecorder()
+    active_runs, stop = [], asyncio.Event()
+    start = time.perf_counter()
+    dashboards = [asyncio.create_task(dashboard(client, recorder, d, args.poll_interval, active_runs, stop)) for d in range(args.dashboards)]
+    await asyncio.gather(*(auditor(client, recorder, a, args.runs_per_auditor, questions, args.updates_per_run, active_runs) for a in range(args.auditors)))
+    stop.set()
+    await asyncio.gather(*dashboards)
+    return recorder, time.perf_counter() - start
+
+def make_client(base_url: str, transport=None, connections: int = 100) -> httpx.AsyncClient:
+    return httpx.AsyncClient(base_url=base_url, transport=transport, timeout=60, limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections))
+
+async def run_against(base_url: str, args, questions: list, transport=None) -> tuple:
+    async with make_client(base_url, transport, args.auditors + args.dashboards) as client:
+        return await drive_load(client, args, questions)
+
+def run_load(args, questions: list) -> tuple:
+    """Returns (recorder, elapsed seconds, description of the backend that was tested)."""
+    if args.backend_url:
+        return (*asyncio.run(run_against(args.backend_url, args, questions)), args.backend_url)
+    with tempfile.TemporaryDirectory() as workdir:
+        database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'load.db')}"
+        database = database_url.split(":", 1)[0] if args.database_url else "sqlite (WAL)"
+        if args.in_process:
+            os.environ["DATABASE_URL"] = database_url # Read when the backend module is imported
+            import IRF_Backend
+            transport = httpx.ASGITransport(app=IRF_Backend.app)
+            return (*asyncio.run(run_against("http://irf-backend", args, questions, transport)), f"in-process, {database}")
+        process, backend_url = start_backend(database_url, args.workers, workdir)
+        try:
+            return (*asyncio.run(run_against(backend_url, args, questions)), f"uvicorn --workers {args.workers}, {database}")
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+def summarize(recorder: AsyncLoadRecorder, elapsed: float) -> dict:
+    total_requests = sum(len(samples) for samples in recorder.samples.values())
+    total_errors = sum(len(errors) for errors in recorder.errors.values())
+    operations = {}
+    for operation, samples in sorted(recorder.samples.items()):
+        errors = recorder.errors.get(operation, [])
+        operations[operation] = {
+            "count": len(samples), "errors": len(errors), "error_rate": round(len(errors) / len(samples), 4),
+            "p50_ms": round(percentile(samples, 50) * 1000, 1), "p95_ms": round(percentile(samples, 95) * 1000, 1),
+            "p99_ms": round(percentile(samples, 99) * 1000, 1), "max_ms": round(max(samples) * 1000, 1),
+            "mean_ms": round(statistics.fmean(samples) * 1000, 1),
+        }
+        if errors: operations[operation]["error_sample"] = errors[0]
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests": total_requests,
+        "requests_per_s": round(total_requests / elapsed, 1) if elapsed else None,
+        "errors": total_errors,
+        "error_rate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+        "operations": operations,
+    }
+
+def parse_limits(values: list, flag: str) -> dict:
+    """Parses repeated OPERATION=MS options; the operation "*" applies to every operation without its own limit."""
+    limits = {}
+    for value in values or []:
+        operation, _, limit = value.partition("=")
+        try:
+            limits[operation.strip()] = float(limit)
+        except ValueError:
+            raise SystemExit(f"{flag} expects OPERATION=MILLISECONDS, got {value!r}")
+    return limits
+
+def check_thresholds(results: dict, args) -> list:
+    """Returns a description of every threshold the results exceed."""
+    violations = []
+    for stat, flag, limits in (("p95_ms", "--max-p95-ms", parse_limits(args.max_p95_ms, "--max-p95-ms")),
+                               ("p99_ms", "--max-p99-ms", parse_limits(args.max_p99_ms, "--max-p99-ms"))):
+        unknown = set(limits) - set(results["operations"]) - {"*"}
+        if unknown: violations.append(f"{flag}: no requests were recorded for {', '.join(sorted(unknown))}")
+        for operation, summary in results["operations"].items():
+            limit = limits.get(operation, limits.get("*"))
+            if limit is not None and summary[stat] > limit:
+                violations.append(f"{operation} {stat} {summary[stat]} > {limit}")
+    if args.max_error_rate is not None and results["error_rate"] > args.max_error_rate:
+        violations.append(f"error_rate {results['error_rate']} > {args.max_error_rate}")
+    if args.min_requests_per_s is not None and (results["requests_per_s"] or 0) < args.min_requests_per_s:
+        violations.append(f"requests_per_s {results['requests_per_s']} < {args.min_requests_per_s}")
+    return violations
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--backend-url", help="Load an already running backend instead of starting one.")
+    target.add_argument("--in-process", action="store_true", help="Call the backend app in this process, without a server.")
+    parser.add_argument("--database-url", help="Database for a started backend (default: a fresh SQLite file in WAL mode).")
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn workers for a started backend.")
+    parser.add_argument("--auditors", type=int, default=16, help="Concurrent simulated auditors.")
+    parser.add_argument("--dashboards", type=int, default=8, help="Concurrent simulated dashboards polling runs in progress.")
+    parser.add_argument("--runs-per-auditor", type=int, default=3)
+    parser.add_argument("--questions", type=int, default=20, help="Findings submitted per run.")
+    parser.add_argument("--updates-per-run", type=int, default=5, help="Findings each auditor then edits one by one.")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between a dashboard's polls.")
+    parser.add_argument("--max-p95-ms", action="append", metavar="OPERATION=MS", help="Fail if the operation's p95 latency exceeds MS ('*' for every operation). Repeatable.")
+    parser.add_argument("--max-p99-ms", action="append", metavar="OPERATION=MS", help="Like --max-p95-ms, for p99 latency.")
+    parser.add_argument("--max-error-rate", type=float, help="Fail if more than this fraction of requests fail.")
+    parser.add_argument("--min-requests-per-s", type=float, help="Fail if throughput falls below this.")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    questions = get_checklist_registry().items[:args.questions]
+    recorder, elapsed, backend = run_load(args, questions)
+    results = {"backend": backend, **summarize(recorder, elapsed)}
+    violations = check_thresholds(results, args)
+    report = {
+        "benchmark": "load",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "config": vars(args),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "results": results,
+        "passed": not violations,
+        "violations": violations,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if violations:
+        print("Load test thresholds exceeded:\n  " + "\n  ".join(violations), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,282 @@
+"""End-to-end pipeline benchmarks on synthetic evidence and a fake chat model.
+
+Run from the repository root, for example:
+
+    python -m benchmarks.bench_pipeline --docs 20 --pages 10 --questions 43 --llm-latency-ms 50 --output bench.json
+
+Every stage reports its sample count, p50/p95/mean latency and throughput as JSON, so two runs can be diffed.
+"""
+import os
+import io
+import sys
+import json
+import time
+import socket
+import zipfile
+import argparse
+import platform
+import tempfile
+import threading
+import contextlib
+import datetime
+import statistics
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import checklist
+import extraction
+import integrations
+import scoring
+import agent
+import llm_scheduler
+import streamlit as st
+from metrics import set_current_question, get_run_metrics
+from prescreen import PreScreener
+from dedup import find_duplicates
+from benchmarks.fake_llm import FakeAuditChatModel
+from benchmarks.synthetic import make_evidence_pack, make_checklist
+
+# Same shape as the hub's "hwchase17/openai-tools-agent" prompt, so the benchmark needs no network access.
+LOCAL_AGENT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful assistant"),
+    MessagesPlaceholder("chat_history", optional=True),
+    ("human", "{input}"),
+    MessagesPlaceholder("agent_scratchpad"),
+])
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[rank]
+
+class StageTimer:
+    """Collects per-item durations for each named stage."""
+
+    def __init__(self):
+        self.samples = {}
+        self.units = {}
+        self.items = {}
+
+    @contextlib.contextmanager
+    def measure(self, stage: str, items: int = 1, unit: str = "items"):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+            self.items[stage] = self.items.get(stage, 0) + items
+            self.units[stage] = unit
+
+    def report(self) -> dict:
+        report = {}
+        for stage, samples in self.samples.items():
+            total = sum(samples)
+            report[stage] = {
+                "count": len(samples),
+                "p50_ms": round(percentile(samples, 50) * 1000, 3),
+                "p95_ms": round(percentile(samples, 95) * 1000, 3),
+                "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+                "total_s": round(total, 4),
+                "throughput": round(self.items[stage] / total, 3) if total else None,
+                "throughput_unit": f"{self.units[stage]}/s",
+            }
+        return report
+
+@contextlib.contextmanager
+def local_backend():
+    """Starts IRF_Backend on a free port with a throwaway SQLite database and points the API client at it."""
+    import uvicorn
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir) # The backend's default database path is relative to the working directory
+        try:
+            import IRF_Backend
+            with socket.socket() as s:
+                s.bind(("127.0.0.1", 0))
+                port = s.getsockname()[1]
+            server = uvicorn.Server(uvicorn.Config(IRF_Backend.app, host="127.0.0.1", port=port, log_level="warning"))
+            thread = threading.Thread(target=server.run, daemon=True)
+            thread.start()
+            while not server.started:
+                time.sleep(0.05)
+            previous_url, integrations.BACKEND_URL = integrations.BACKEND_URL, f"http://127.0.0.1:{port}"
+            try:
+                yield integrations.BACKEND_URL
+            finally:
+                integrations.BACKEND_URL = previous_url
+                server.should_exit = True
+                thread.join(timeout=10)
+                IRF_Backend.engine.dispose()
+        finally:
+            os.chdir(previous_cwd)
+
+def bench_extraction(timer: StageTimer, pack: dict, iterations: int, keep_zip_copies: bool = False) -> dict:
+    from PyPDF2 import PdfReader
+    docs = {}
+    for _ in range(iterations):
+        for name, file_bytes in pack["pdf"].items():
+            extraction._pdf_cache.clear() # Measure cold extraction, not the page cache
+            pages = len(PdfReader(io.BytesIO(file_bytes)).pages)
+            with timer.measure("extract_pdf", items=pages, unit="pages"):
+                docs[name] = extraction.extract_text_from_pdf(file_bytes)
+        for name, file_bytes in pack["docx"].items():
+            with timer.measure("extract_docx", unit="documents"):
+                docs[name] = extraction.extract_text_from_docx(file_bytes)
+        for file_bytes in pack["zip"].values():
+            extraction._pdf_cache.clear()
+            with zipfile.ZipFile(io.BytesIO(file_bytes)) as z:
+                names = [n for n in z.namelist() if n.lower().endswith(('.pdf', '.docx'))]
+                with timer.measure("extract_zip", items=len(names), unit="documents"):
+                    for name in names:
+                        content = z.read(name)
+                        text = extraction.extract_text_from_docx(content) if name.lower().endswith('.docx') else extraction.extract_text_from_pdf(content)
+                        if keep_zip_copies: # As the Run Audit page does when a ZIP repeats documents that were already added
+                            docs[f"local_zip_{name}" if name in docs else name] = text
+    return docs
+
+def summarize_normalization(pack: dict) -> dict:
+    reports = [extraction.pdf_normalization_report(file_bytes) for file_bytes in pack["pdf"].values()]
+    return {"documents": len(reports), **{key: sum(report[key] for report in reports) for key in ("chars_before", "chars_saved", "tokens_saved", "boilerplate_lines_removed")}}
+
+def bench_dedup(timer: StageTimer, docs: dict) -> dict:
+    documents, chars = len(docs), sum(len(text) for text in docs.values())
+    with timer.measure("dedup", items=documents, unit="documents"):
+        duplicates = find_duplicates(docs)
+    for duplicate in duplicates:
+        del docs[duplicate["doc_name"]]
+    return {"documents": documents, "dropped": len(duplicates), "chars_dropped": chars - sum(len(text) for text in docs.values())}
+
+def bench_matching(timer: StageTimer, registry, docs: dict, iterations: int) -> dict:
+    with timer.measure("classify_documents", items=len(docs), unit="documents"):
+        evidence_index = extraction.classify_documents(docs)
+    matches = {}
+    for _ in range(iterations):
+        for item in registry.items:
+            with timer.measure("match_documents", unit="questions"):
+                matches[item.id] = extraction.match_documents(item.keywords, docs.keys(), evidence_index)
+    return matches
+
+def bench_reporting(timer: StageTimer, registry, iterations: int):
+    findings = [
+        {"id": i, "run_id": "bench_run", "question_id": item.id, "question": item.question, "answer": ("Yes", "No", "Partial")[i % 3],
+         "explanation": "Synthetic explanation. " * 5, "timestamp": datetime.datetime(2024, 1, 1).isoformat()}
+        for i, item in enumerate(registry.items)
+    ]
+    run_data = {finding['question_id']: finding for finding in findings}
+    for _ in range(iterations):
+        with timer.measure("calculate_all_scores", items=len(findings), unit="findings"):
+            scoring.calculate_all_scores(run_data, "bench_run")
+        with timer.measure("to_excel", items=len(findings), unit="findings"):
+            scoring.to_excel(findings)
+        with timer.measure("generate_word_report", items=len(findings), unit="findings"):
+            scoring.generate_word_report("bench_run", findings)
+
+def bench_audit_loop(timer: StageTimer, registry, docs: dict, matches: dict, llm, prescreen: bool = False, fast_llm=None) -> dict:
+    import requests
+    agent_executor = agent.build_agent_executor(llm, LOCAL_AGENT_PROMPT, verbose=False)
+    with local_backend() as backend_url:
+        run_id = f"bench_{int(time.time())}"
+        st.session_state.run_id = run_id
+        requests.post(f"{backend_url}/start_run/", json={"run_id": run_id, "scope": list(registry.tags)}).raise_for_status()
+        screener = PreScreener(docs) if prescreen else None
+        with timer.measure("audit_run_total", items=len(registry.items), unit="questions"):
+            for item in registry.items:
+                set_current_question(run_id, item.id)
+                with timer.measure("audit_question", unit="questions"):
+                    finding = screener.screen(item, matches[item.id]) if screener else None
+                    if finding:
+                        integrations.update_irf_and_ui(item.question, finding["answer"], finding["explanation"])
+                        continue
+                    matched_docs = agent.fit_documents_to_budget({name: docs[name] for name in matches[item.id]})
+                    context = "\n\n".join(f"--- Content from {name} ---\n{text}" for name, text in matched_docs.items()) or "No relevant documents were provided."
+                    if fast_llm is not None:
+                        finding = agent.evaluate_question_cascade(item.question, context, fast_llm=fast_llm, strong_llm=llm)
+                        integrations.update_irf_and_ui(item.question, finding["answer"], finding["explanation"])
+                        continue
+                    agent_input = f"Answer the audit question based *only* on the provided document content. Your answer MUST be one of 'Yes', 'No', or 'Partial'. After determining your answer, use the 'SubmitAuditFinding' tool.\n\nAUDIT QUESTION:\n{item.question}\n\nDOCUMENT CONTENT:\n---\n{context}\n---"
+                    agent_executor.invoke({"input": agent_input})
+        set_current_question(None, None)
+        requests.put(f"{backend_url}/complete_run/{run_id}").raise_for_status()
+        metric_rows = get_run_metrics(run_id).snapshot()
+        totals, stage_totals, _ = scoring.summarize_run_metrics(metric_rows)
+        return {**totals, "stage_seconds": {stage: round(seconds, 4) for stage, seconds in stage_totals.items()}, "cascade": scoring.summarize_cascade(metric_rows),
+                "scheduler": llm_scheduler.get_llm_scheduler().stats()}
+
+def use_checklist(registry):
+    """Points every module at the synthetic checklist, the same way a deployment selects its checklist file."""
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_checklist_"), "audit_checklist.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": registry.version, "tags": list(registry.tags), "questions": [item.to_dict() for item in registry.items]}, f)
+    os.environ["AUDIT_CHECKLIST_PATH"] = path
+    checklist.get_checklist_registry.cache_clear()
+    extraction.get_keyword_centroids.cache_clear()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=10, help="Number of synthetic evidence documents (half PDF, half DOCX).")
+    parser.add_argument("--pages", type=int, default=5, help="Pages per PDF (DOCX files get a comparable amount of text).")
+    parser.add_argument("--questions", type=int, default=43, help="Number of checklist questions.")
+    parser.add_argument("--iterations", type=int, default=3, help="Repetitions of the extraction, matching and reporting stages.")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Fixed latency of each fake model call.")
+    parser.add_argument("--llm-ms-per-1k-tokens", type=float, default=0.0, help="Additional fake model latency per 1k prompt tokens.")
+    parser.add_argument("--llm-rpm", type=int, default=llm_scheduler.LLM_REQUESTS_PER_MINUTE, help="Request rate the LLM scheduler allows.")
+    parser.add_argument("--provider-rpm", type=float, default=0.0, help="Make the fake model throttle (HTTP 429) above this request rate; 0 disables it.")
+    parser.add_argument("--cascade", action="store_true", help="Answer each question with a fast fake model first, escalating to the main fake model when unsure.")
+    parser.add_argument("--fast-llm-latency-ms", type=float, default=0.0, help="Fixed latency of each fast-model call in cascade mode.")
+    parser.add_argument("--fast-llm-confidence", type=float, default=0.9, help="Highest confidence the fast fake model reports (each question gets up to 0.3 less).")
+    parser.add_argument("--dedup", action="store_true", help="Keep the ZIP's copies of the documents, then drop duplicates before matching.")
+    parser.add_argument("--prescreen", action="store_true", help="Resolve clear-cut questions with the local rule pre-screen before calling the model.")
+    parser.add_argument("--skip-audit-loop", action="store_true", help="Skip the full audit loop (and the local backend it starts).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    timer = StageTimer()
+    registry = make_checklist(args.questions, seed=args.seed)
+    use_checklist(registry)
+    pack = make_evidence_pack(args.docs, args.pages, seed=args.seed)
+    llm_scheduler._scheduler = llm_scheduler.LLMScheduler(requests_per_minute=args.llm_rpm)
+    llm = llm_scheduler.scheduled_chat_model(FakeAuditChatModel)(
+        latency_seconds=args.llm_latency_ms / 1000, seconds_per_1k_prompt_tokens=args.llm_ms_per_1k_tokens / 1000,
+        provider_requests_per_minute=args.provider_rpm, callbacks=[agent.PERFORMANCE_CALLBACK],
+    )
+    fast_llm = llm_scheduler.scheduled_chat_model(FakeAuditChatModel)(
+        latency_seconds=args.fast_llm_latency_ms / 1000, confidence=args.fast_llm_confidence,
+        provider_requests_per_minute=args.provider_rpm, callbacks=[agent.PERFORMANCE_CALLBACK],
+    ) if args.cascade else None
+
+    # Pipeline code prints progress; keep stdout clean for the JSON report.
+    audit_usage, dedup_summary = None, None
+    with contextlib.redirect_stdout(sys.stderr):
+        docs = bench_extraction(timer, pack, args.iterations, keep_zip_copies=args.dedup)
+        if args.dedup:
+            dedup_summary = bench_dedup(timer, docs)
+        matches = bench_matching(timer, registry, docs, args.iterations)
+        bench_reporting(timer, registry, args.iterations)
+        if not args.skip_audit_loop:
+            audit_usage = bench_audit_loop(timer, registry, docs, matches, llm, prescreen=args.prescreen, fast_llm=fast_llm)
+
+    report = {
+        "benchmark": "pipeline",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "config": vars(args),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "stages": timer.report(),
+        "audit_usage": audit_usage,
+        "dedup": dedup_summary,
+        "normalization": summarize_normalization(pack),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
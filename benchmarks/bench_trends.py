@@ -0,0 +1,118 @@
+"""Portfolio trend benchmark: rollup reads versus scanning every finding.
+
+Run from the repository root, for example:
+
+    python -m benchmarks.bench_trends --projects 300 --runs-per-project 10 --output trends.json
+
+A throwaway SQLite database is seeded with completed runs and their findings, the score rollups are built
+through the backend, and then the trend API is timed against what a dashboard would otherwise have to do:
+fetch every finding of every run and score each run in pandas.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import datetime
+import statistics
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from checklist import get_checklist_registry, score_answers
+
+ANSWERS = ("Yes", "No", "Partial", "N/A")
+
+def seed_runs(backend, projects: int, runs_per_project: int, seed: int) -> int:
+    """Inserts completed runs with one finding per in-scope question; returns the number of findings."""
+    rng = random.Random(seed)
+    registry = get_checklist_registry()
+    areas = ["PCI", "GDPR", "Infosec", "CMMI", "ITSM"]
+    start = datetime.datetime(2023, 1, 1)
+    runs, findings = [], []
+    for p in range(projects):
+        quality = rng.uniform(0.3, 0.9)
+        for r in range(runs_per_project):
+            run_id = f"project_{p:04d}_run_{r:03d}"
+            scope = rng.sample(areas, rng.randint(1, 3))
+            started = start + datetime.timedelta(days=r * 30 + rng.randint(0, 20))
+            runs.append({"run_id": run_id, "project_name": f"Project_{p:04d}", "scope": ",".join(scope), "start_time": started,
+                         "end_time": started + datetime.timedelta(hours=1), "status": backend.RunStatus.completed})
+            quality = min(0.98, max(0.05, quality + rng.uniform(-0.05, 0.07)))
+            for item in registry.filter(scope):
+                answer = rng.choices(ANSWERS, weights=(quality, 1 - quality, 0.3, 0.05))[0]
+                findings.append({"run_id": run_id, "question_id": item.id, "answer": answer, "explanation": "Synthetic finding.", "timestamp": started})
+    with backend.SessionLocal() as db:
+        db.bulk_insert_mappings(backend.AuditRun, runs)
+        db.bulk_insert_mappings(backend.AuditFinding, findings)
+        db.commit()
+    return len(findings)
+
+def scan_all_findings(client) -> int:
+    """The rollup-free alternative: pull every finding and score each run client-side."""
+    import pandas as pd
+    registry = get_checklist_registry()
+    findings = pd.DataFrame(client.get("/get_findings/").json())
+    scores = [score_answers(registry.items, dict(zip(group['question_id'], group['answer']))) for _, group in findings.groupby('run_id')]
+    return len(scores)
+
+def timed(func, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {"median_ms": round(statistics.median(samples) * 1000, 1), "min_ms": round(min(samples) * 1000, 1)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=300)
+    parser.add_argument("--runs-per-project", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    from fastapi.testclient import TestClient
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir) # The backend's default database path is relative to the working directory
+        try:
+            import IRF_Backend
+            client = TestClient(IRF_Backend.app)
+            seed_start = time.perf_counter()
+            finding_count = seed_runs(IRF_Backend, args.projects, args.runs_per_project, args.seed)
+            seed_seconds = time.perf_counter() - seed_start
+            rebuild_start = time.perf_counter()
+            client.post("/trends/rebuild").raise_for_status()
+            rebuild_seconds = time.perf_counter() - rebuild_start
+            trend_points = len(client.get("/trends/").json())
+            report = {
+                "benchmark": "trends",
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "config": vars(args),
+                "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+                "dataset": {"runs": args.projects * args.runs_per_project, "findings": finding_count, "trend_points": trend_points,
+                            "seed_s": round(seed_seconds, 2), "rollup_rebuild_s": round(rebuild_seconds, 2),
+                            "rollup_refresh_per_run_ms": round(rebuild_seconds / (args.projects * args.runs_per_project) * 1000, 2)},
+                "trends_from_rollups": timed(lambda: client.get("/trends/").json(), args.repeat),
+                "trends_single_project": timed(lambda: client.get("/trends/", params={"project_names": ["Project_0000"]}).json(), args.repeat),
+                "scan_all_findings": timed(lambda: scan_all_findings(client), max(1, args.repeat // 2)),
+            }
+            IRF_Backend.engine.dispose()
+        finally:
+            os.chdir(previous_cwd)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Deterministic check of the model cascade's escalation rule, using the fake chat model.
+
+Run from the repository root:
+
+    python -m benchmarks.check_cascade
+
+The fast tier is a FakeAuditChatModel whose answer and confidence depend only on the prompt, so the first
+candidate question that produces each fast finding below is the same on every run:
+
+* a "Yes" at or above CASCADE_CONFIDENCE_THRESHOLD must stay with the fast model;
+* a "Partial" must escalate to the strong model, however confident;
+* a "Yes" or "No" below the threshold must escalate.
+
+summarize_cascade is then run on the stage timings those questions recorded and must report two escalations out of
+three. Any failed check is listed in the JSON report and makes the command exit with status 1.
+"""
+import os
+import sys
+import json
+import argparse
+import contextlib
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import agent
+import scoring
+from metrics import get_run_metrics, discard_run_metrics, set_current_question
+from benchmarks.fake_llm import FakeAuditChatModel
+
+RUN_ID = "_check_cascade"
+DOCUMENT_CONTEXT = "--- Content from Security Policy.pdf ---\nAccess reviews are performed quarterly and approved by the CISO."
+CASES = {
+    "confident_yes": (lambda finding, threshold: finding["answer"] == "Yes" and finding["confidence"] >= threshold, "fast"),
+    "partial": (lambda finding, threshold: finding["answer"] == "Partial" and finding["confidence"] >= threshold, "strong"),
+    "low_confidence": (lambda finding, threshold: finding["answer"] != "Partial" and finding["confidence"] < threshold, "strong"),
+}
+
+def find_questions(fast_llm, threshold: float, candidates: int) -> dict:
+    """The first candidate question whose fast finding falls into each case."""
+    found = {}
+    for n in range(candidates):
+        question = f"Is access control {n} reviewed and approved at least quarterly?"
+        finding = agent._scored_finding(fast_llm, agent.cascade_prompt(question, DOCUMENT_CONTEXT))
+        for case, (matches, _) in CASES.items():
+            if case not in found and matches(finding, threshold):
+                found[case] = (question, finding)
+        if len(found) == len(CASES): break
+    return found
+
+def run_checks(threshold: float, candidates: int) -> tuple:
+    # The fast model reports confidences between 0.7 and 1.0, on both sides of the default threshold of 0.8.
+    fast_llm = FakeAuditChatModel(confidence=1.0)
+    strong_llm = FakeAuditChatModel(latency_seconds=0.01)
+    failures, cases = [], {}
+    found = find_questions(fast_llm, threshold, candidates)
+    failures += [f"{case}: no candidate question produced this fast finding" for case in CASES if case not in found]
+
+    discard_run_metrics(RUN_ID)
+    for case, (question, fast_finding) in found.items():
+        set_current_question(RUN_ID, case)
+        finding = agent.evaluate_question_cascade(question, DOCUMENT_CONTEXT, fast_llm=fast_llm, strong_llm=strong_llm, threshold=threshold)
+        expected_tier = CASES[case][1]
+        cases[case] = {"question": question, "fast_answer": fast_finding["answer"], "fast_confidence": fast_finding["confidence"],
+                       "tier": finding["tier"], "expected_tier": expected_tier}
+        if finding["tier"] != expected_tier:
+            failures.append(f"{case}: answered by the {finding['tier']} tier, expected {expected_tier}")
+    set_current_question(None, None)
+
+    summary = scoring.summarize_cascade(get_run_metrics(RUN_ID).snapshot())
+    discard_run_metrics(RUN_ID)
+    expected_escalated = sum(CASES[case][1] == "strong" for case in found)
+    if summary is None:
+        failures.append("summarize_cascade: found no cascaded questions")
+    else:
+        if summary["questions"] != len(found) or summary["escalated"] != expected_escalated:
+            failures.append(f"summarize_cascade: {summary['escalated']} of {summary['questions']} escalated, expected {expected_escalated} of {len(found)}")
+        if found and abs(summary["escalation_rate"] - expected_escalated / len(found)) > 1e-9:
+            failures.append(f"summarize_cascade: escalation rate {summary['escalation_rate']}, expected {expected_escalated / len(found)}")
+    return cases, summary, failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=agent.CASCADE_CONFIDENCE_THRESHOLD, help="Confidence below which the fast answer escalates.")
+    parser.add_argument("--candidates", type=int, default=200, help="Candidate questions tried to find one per case.")
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        cases, summary, failures = run_checks(args.threshold, args.candidates)
+    print(json.dumps({"check": "cascade", "threshold": args.threshold, "cases": cases, "summary": summary,
+                      "passed": not failures, "failures": failures}, indent=2))
+    if failures:
+        print("Cascade checks failed:\n  " + "\n  ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
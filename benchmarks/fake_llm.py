@@ -0,0 +1,104 @@
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import deque
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+# --- DETERMINISTIC FAKE CHAT MODEL ---
+ANSWERS = ("Yes", "No", "Partial")
+_SINGLE_QUESTION = re.compile(r"AUDIT QUESTION:\s*\n(.*?)\n\s*\n", re.S)
+_NUMBERED_QUESTION = re.compile(r"^\s*(\d+)\.\s+(.+)$", re.M)
+
+class FakeRateLimitError(Exception):
+    """Stands in for the provider's HTTP 429 response."""
+    status_code = 429
+
+# Calls accepted in the last minute, shared by every fake model instance like a real account-wide limit.
+_accepted_calls = deque()
+_accepted_calls_lock = threading.Lock()
+
+def _check_provider_limit(requests_per_minute: float):
+    with _accepted_calls_lock:
+        now = time.monotonic()
+        while _accepted_calls and now - _accepted_calls[0] > 60:
+            _accepted_calls.popleft()
+        if len(_accepted_calls) >= requests_per_minute:
+            raise FakeRateLimitError(f"Rate limit of {requests_per_minute:g} requests per minute reached.")
+        _accepted_calls.append(now)
+
+def _pick_answer(text: str) -> str:
+    return ANSWERS[int(hashlib.md5(text.encode("utf-8")).hexdigest(), 16) % len(ANSWERS)]
+
+class FakeAuditChatModel(BaseChatModel):
+    """A local chat model that answers audit prompts deterministically after a configurable delay.
+
+    It understands the prompts and tools used by the app: the SubmitAuditFinding agent tool, the batched
+    structured-output schema and plain-text prompts (reanalysis, digests). Token usage is estimated at four
+    characters per token so instrumentation sees realistic numbers.
+    """
+    latency_seconds: float = 0.0
+    seconds_per_1k_prompt_tokens: float = 0.0
+    provider_requests_per_minute: float = 0.0 # When set, calls beyond this rate fail like a throttled provider
+    confidence: float = 0.9 # Highest confidence it reports for scored findings; each question gets up to 0.3 less
+    bound_tools: List[dict] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-audit-chat-model"
+
+    def bind_tools(self, tools, tool_choice=None, **kwargs):
+        return self.model_copy(update={"bound_tools": [convert_to_openai_tool(tool) for tool in tools]})
+
+    def _tool_arguments(self, tools: List[dict], tool_name: str, prompt: str) -> dict:
+        if tool_name in ("SubmitAuditFinding", "ScoredAuditFinding"):
+            match = _SINGLE_QUESTION.search(prompt)
+            question = match.group(1).strip() if match else prompt[:200]
+            arguments = {"question": question, "answer": _pick_answer(question + prompt[-500:]), "explanation": "Synthetic finding from the fake model."}
+            if tool_name == "ScoredAuditFinding":
+                spread = int(hashlib.md5(question.encode("utf-8")).hexdigest(), 16) % 31 / 100
+                del arguments["question"]
+                arguments["confidence"] = round(max(0.0, self.confidence - spread), 2)
+            return arguments
+        if tool_name == "BatchedAuditFindings":
+            questions_block = prompt.split("AUDIT QUESTIONS:", 1)[-1].split("DOCUMENT CONTENT:", 1)[0]
+            return {"findings": [
+                {"question_number": int(number), "answer": _pick_answer(question), "explanation": "Synthetic batched finding."}
+                for number, question in _NUMBERED_QUESTION.findall(questions_block)
+            ]}
+        # Any other schema: fill every field with an answer (or the first allowed value) so parsing succeeds.
+        tool = next(t for t in tools if t["function"]["name"] == tool_name)
+        properties = tool["function"]["parameters"].get("properties", {})
+        return {name: (_pick_answer(prompt) if "enum" not in spec else spec["enum"][0]) for name, spec in properties.items()}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.provider_requests_per_minute:
+            _check_provider_limit(self.provider_requests_per_minute)
+        prompt = "\n".join(str(message.content) for message in messages)
+        prompt_tokens = max(1, len(prompt) // 4)
+        time.sleep(self.latency_seconds + self.seconds_per_1k_prompt_tokens * prompt_tokens / 1000)
+
+        # The agent binds tools through `.bind(tools=...)`, structured output through `bind_tools`.
+        tools = kwargs.get("tools") or self.bound_tools
+        if tools and not isinstance(messages[-1], ToolMessage):
+            tool_name = tools[0]["function"]["name"]
+            arguments = self._tool_arguments(tools, tool_name, prompt)
+            call_id = f"call_{hashlib.md5(prompt.encode('utf-8')).hexdigest()[:12]}"
+            message = AIMessage(content="", tool_calls=[{"name": tool_name, "args": arguments, "id": call_id}],
+                                additional_kwargs={"tool_calls": [{"id": call_id, "type": "function", "function": {"name": tool_name, "arguments": json.dumps(arguments)}}]})
+        elif tools:
+            message = AIMessage(content="The finding has been submitted.")
+        else:
+            match = _SINGLE_QUESTION.search(prompt)
+            question = match.group(1).strip() if match else prompt
+            message = AIMessage(content=f"{_pick_answer(question)}\nSynthetic answer from the fake model.")
+
+        completion_tokens = max(1, len(str(message.content)) // 4 + 20)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        message.response_metadata = {"token_usage": usage, "model_name": self._llm_type}
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output={"token_usage": usage, "model_name": self._llm_type})
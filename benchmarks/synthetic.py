@@ -0,0 +1,100 @@
+import io
+import random
+import zipfile
+from docx import Document
+from checklist import ChecklistItem, ChecklistRegistry, get_checklist_registry
+
+# --- SYNTHETIC EVIDENCE CORPORA ---
+FILLER_WORDS = (
+    "the project team reviewed scope schedule budget quality stakeholders delivery sprint release milestone "
+    "approval baseline status report owner action item dependency assumption constraint customer vendor"
+).split()
+
+def make_paragraphs(rng: random.Random, count: int, topic: str) -> list:
+    """Generates filler paragraphs that mention `topic` often enough for content classification to pick it up."""
+    paragraphs = []
+    for i in range(count):
+        words = rng.choices(FILLER_WORDS, k=rng.randint(40, 90))
+        if i % 3 == 0:
+            words.insert(rng.randrange(len(words)), topic)
+        paragraphs.append(" ".join(words).capitalize() + ".")
+    return paragraphs
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages: list) -> bytes:
+    """Writes a minimal text PDF (one Helvetica text block per page) without any PDF-writing dependency."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_refs = []
+    for lines in pages:
+        operations = ["BT /F1 9 Tf 12 TL 40 800 Td"] + [f"({_pdf_escape(line)}) Tj T*" for line in lines] + ["ET"]
+        stream = "\n".join(operations).encode("latin-1", errors="replace")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>".encode())
+        page_refs.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(page_refs)} >>".encode()
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    output += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(output)
+
+def make_docx(paragraphs: list, table_rows: list = None) -> bytes:
+    document = Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    if table_rows:
+        table = document.add_table(rows=0, cols=len(table_rows[0]))
+        for row in table_rows:
+            cells = table.add_row().cells
+            for cell, value in zip(cells, row):
+                cell.text = value
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+def make_zip(files: dict) -> bytes:
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, content in files.items():
+            z.writestr(name, content)
+    return output.getvalue()
+
+def make_evidence_pack(num_docs: int, pages_per_doc: int, seed: int = 0, registry: ChecklistRegistry = None) -> dict:
+    """Builds {'pdf': {name: bytes}, 'docx': {name: bytes}, 'zip': {name: bytes}} named after checklist keywords."""
+    rng = random.Random(seed)
+    registry = registry or get_checklist_registry()
+    keywords = sorted({kw for item in registry.items if item.source != "github" for kw in item.keywords})
+    pack = {"pdf": {}, "docx": {}, "zip": {}}
+    for i in range(num_docs):
+        topic = keywords[i % len(keywords)]
+        name = f"{topic.replace(' ', '_')}_{i:04d}"
+        if i % 2 == 0:
+            pages = [[f"{name} - page {page + 1}"] + make_paragraphs(rng, 6, topic) for page in range(pages_per_doc)]
+            pack["pdf"][f"{name}.pdf"] = make_pdf(pages)
+        else:
+            rows = [["Risk", "Owner", "Mitigation"]] + [[f"R{r}", rng.choice(FILLER_WORDS), rng.choice(FILLER_WORDS)] for r in range(10)]
+            pack["docx"][f"{name}.docx"] = make_docx(make_paragraphs(rng, 6 * pages_per_doc, topic), rows)
+    pack["zip"]["evidence_pack.zip"] = make_zip({**pack["pdf"], **pack["docx"]})
+    return pack
+
+def make_checklist(num_questions: int, seed: int = 0) -> ChecklistRegistry:
+    """Builds a checklist of `num_questions` by cycling the real checklist's subjects, keywords, weights and tags."""
+    rng = random.Random(seed)
+    base = get_checklist_registry()
+    items = []
+    for i in range(num_questions):
+        template = base.items[i % len(base.items)]
+        items.append(ChecklistItem(
+            f"B{i:05d}", template.subject, f"{template.question} (variant {i})",
+            keywords=template.keywords, weight=rng.randint(1, 3), tags=template.tags, tag_mask=template.tag_mask,
+            source="sharepoint_or_local",
+        ))
+    return ChecklistRegistry(base.version, base.tags, items)
@@ -0,0 +1,176 @@
+import re
+import json
+import os
+import hashlib
+from functools import lru_cache
+
+# --- CHECKLIST REGISTRY (compiled from the versioned audit_checklist.json) ---
+CHECKLIST_PATH = os.getenv("AUDIT_CHECKLIST_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "audit_checklist.json"))
+SUPPORTED_CHECKLIST_VERSIONS = {1}
+CUSTOM_QUESTION_PREFIX = "C"
+CUSTOM_QUESTION_SUBJECT = "Custom Questions"
+CUSTOM_QUESTION_TAGS = ("PCI", "Custom")
+
+def _normalize_question(question: str) -> str:
+    return " ".join(question.split()).lower()
+
+def make_custom_question_id(question: str) -> str:
+    """Derives a stable short ID for an ad-hoc question from its text."""
+    return CUSTOM_QUESTION_PREFIX + hashlib.sha1(_normalize_question(question).encode("utf-8")).hexdigest()[:10]
+
+class EvidenceRules:
+    """Evidence a question declares in its optional "rules" object, compiled for the local pre-screen (see prescreen.py).
+
+    required_documents: substrings of document names; required_phrases: text that must appear (case and whitespace
+    insensitive); required_headings: text that must start a line, after any numbering or markdown markers;
+    patterns: regular expressions (case-insensitive, multiline).
+    Rules describe evidence that makes the answer "Yes", so questions about the absence of a problem (hardcoded
+    secrets, say) must not declare any. Only content rules can produce a "Yes", and they should match what a completed
+    document contains (a filled-in signature, a numbered entry), not the labels of a blank template.
+    """
+    __slots__ = ("required_documents", "required_phrases", "required_headings", "patterns", "heading_patterns", "compiled_patterns")
+    FIELDS = ("required_documents", "required_phrases", "required_headings", "patterns")
+
+    def __init__(self, required_documents=(), required_phrases=(), required_headings=(), patterns=()):
+        self.required_documents = tuple(required_documents)
+        self.required_phrases = tuple(required_phrases)
+        self.required_headings = tuple(required_headings)
+        self.patterns = tuple(patterns)
+        self.heading_patterns = tuple(re.compile(r"^[\s#*\d.)(-]*" + re.escape(heading) + r"\b", re.IGNORECASE | re.MULTILINE) for heading in self.required_headings)
+        self.compiled_patterns = tuple(re.compile(pattern, re.IGNORECASE | re.MULTILINE) for pattern in self.patterns)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EvidenceRules":
+        unknown_fields = [field for field in data if field not in cls.FIELDS]
+        if unknown_fields:
+            raise ValueError(f"Unknown evidence rule fields: {', '.join(unknown_fields)}")
+        return cls(**data)
+
+    def to_dict(self) -> dict:
+        return {field: list(getattr(self, field)) for field in self.FIELDS if getattr(self, field)}
+
+class ChecklistItem:
+    """A single compiled checklist question."""
+    __slots__ = ("id", "subject", "question", "keywords", "weight", "tags", "tag_mask", "source", "rules")
+
+    def __init__(self, id, subject, question, keywords=(), weight=0, tags=(), tag_mask=0, source="sharepoint_or_local", rules=None):
+        self.id = id
+        self.subject = subject
+        self.question = question
+        self.keywords = tuple(keywords)
+        self.weight = weight
+        self.tags = tuple(tags)
+        self.tag_mask = tag_mask
+        self.source = source
+        self.rules = rules
+
+    def to_dict(self) -> dict:
+        data = {"id": self.id, "subject": self.subject, "question": self.question, "keywords": list(self.keywords), "weight": self.weight, "tags": list(self.tags), "source": self.source}
+        if self.rules: data["rules"] = self.rules.to_dict()
+        return data
+
+    def __repr__(self):
+        return f"ChecklistItem({self.id!r}, {self.question[:40]!r})"
+
+class ChecklistRegistry:
+    """Checklist questions indexed by ID and question text, with one bit per compliance tag for scope filtering."""
+
+    def __init__(self, version, tags, items):
+        self.version = version
+        self.tags = tuple(tags)
+        self.tag_bits = {tag: 1 << bit for bit, tag in enumerate(self.tags)}
+        self.items = []
+        self.by_id = {}
+        self._by_question = {}
+        for item in items:
+            self._add(item)
+
+    def _add(self, item: ChecklistItem):
+        if item.id in self.by_id:
+            raise ValueError(f"Duplicate checklist question ID '{item.id}'")
+        self.items.append(item)
+        self.by_id[item.id] = item
+        self._by_question[_normalize_question(item.question)] = item
+
+    def tag_mask(self, tags) -> int:
+        mask = 0
+        for tag in tags:
+            mask |= self.tag_bits.get(tag, 0)
+        return mask
+
+    def filter(self, tags) -> list:
+        """Returns the items tagged with any of `tags`, in checklist order."""
+        mask = self.tag_mask(tags)
+        return [item for item in self.items if item.tag_mask & mask]
+
+    def get(self, question_id):
+        return self.by_id.get(question_id)
+
+    def resolve_id(self, question: str):
+        """Maps a question's text back to its ID, ignoring case and whitespace differences."""
+        item = self._by_question.get(_normalize_question(question))
+        return item.id if item else None
+
+    def make_custom_item(self, question: str, weight: int, question_id: str = None) -> ChecklistItem:
+        return ChecklistItem(
+            question_id or make_custom_question_id(question), CUSTOM_QUESTION_SUBJECT, question,
+            weight=weight, tags=CUSTOM_QUESTION_TAGS, tag_mask=self.tag_mask(CUSTOM_QUESTION_TAGS),
+        )
+
+    def extend(self, items) -> "ChecklistRegistry":
+        """Returns a new registry with extra (e.g. custom) items appended; this registry is left untouched."""
+        extra_items = [item for item in items if item.id not in self.by_id]
+        return ChecklistRegistry(self.version, self.tags, self.items + extra_items)
+
+# --- SCORING RULES (shared by the dashboard and the backend's score rollups) ---
+COMPLIANCE_AREAS = ("PCI", "GDPR", "Infosec", "CMMI", "ITSM", "Custom")
+ANSWER_MULTIPLIERS = {"Yes": 1.0, "Partial": 0.5, "No": 0.0}
+
+def score_answers(items, answers: dict) -> dict:
+    """Weighted score of `items` given {question_id: answer}. N/A is left out; unanswered questions score zero."""
+    achieved, maximum = 0.0, 0.0
+    for item in items:
+        answer = answers.get(item.id)
+        if answer != "N/A":
+            maximum += item.weight
+            achieved += item.weight * ANSWER_MULTIPLIERS.get(answer, 0.0)
+    return {"percentage": (achieved / maximum) * 100 if maximum > 0 else 0.0, "achieved": achieved, "max": maximum}
+
+def load_checklist_registry(path: str = CHECKLIST_PATH) -> ChecklistRegistry:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    version = data.get("version")
+    if version not in SUPPORTED_CHECKLIST_VERSIONS:
+        raise ValueError(f"Unsupported checklist version {version!r} in {path}")
+
+    tags = data["tags"]
+    tag_bits = {tag: 1 << bit for bit, tag in enumerate(tags)}
+    items = []
+    for entry in data["questions"]:
+        unknown_tags = [tag for tag in entry.get("tags", []) if tag not in tag_bits]
+        if unknown_tags:
+            raise ValueError(f"Question '{entry['id']}' uses undeclared tags: {', '.join(unknown_tags)}")
+        try:
+            rules = EvidenceRules.from_dict(entry["rules"]) if entry.get("rules") else None
+        except (ValueError, TypeError, re.error) as e:
+            raise ValueError(f"Question '{entry['id']}' has invalid evidence rules: {e}") from e
+        items.append(ChecklistItem(
+            entry["id"], entry["subject"], entry["question"],
+            keywords=entry.get("keywords", []), weight=entry.get("weight", 0), tags=entry.get("tags", []),
+            tag_mask=sum(tag_bits[tag] for tag in set(entry.get("tags", []))),
+            source=entry.get("source", "sharepoint_or_local"), rules=rules,
+        ))
+    return ChecklistRegistry(version, tags, items)
+
+@lru_cache(maxsize=1)
+def get_checklist_registry() -> ChecklistRegistry:
+    # The path is read when the registry is first built so tools (e.g. the benchmarks) can point it elsewhere.
+    return load_checklist_registry(os.getenv("AUDIT_CHECKLIST_PATH", CHECKLIST_PATH))
+
+def get_current_checklist() -> ChecklistRegistry:
+    """The compiled checklist plus the custom questions loaded into this session."""
+    import streamlit as st
+    return get_checklist_registry().extend(st.session_state.get("custom_checklist", []))
+
+def resolve_question_id(question: str) -> str:
+    return get_current_checklist().resolve_id(question) or make_custom_question_id(question)
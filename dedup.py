@@ -0,0 +1,107 @@
+import os
+import re
+import zlib
+import hashlib
+from functools import lru_cache
+from metrics import stage_timer
+
+# --- DUPLICATE EVIDENCE ELIMINATION ---
+# The same document often arrives twice (from SharePoint and again in an uploaded ZIP), and revisions of a document
+# (v1/v2 of a plan) arrive side by side. Exact copies are found by content hash, near-copies by comparing MinHash
+# signatures of their word shingles. Of each group only one document is kept for prompting: the newest version going
+# by its name (a date or a v2/rev3 marker), otherwise the most complete one.
+# numpy is imported where it is used, so importing this module stays cheap.
+DEDUP_SHINGLE_WORDS = 5 # Words per shingle
+DEDUP_PERMUTATIONS = 128 # Signature length; the similarity estimate's error is about 1/sqrt(DEDUP_PERMUTATIONS)
+DEDUP_NEAR_THRESHOLD = float(os.getenv("DEDUP_NEAR_THRESHOLD", 0.8)) # Estimated Jaccard similarity of the shingle sets
+DEDUP_MIN_SHINGLES = 20 # Shorter documents are only compared exactly
+_SIGNATURE_CHUNK = 8192 # Shingles permuted at a time, to bound memory on long documents
+_MERSENNE_PRIME = (1 << 61) - 1
+_WORD_PATTERN = re.compile(r"\w+")
+_VERSION_PATTERN = re.compile(r"(?:^|[^a-z])(?:v|ver|version|rev|revision)[ _.-]?(\d+(?:\.\d+)*)", re.IGNORECASE)
+_DATE_PATTERN = re.compile(r"(20\d{2})[-_.]?(0[1-9]|1[0-2])[-_.]?(0[1-9]|[12]\d|3[01])")
+
+def version_key(doc_name: str) -> tuple:
+    """Orders revisions of a document by the date, then the version number, in its name (("", ()) when it has neither)."""
+    date = _DATE_PATTERN.search(doc_name)
+    versions = _VERSION_PATTERN.findall(doc_name)
+    return ("".join(date.groups()) if date else "", tuple(int(part) for part in versions[-1].split(".")) if versions else ())
+
+@lru_cache(maxsize=1)
+def _permutations():
+    import numpy as np
+    rng = np.random.default_rng(0) # Fixed, so signatures stay comparable between sessions
+    return (rng.integers(1, _MERSENNE_PRIME, size=DEDUP_PERMUTATIONS, dtype=np.uint64),
+            rng.integers(0, _MERSENNE_PRIME, size=DEDUP_PERMUTATIONS, dtype=np.uint64))
+
+def minhash_signature(text: str):
+    """The document's MinHash signature over its word shingles, or None when it is too short to compare reliably."""
+    import numpy as np
+    words = _WORD_PATTERN.findall(text.lower())
+    shingles = {" ".join(words[i:i + DEDUP_SHINGLE_WORDS]) for i in range(len(words) - DEDUP_SHINGLE_WORDS + 1)}
+    if len(shingles) < DEDUP_MIN_SHINGLES: return None
+    hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+    a, b = _permutations()
+    signature = np.full(DEDUP_PERMUTATIONS, 0xFFFFFFFF, dtype=np.uint64)
+    for start in range(0, len(hashes), _SIGNATURE_CHUNK):
+        # (a * x + b) mod p, truncated to 32 bits; the products wrap at 64 bits, which keeps the hashes well mixed
+        permuted = ((np.outer(a, hashes[start:start + _SIGNATURE_CHUNK]) + b[:, None]) % _MERSENNE_PRIME) & 0xFFFFFFFF
+        np.minimum(signature, permuted.min(axis=1), out=signature)
+    return signature
+
+def _content_key(docs, doc_name: str) -> tuple:
+    """(SHA-256 of the text, its length), read from the document store's handle when there is one."""
+    if hasattr(docs, "handle"):
+        handle = docs.handle(doc_name)
+        return handle.sha256, len(handle)
+    text = docs[doc_name]
+    return hashlib.sha256(text.encode("utf-8")).hexdigest(), len(text)
+
+def find_duplicates(docs) -> list:
+    """Returns {"doc_name", "kept", "reason", "similarity"} for every document that duplicates a kept one."""
+    with stage_timer("dedup"):
+        return _find_duplicates(docs)
+
+def _find_duplicates(docs) -> list:
+    import numpy as np
+    duplicates = []
+    first_by_hash, lengths = {}, {}
+    for doc_name in docs:
+        digest, lengths[doc_name] = _content_key(docs, doc_name)
+        if digest in first_by_hash: # The first copy wins: SharePoint documents are added before local uploads
+            duplicates.append({"doc_name": doc_name, "kept": first_by_hash[digest], "reason": "exact duplicate", "similarity": 1.0})
+        else:
+            first_by_hash[digest] = doc_name
+
+    signatures = {}
+    for doc_name in first_by_hash.values():
+        signature = minhash_signature(docs[doc_name])
+        if signature is not None: signatures[doc_name] = signature
+    names = list(signatures)
+    if len(names) < 2: return duplicates
+    matrix = np.stack([signatures[doc_name] for doc_name in names])
+    group = list(range(len(names))) # Union-find over documents whose similarity passes the threshold
+    def find(i):
+        while group[i] != i:
+            group[i] = group[group[i]]
+            i = group[i]
+        return i
+    for i in range(len(names) - 1):
+        similarities = (matrix[i + 1:] == matrix[i]).mean(axis=1)
+        for j in np.flatnonzero(similarities >= DEDUP_NEAR_THRESHOLD):
+            group[find(i + 1 + j)] = find(i)
+
+    members = {}
+    for i in range(len(names)):
+        members.setdefault(find(i), []).append(i)
+    for indices in members.values():
+        if len(indices) < 2: continue
+        kept = max(indices, key=lambda i: (version_key(names[i]), lengths[names[i]]))
+        for i in indices:
+            if i == kept: continue
+            newer = version_key(names[kept]) > version_key(names[i])
+            duplicates.append({
+                "doc_name": names[i], "kept": names[kept], "reason": "older version" if newer else "less complete near-duplicate",
+                "similarity": round(float((matrix[i] == matrix[kept]).mean()), 3),
+            })
+    return duplicates
\ No newline at end of file
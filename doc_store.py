@@ -0,0 +1,157 @@
+import os
+import mmap
+import time
+import hashlib
+import weakref
+from collections.abc import MutableMapping
+
+# --- MEMORY-MAPPED DOCUMENT STORE ---
+# Extracted evidence text is written once to a content-addressed file and memory-mapped on first use, so session
+# state only holds small handles. The same document uploaded by several auditors is one file and one set of
+# page-cache pages, and text is only decoded while a question is actually using it.
+DOCUMENT_STORE_DIR = os.getenv("DOCUMENT_STORE_DIR", os.path.join(".audit_cache", "documents"))
+DOCUMENT_STORE_MAX_AGE_HOURS = float(os.getenv("DOCUMENT_STORE_MAX_AGE_HOURS", 24))
+_live_handles = weakref.WeakSet() # Every handle of this process (all Streamlit sessions share it); their files are never pruned
+
+class DocumentHandle:
+    """One document's text in the store. `len()` is its length in characters; `text()` decodes it from the mapping.
+    `close()` unmaps the file; the next read maps it again."""
+    __slots__ = ("sha256", "path", "size", "length", "_mmap", "__weakref__")
+
+    def __init__(self, sha256, path, size, length):
+        self.sha256 = sha256
+        self.path = path
+        self.size = size # UTF-8 bytes
+        self.length = length # Characters
+        self._mmap = None
+        _live_handles.add(self)
+
+    def __len__(self):
+        return self.length
+
+    def __reduce__(self): # Mappings cannot be pickled; a copy maps the file again on first use
+        return (DocumentHandle, (self.sha256, self.path, self.size, self.length))
+
+    def buffer(self) -> memoryview:
+        """The UTF-8 bytes as a zero-copy view of the mapped file."""
+        if not self.size: return memoryview(b"")
+        if self._mmap is None:
+            try:
+                with open(self.path, "rb") as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                os.utime(self.path) # Reading counts as use, for stores shared with other processes
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Extracted text {self.sha256[:12]} is no longer in {DOCUMENT_STORE_DIR}; process the documents again.") from None
+        return memoryview(self._mmap)
+
+    def text(self, max_chars=None) -> str:
+        """The text, or with `max_chars` only a prefix of it: at most that many characters, decoded from that many
+        bytes, so the rest of the document is never read."""
+        if max_chars is None or max_chars >= self.length:
+            return str(self.buffer(), "utf-8")
+        return str(self.buffer()[:max(max_chars, 0)], "utf-8", errors="ignore") # Drops a character cut off at the end
+
+    __str__ = text
+
+    def close(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+                self._mmap = None
+            except BufferError: # A view of it is still in use; it is unmapped when the handle is collected
+                pass
+
+def write_document(text: str) -> DocumentHandle:
+    """Stores `text` (once per distinct content) and returns a handle to it."""
+    raw = text.encode("utf-8")
+    sha256 = hashlib.sha256(raw).hexdigest()
+    path = os.path.join(DOCUMENT_STORE_DIR, sha256[:2], f"{sha256}.txt")
+    if os.path.exists(path):
+        os.utime(path) # Keeps documents that are still in use out of prune_document_store
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(raw)
+        os.replace(temp_path, path)
+    return DocumentHandle(sha256, path, len(raw), len(text))
+
+def prune_document_store(max_age_hours: float = DOCUMENT_STORE_MAX_AGE_HOURS) -> int:
+    """Deletes stored documents nobody has written or read for `max_age_hours`, except those this process still holds
+    handles to; returns how many were removed."""
+    cutoff = time.time() - max_age_hours * 3600
+    live_paths = {handle.path for handle in list(_live_handles)}
+    removed = 0
+    for root, _, files in os.walk(DOCUMENT_STORE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            if path in live_paths: continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError: # Already removed by another session, or still mapped (Windows)
+                pass
+    return removed
+
+class DocumentSet(MutableMapping):
+    """{doc_name: text} whose values live in the document store.
+
+    Iterating, `len()` and `handle(name)` never touch the text; indexing decodes that one document, so callers
+    written for a plain dict keep working while session state holds only handles. The mappings are closed when a
+    document is removed or replaced, when the set is closed (it is also a context manager) and when it is discarded.
+    """
+
+    def __init__(self, texts=None):
+        self._handles = {}
+        if texts: self.update(texts)
+
+    def __setitem__(self, doc_name, text):
+        previous = self._handles.get(doc_name)
+        self._handles[doc_name] = text if isinstance(text, DocumentHandle) else write_document(text)
+        if previous is not None and previous is not self._handles[doc_name]: previous.close()
+
+    def __getitem__(self, doc_name) -> str:
+        return self._handles[doc_name].text()
+
+    def __delitem__(self, doc_name):
+        self._handles.pop(doc_name).close()
+
+    def __iter__(self):
+        return iter(self._handles)
+
+    def __len__(self):
+        return len(self._handles)
+
+    def handle(self, doc_name) -> DocumentHandle:
+        return self._handles[doc_name]
+
+    def close(self):
+        """Unmaps every document; the set stays usable and maps them again on the next read."""
+        for handle in self._handles.values():
+            handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+def join_documents(docs, empty_text: str = "", char_budget=None) -> str:
+    """Builds the "--- Content from <name> ---" context for `docs` with a single copy of each document's text.
+
+    Values can be strings or DocumentHandles. With `char_budget`, the documents' text is cut off once that many
+    characters are used, and only the part of each handle that fits is read from the store.
+    """
+    pieces, remaining = [], char_budget
+    for doc_name, text in docs.items():
+        if remaining is not None and remaining <= 0: break
+        if isinstance(text, DocumentHandle): text = text.text(remaining)
+        elif remaining is not None: text = text[:remaining]
+        if remaining is not None: remaining -= len(text)
+        if pieces: pieces.append("\n\n")
+        pieces += (f"--- Content from {doc_name} ---\n", text)
+    return "".join(pieces) or empty_text
@@ -0,0 +1,385 @@
+import io
+import os
+import re
+import zlib
+import hashlib
+import zipfile
+import threading
+from functools import lru_cache
+from collections import OrderedDict, Counter
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from thefuzz import fuzz
+from checklist import get_checklist_registry
+from metrics import stage_timer, record_cache_hit
+
+# PyPDF2, python-docx and numpy are imported where they are used, so importing this module stays cheap.
+
+# --- DOCUMENT EXTRACTION ---
+PDF_PARALLEL_MIN_PAGES = 40 # Below this, starting worker processes costs more than it saves
+PDF_CACHE_SIZE = 32 # Number of parsed PDFs (and their extracted pages) kept in memory
+PDF_CACHE_MAX_BYTES = 64 * 1024 * 1024 # Total size of the cached PDFs (bytes still held plus extracted text)
+_pdf_cache = OrderedDict()
+_pdf_cache_lock = threading.Lock()
+
+# --- BOILERPLATE STRIPPING ---
+# Running headers, footers, page numbers and confidentiality banners repeat on most pages of a PDF and would otherwise
+# reach the model with every question. Lines near the top or bottom of a page that recur across pages (digits masked,
+# so "Page 3 of 40" matches "Page 4 of 40") are removed, runs of whitespace are collapsed and empty pages dropped.
+BOILERPLATE_EDGE_LINES = 3 # Non-empty lines at the top and at the bottom of each page that can be boilerplate
+BOILERPLATE_MIN_PAGE_SHARE = 0.5 # Share of pages a line must recur on to count as boilerplate
+BOILERPLATE_MIN_PAGES = 3 # Shorter documents only get their whitespace normalized
+_DIGITS_PATTERN = re.compile(r"\d+")
+_SPACES_PATTERN = re.compile(r"[^\S\n]+")
+_BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+def _boilerplate_key(line: str) -> str:
+    return _DIGITS_PATTERN.sub("#", " ".join(line.split()).lower())
+
+def _edge_line_numbers(lines: list) -> set:
+    content = [n for n, line in enumerate(lines) if line.strip()]
+    return set(content[:BOILERPLATE_EDGE_LINES] + content[-BOILERPLATE_EDGE_LINES:])
+
+def normalize_pages(pages: list) -> tuple:
+    """Joins a document's pages without repeated headers/footers, excess whitespace or empty pages.
+
+    Returns (text, report), the report giving the pages kept and dropped, the boilerplate lines removed and the
+    characters and estimated tokens saved.
+    """
+    page_lines = [page.splitlines() for page in pages]
+    edges = [_edge_line_numbers(lines) for lines in page_lines]
+    boilerplate = set()
+    if len(pages) >= BOILERPLATE_MIN_PAGES:
+        page_counts = Counter(key for lines, edge in zip(page_lines, edges) for key in {_boilerplate_key(lines[n]) for n in edge})
+        min_pages = max(BOILERPLATE_MIN_PAGES, BOILERPLATE_MIN_PAGE_SHARE * len(pages))
+        boilerplate = {key for key, count in page_counts.items() if key and count >= min_pages}
+    kept_pages, lines_removed = [], 0
+    for lines, edge in zip(page_lines, edges):
+        kept = []
+        for n, line in enumerate(lines):
+            if n in edge and _boilerplate_key(line) in boilerplate:
+                lines_removed += 1
+            else:
+                kept.append(_SPACES_PATTERN.sub(" ", line).strip())
+        page_text = _BLANK_LINES_PATTERN.sub("\n\n", "\n".join(kept)).strip()
+        if page_text: kept_pages.append(page_text)
+    text = "\n".join(kept_pages)
+    chars_before = sum(len(page) for page in pages)
+    return text, {
+        "pages": len(kept_pages), "empty_pages_dropped": len(pages) - len(kept_pages), "boilerplate_lines_removed": lines_removed,
+        "chars_before": chars_before, "chars_after": len(text), "chars_saved": chars_before - len(text),
+        "tokens_saved": (chars_before - len(text)) // 4, # Same estimate as the LLM scheduler
+    }
+
+def _extract_pdf_pages(file_bytes, page_numbers):
+    """Extracts a batch of pages in a worker process. Returns (page_number, text, error) tuples."""
+    from PyPDF2 import PdfReader
+    reader = PdfReader(io.BytesIO(file_bytes))
+    results = []
+    for page_number in page_numbers:
+        try:
+            results.append((page_number, reader.pages[page_number].extract_text() or "", None))
+        except Exception as e:
+            results.append((page_number, "", str(e)))
+    return results
+
+class PdfDocument:
+    """A lazy, page-granular view of a PDF. Pages are extracted on first access and cached individually.
+
+    Once every page has been extracted the file bytes and the parsed reader (with its page objects) are released;
+    only the text is kept.
+    """
+
+    def __init__(self, file_bytes):
+        from PyPDF2 import PdfReader
+        self.file_bytes = file_bytes
+        self.reader = PdfReader(io.BytesIO(file_bytes))
+        self.page_count = len(self.reader.pages)
+        self.page_errors = {}
+        self._pages = {}
+        self._normalized = {} # char_budget -> (text, report) from normalize_pages
+        self._lock = threading.Lock()
+
+    def _store(self, results):
+        for page_number, text, error in results:
+            self._pages[page_number] = text
+            if error:
+                self.page_errors[page_number] = error
+        if len(self._pages) == self.page_count:
+            self.file_bytes = self.reader = None
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held: the file bytes while they are kept, plus the extracted and normalized text."""
+        return (len(self.file_bytes) if self.file_bytes is not None else 0) + sum(len(text) for text in self._pages.values()) \
+            + sum(len(text) for text, _ in self._normalized.values())
+
+    def page(self, page_number):
+        """Returns the text of a single page. A page that fails to extract yields an empty string."""
+        with self._lock:
+            if page_number not in self._pages:
+                try:
+                    text, error = self.reader.pages[page_number].extract_text() or "", None
+                except Exception as e:
+                    text, error = "", str(e)
+                    print(f"WARNING: Could not extract page {page_number + 1} of PDF: {e}")
+                self._store([(page_number, text, error)])
+            return self._pages[page_number]
+
+    def iter_pages(self, char_budget=None):
+        """Yields (page_number, text) in order, stopping once `char_budget` characters have been produced."""
+        chars_used = 0
+        for page_number in range(self.page_count):
+            text = self.page(page_number)
+            yield page_number, text
+            chars_used += len(text)
+            if char_budget is not None and chars_used >= char_budget:
+                return
+
+    def extract_all(self, max_workers=None):
+        """Extracts every page not yet cached, spreading large documents across CPU cores."""
+        missing = [n for n in range(self.page_count) if n not in self._pages]
+        workers = min(max_workers or os.cpu_count() or 1, len(missing))
+        if len(missing) >= PDF_PARALLEL_MIN_PAGES and workers > 1:
+            batch_size = -(-len(missing) // workers)
+            batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+            try:
+                # Spawned, not forked: forking the multithreaded Streamlit server can deadlock the workers.
+                with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+                    for results in pool.map(_extract_pdf_pages, repeat(self.file_bytes), batches):
+                        with self._lock:
+                            self._store(results)
+            except Exception as e:
+                # Process pools can be unavailable (e.g. restricted hosts); fall back to serial extraction.
+                print(f"WARNING: Parallel PDF extraction failed, continuing serially: {e}")
+        return [self.page(n) for n in range(self.page_count)]
+
+    def normalized(self, char_budget=None) -> tuple:
+        """(text, report) after boilerplate stripping, computed once per budget and cached.
+
+        With `char_budget`, pages are extracted one by one and those after the page that reaches the budget are never
+        parsed; the report counts them as "pages_not_extracted".
+        """
+        if char_budget not in self._normalized:
+            with stage_timer("extraction"):
+                pages = self.extract_all() if char_budget is None else [text for _, text in self.iter_pages(char_budget)]
+            with stage_timer("normalization"):
+                text, report = normalize_pages(pages)
+            self._normalized[char_budget] = (text, {**report, "pages_not_extracted": self.page_count - len(pages)})
+            _trim_pdf_cache() # The document has grown by its text
+        return self._normalized[char_budget]
+
+    @property
+    def text(self):
+        return self.normalized()[0]
+
+def _trim_pdf_cache():
+    """Evicts the least recently used PDFs until the cache is within PDF_CACHE_SIZE and PDF_CACHE_MAX_BYTES.
+    The most recent document always stays, however large."""
+    with _pdf_cache_lock:
+        total = sum(document.nbytes for document in _pdf_cache.values())
+        while len(_pdf_cache) > 1 and (len(_pdf_cache) > PDF_CACHE_SIZE or total > PDF_CACHE_MAX_BYTES):
+            total -= _pdf_cache.popitem(last=False)[1].nbytes
+
+def load_pdf_document(file_bytes) -> PdfDocument:
+    """Returns a cached PdfDocument for these bytes, so repeated requests reuse already-extracted pages."""
+    key = hashlib.sha256(file_bytes).hexdigest()
+    with _pdf_cache_lock:
+        document = _pdf_cache.get(key)
+        if document is not None:
+            _pdf_cache.move_to_end(key)
+            record_cache_hit("pdf_document")
+            return document
+    document = PdfDocument(file_bytes)
+    with _pdf_cache_lock:
+        _pdf_cache[key] = document
+    _trim_pdf_cache()
+    return document
+
+def extract_text_from_pdf(file_bytes, char_budget=None):
+    """The PDF's text after boilerplate stripping; with `char_budget`, only as many pages as it takes to reach it."""
+    try:
+        with stage_timer("extraction"):
+            document = load_pdf_document(file_bytes)
+        return document.normalized(char_budget)[0]
+    except Exception as e:
+        return f"Error reading PDF: {e}"
+
+def pdf_normalization_report(file_bytes, char_budget=None) -> dict:
+    """What boilerplate stripping removed from a PDF (see normalize_pages); cheap after extract_text_from_pdf with the same budget."""
+    return load_pdf_document(file_bytes).normalized(char_budget)[1]
+
+# --- DOCX EXTRACTION (STREAMING) ---
+# The WordprocessingML parts are stream-parsed straight from the archive instead of building python-docx's object
+# tree. Headers come first, then the body (paragraphs and table rows in reading order), then footers.
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_PART_PATTERN = re.compile(r"^word/(header|footer)(\d*)\.xml$")
+DOCX_CELL_SEPARATOR = " | "
+
+def _iter_docx_blocks(stream):
+    """Yields each top-level paragraph and table row of a part as text, discarding elements as soon as they end.
+
+    Table cells are joined with DOCX_CELL_SEPARATOR; nested tables and text boxes are folded into their cell or
+    paragraph. Memory stays bounded by the largest single paragraph or table row.
+    """
+    import xml.etree.ElementTree as ET
+    open_blocks = [] # (tag, pieces) for every paragraph, table cell and table row being read
+    part_root = None
+    run_depth = 0 # w:tab also defines tab stops (w:pPr/w:tabs); only one inside a run (w:r) is a tab character
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag in (_W + "p", _W + "tc", _W + "tr"):
+                open_blocks.append((tag, []))
+            elif tag == _W + "r":
+                run_depth += 1
+            elif tag in (_W + "body", _W + "hdr", _W + "ftr"):
+                part_root = elem
+            continue
+        if tag == _W + "r":
+            run_depth -= 1
+            continue
+        if tag == _W + "t":
+            if elem.text and open_blocks: open_blocks[-1][1].append(elem.text)
+        elif tag == _W + "tab":
+            if open_blocks and run_depth: open_blocks[-1][1].append("\t")
+        elif tag in (_W + "br", _W + "cr"):
+            if open_blocks and run_depth: open_blocks[-1][1].append("\n")
+        elif tag in (_W + "p", _W + "tc", _W + "tr"):
+            _, pieces = open_blocks.pop()
+            if tag == _W + "p": text = "".join(pieces)
+            elif tag == _W + "tc": text = " ".join(piece for piece in pieces if piece.strip())
+            else: text = DOCX_CELL_SEPARATOR.join(pieces) if any(piece.strip() for piece in pieces) else ""
+            if open_blocks:
+                open_blocks[-1][1].append(text)
+            elif tag == _W + "p" or text:
+                yield text
+        else:
+            continue
+        elem.clear()
+        if not open_blocks and part_root is not None:
+            part_root.clear() # Drop the finished top-level elements the parser still links to the root
+
+def _docx_part_order(name: str):
+    match = _DOCX_PART_PATTERN.match(name)
+    return (0 if match.group(1) == "header" else 2, int(match.group(2) or 0))
+
+def extract_text_from_docx(file_bytes):
+    try:
+        with stage_timer("extraction"), zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+            names = archive.namelist()
+            if "word/document.xml" not in names:
+                raise ValueError("word/document.xml not found; not a Word document")
+            header_footer_parts = sorted((name for name in names if _DOCX_PART_PATTERN.match(name)), key=_docx_part_order)
+            parts = [name for name in header_footer_parts if name.startswith("word/header")] + ["word/document.xml"] + [name for name in header_footer_parts if name.startswith("word/footer")]
+            sections, seen_header_footers = [], set()
+            for name in parts:
+                with archive.open(name) as stream:
+                    text = "\n".join(_iter_docx_blocks(stream))
+                if name != "word/document.xml":
+                    text = text.strip()
+                    if not text or text in seen_header_footers: continue # Sections often repeat the same header
+                    seen_header_footers.add(text)
+                sections.append(text)
+        return "\n".join(sections)
+    except Exception as e:
+        return f"Error reading DOCX: {e}"
+# --- EVIDENCE CONTENT CLASSIFICATION ---
+CLASSIFIER_DIMENSIONS = 2 ** 15 # Size of the hashed feature space
+CLASSIFIER_MAX_NGRAM = 3 # Longest checklist keyword phrase, in words
+CLASSIFIER_TF_SATURATION = 3 # Occurrences at which a term counts as fully present in a document
+CLASSIFIER_MATCH_THRESHOLD = 0.6 # Share of a keyword's terms a document must contain
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9.\-]*[a-z0-9]|[a-z0-9]")
+
+def _hashed_ngram_indices(text: str) -> "numpy.ndarray":
+    """Tokenizes text and returns the hashed feature index of every 1..CLASSIFIER_MAX_NGRAM word n-gram."""
+    import numpy as np
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    ngrams = [" ".join(tokens[i:i + n]) for n in range(1, CLASSIFIER_MAX_NGRAM + 1) for i in range(len(tokens) - n + 1)]
+    return np.fromiter((zlib.crc32(ngram.encode("utf-8")) % CLASSIFIER_DIMENSIONS for ngram in ngrams), dtype=np.int64, count=len(ngrams))
+
+@lru_cache(maxsize=1)
+def get_keyword_centroids():
+    """Precomputes the checklist keyword vocabulary and its (keywords x features) centroid matrix."""
+    import numpy as np
+    keywords = sorted({kw.lower() for item in get_checklist_registry().items if item.source != "github" for kw in item.keywords})
+    centroids = np.zeros((len(keywords), CLASSIFIER_DIMENSIONS), dtype=np.float32)
+    for row, keyword in enumerate(keywords):
+        centroids[row, _hashed_ngram_indices(keyword)] = 1.0
+    return keywords, centroids
+
+class EvidenceIndex:
+    """Per-document keyword scores from content classification, queried with one vectorized lookup per question.
+
+    `coverage` decides whether a document matches a keyword; `relevance` only orders the documents that do.
+    """
+
+    def __init__(self, doc_names, keywords, coverage, relevance, threshold=CLASSIFIER_MATCH_THRESHOLD):
+        self.doc_names = list(doc_names)
+        self.keywords = list(keywords)
+        self.coverage = coverage # (documents x keywords): share of the keyword's terms present, in [0, 1]
+        self.relevance = relevance # (documents x keywords): the same share with terms weighted by IDF, in [0, 1]
+        self.threshold = threshold
+        self._keyword_columns = {keyword: col for col, keyword in enumerate(self.keywords)}
+
+    def tags(self, doc_name) -> dict:
+        """Returns {keyword: coverage} for every keyword the document was classified under."""
+        import numpy as np
+        row = self.coverage[self.doc_names.index(doc_name)]
+        return {self.keywords[col]: float(row[col]) for col in np.flatnonzero(row >= self.threshold)}
+
+    def match(self, keywords) -> list:
+        """Returns the documents whose content matches any of the keywords, most relevant first."""
+        import numpy as np
+        columns = [self._keyword_columns[kw.lower()] for kw in keywords if kw.lower() in self._keyword_columns]
+        if not columns or not self.doc_names:
+            return []
+        passed = self.coverage[:, columns] >= self.threshold
+        rows = np.flatnonzero(passed.any(axis=1))
+        best_relevance = np.where(passed, self.relevance[:, columns], 0.0).max(axis=1)
+        return [self.doc_names[row] for row in sorted(rows, key=lambda row: -best_relevance[row])]
+
+def classify_documents(docs: dict) -> EvidenceIndex:
+    """Classifies each document's content against the checklist keywords using hashed TF-IDF features."""
+    with stage_timer("classification"):
+        return _classify_documents(docs)
+
+def _classify_documents(docs: dict) -> EvidenceIndex:
+    import numpy as np
+    keywords, centroids = get_keyword_centroids()
+    doc_names = list(docs.keys())
+    term_presence = np.zeros((len(doc_names), CLASSIFIER_DIMENSIONS), dtype=np.float32)
+    for row, doc_name in enumerate(doc_names):
+        counts = np.bincount(_hashed_ngram_indices(docs[doc_name]), minlength=CLASSIFIER_DIMENSIONS)
+        term_presence[row] = np.minimum(1.0, np.log1p(counts) / np.log1p(CLASSIFIER_TF_SATURATION))
+
+    # A document matches a keyword on the plain share of the keyword's terms it contains, so a topic that runs through
+    # most of the pack still matches everywhere it appears. Weighting the terms by IDF over the pack only ranks the
+    # matches: a document with the distinctive part of a phrase ("management plan") comes before one with just "plan".
+    coverage = term_presence @ (centroids / np.maximum(centroids.sum(axis=1, keepdims=True), 1e-9)).T
+    document_frequency = (term_presence > 0).sum(axis=0)
+    idf = np.log((1 + len(doc_names)) / (1 + document_frequency)) + 1.0
+    weighted_centroids = centroids * idf.astype(np.float32)
+    weighted_centroids /= np.maximum(weighted_centroids.sum(axis=1, keepdims=True), 1e-9)
+    relevance = term_presence @ weighted_centroids.T
+    return EvidenceIndex(doc_names, keywords, coverage, relevance)
+
+# --- DOCUMENT MATCHING ---
+MATCH_THRESHOLD = 85 # Similarity score from 0 to 100
+
+def match_documents(keywords, doc_names, evidence_index=None):
+    """Returns the documents whose classified content matches any of the keywords (most relevant first), then those
+    whose names fuzzily match one."""
+    with stage_timer("matching"):
+        matched_doc_names = evidence_index.match(keywords) if evidence_index else []
+        content_matches = set(matched_doc_names)
+        for doc_name in doc_names:
+            if doc_name in content_matches:
+                continue
+            for keyword in keywords:
+                similarity_score = fuzz.partial_ratio(keyword.lower(), doc_name.lower())
+                if similarity_score >= MATCH_THRESHOLD:
+                    if doc_name not in matched_doc_names:
+                        matched_doc_names.append(doc_name)
+        return matched_doc_names
@@ -0,0 +1,138 @@
+import os
+import json
+import base64
+import fnmatch
+import posixpath
+import subprocess
+from metrics import stage_timer, record_cache_hit
+
+# --- REPOSITORY INDEX FOR GITHUB EVIDENCE ---
+# Checklist keywords such as "config.py" or "README.md" are resolved against every path in the repository, not just
+# its root. One recursive tree listing is taken per commit and cached on disk by commit SHA; keyword lookups then run
+# locally and only the matching blobs are downloaded, cached by blob SHA (a blob's content never changes).
+# A local clone is indexed with git instead of the GitHub API when the repository name is a directory under
+# GITHUB_CLONE_ROOT. Without that setting only the API is used, so a name typed into the app never reaches the disk.
+GITHUB_CLONE_ROOT = os.getenv("GITHUB_CLONE_ROOT")
+GITHUB_CACHE_DIR = os.getenv("GITHUB_CACHE_DIR", os.path.join(".audit_cache", "github"))
+GITHUB_MAX_MATCHES = int(os.getenv("GITHUB_MAX_MATCHES", 10)) # Files fetched per keyword, shallowest paths first
+GITHUB_MAX_FILE_BYTES = 512 * 1024 # Larger files (data, lock files, bundles) are left out of the index
+GITHUB_IGNORED_DIRS = frozenset({".git", "node_modules", "vendor", "dist", "build", "venv", ".venv", "site-packages", "__pycache__"})
+
+def _indexable(path: str, size: int) -> bool:
+    return size <= GITHUB_MAX_FILE_BYTES and not GITHUB_IGNORED_DIRS.intersection(path.split("/")[:-1])
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+class _GitHubSource:
+    def __init__(self, repo):
+        self.repo = repo
+
+    def head(self) -> str:
+        return self.repo.get_branch(self.repo.default_branch).commit.sha
+
+    def list_tree(self, commit_sha: str) -> dict:
+        tree = self.repo.get_git_tree(commit_sha, recursive=True)
+        if tree.raw_data.get("truncated"):
+            print(f"WARNING: GitHub truncated the tree listing of '{self.repo.full_name}'; some files may not be found. Index a local clone instead.")
+        return {e.path: (e.sha, e.size or 0) for e in tree.tree if e.type == "blob" and _indexable(e.path, e.size or 0)}
+
+    def read_blob(self, blob_sha: str) -> bytes:
+        blob = self.repo.get_git_blob(blob_sha)
+        return base64.b64decode(blob.content) if blob.encoding == "base64" else blob.content.encode("utf-8")
+
+class _LocalSource:
+    def __init__(self, path: str):
+        self.path = path
+
+    def _git(self, *args) -> bytes:
+        return subprocess.run(["git", "-C", self.path, *args], check=True, capture_output=True).stdout
+
+    def head(self) -> str:
+        return self._git("rev-parse", "HEAD").decode().strip()
+
+    def list_tree(self, commit_sha: str) -> dict:
+        entries = {}
+        for record in self._git("ls-tree", "-r", "-l", "-z", commit_sha).decode("utf-8", errors="replace").split("\0"):
+            if not record: continue
+            meta, path = record.split("\t", 1)
+            _, kind, blob_sha, size = meta.split()
+            if kind == "blob" and _indexable(path, int(size)):
+                entries[path] = (blob_sha, int(size))
+        return entries
+
+    def read_blob(self, blob_sha: str) -> bytes:
+        return self._git("cat-file", "blob", blob_sha)
+
+def local_clone_path(repo_name: str):
+    """The clone directory for `repo_name` (a path relative to GITHUB_CLONE_ROOT), or None to use the GitHub API."""
+    if not GITHUB_CLONE_ROOT: return None
+    root = os.path.realpath(GITHUB_CLONE_ROOT)
+    path = os.path.realpath(os.path.join(root, repo_name))
+    if path == root or os.path.commonpath([root, path]) != root or not os.path.isdir(path): return None
+    return path
+
+class RepositoryIndex:
+    """Every file of one commit of a repository as {path: (blob SHA, size)}, with keyword lookup and cached reads."""
+
+    def __init__(self, repo_name, commit_sha, entries, source):
+        self.repo_name = repo_name
+        self.commit_sha = commit_sha
+        self.entries = entries
+        self._source = source
+        self._by_basename = {}
+        for path in entries:
+            self._by_basename.setdefault(posixpath.basename(path).lower(), []).append(path)
+
+    def resolve(self, keyword: str) -> list:
+        """Paths matching a keyword: a basename ("config.py"), a path suffix ("app/config.py") or a glob ("src/**/*.yml")."""
+        pattern = keyword.strip().lstrip("/").lower()
+        if any(ch in pattern for ch in "*?["):
+            paths = [path for path in self.entries if fnmatch.fnmatch(path.lower(), pattern) or fnmatch.fnmatch(posixpath.basename(path).lower(), pattern)]
+        elif "/" in pattern:
+            paths = [path for path in self.entries if path.lower() == pattern or path.lower().endswith("/" + pattern)]
+        else:
+            paths = self._by_basename.get(pattern, [])
+        return sorted(paths, key=lambda path: (path.count("/"), path))[:GITHUB_MAX_MATCHES]
+
+    def read(self, path: str) -> str:
+        blob_sha, _ = self.entries[path]
+        cache_path = os.path.join(GITHUB_CACHE_DIR, "blobs", blob_sha[:2], blob_sha)
+        if os.path.exists(cache_path):
+            record_cache_hit("github_blob")
+            with open(cache_path, "rb") as f:
+                raw = f.read()
+        else:
+            with stage_timer("github_fetch"):
+                raw = self._source.read_blob(blob_sha)
+            _write_atomic(cache_path, raw)
+        return raw.decode("utf-8", errors="replace")
+
+def load_repository_index(repo_name: str, token: str = None) -> RepositoryIndex:
+    """Indexes the head of the default branch (of a local clone when `repo_name` is one under GITHUB_CLONE_ROOT).
+
+    Costs two API calls (the repository and its branch head) when the commit was indexed before, plus one for the
+    recursive tree listing otherwise.
+    """
+    clone_path = local_clone_path(repo_name)
+    if clone_path:
+        source = _LocalSource(clone_path)
+    else:
+        from github import Github, Auth
+        source = _GitHubSource(Github(auth=Auth.Token(token)).get_repo(repo_name))
+    with stage_timer("github_fetch"):
+        commit_sha = source.head()
+    cache_path = os.path.join(GITHUB_CACHE_DIR, "trees", f"{commit_sha}.json")
+    if os.path.exists(cache_path):
+        record_cache_hit("github_tree")
+        with open(cache_path, encoding="utf-8") as f:
+            entries = {path: tuple(entry) for path, entry in json.load(f).items()}
+    else:
+        with stage_timer("github_fetch"):
+            entries = source.list_tree(commit_sha)
+        _write_atomic(cache_path, json.dumps(entries).encode("utf-8"))
+    return RepositoryIndex(repo_name, commit_sha, entries, source)
\ No newline at end of file
@@ -0,0 +1,209 @@
+import os
+import json
+import datetime
+import requests
+import streamlit as st
+from checklist import get_checklist_registry, get_current_checklist, make_custom_question_id
+from extraction import extract_text_from_pdf, extract_text_from_docx
+from metrics import stage_timer, get_run_metrics, discard_run_metrics, current_question, INGEST_QUESTION_ID
+from results import get_run_results
+from github_index import load_repository_index, local_clone_path
+
+# shareplum and PyGithub are imported where they are used, so importing this module stays cheap.
+
+# --- SharePoint Document Fetching ---
+def fetch_sharepoint_docs(site_url, folder_path, pdf_char_budget=None):
+    """Connects to SharePoint using credentials from .env file. PDFs are read up to `pdf_char_budget` characters (see extract_text_from_pdf)."""
+    extracted_texts = {}
+    
+    # --- CHANGE: Read credentials from environment variables ---
+    username = os.getenv("SHAREPOINT_USERNAME")
+    password = os.getenv("SHAREPOINT_PASSWORD")
+
+    if not username or not password:
+        st.error("SharePoint credentials not found in .env file. Please add SHAREPOINT_USERNAME and SHAREPOINT_PASSWORD.")
+        return {}
+
+    try:
+        from shareplum import Site, Office365
+        with stage_timer("sharepoint_fetch"):
+            authcookie = Office365(site_url, username=username, password=password).GetCookies()
+            site = Site(site_url, authcookie=authcookie)
+            folder = site.Folder(folder_path)
+            files = folder.files
+
+        for file_info in files:
+            file_name = file_info['Name']
+            if file_name.lower().endswith(('.pdf', '.docx')):
+                st.write(f"-> Found '{file_name}' in SharePoint. Downloading...")
+                with stage_timer("sharepoint_fetch"):
+                    file_content = folder.get_file(file_name)
+                
+                if file_name.lower().endswith('.pdf'):
+                    extracted_texts[file_name] = extract_text_from_pdf(file_content, pdf_char_budget)
+                elif file_name.lower().endswith('.docx'):
+                    extracted_texts[file_name] = extract_text_from_docx(file_content)
+        
+        return extracted_texts
+
+    except Exception as e:
+        st.error(f"Failed to connect or download from SharePoint: {e}")
+        return {}
+# --- GitHub File Fetching ---
+def load_github_index(repo_name: str):
+    """The repository's file index for this run (see github_index), or None when GitHub cannot be reached."""
+    token = os.getenv("GITHUB_TOKEN")
+    if not token and local_clone_path(repo_name) is None:
+        st.error("GitHub token not found in .env file. Please add GITHUB_TOKEN.")
+        return None
+    try:
+        return load_repository_index(repo_name, token)
+    except Exception as e:
+        # Bad repo name, bad credentials, or a directory that is not a git clone
+        st.error(f"Failed to connect to GitHub repo '{repo_name}': {e}")
+        return None
+
+GITHUB_ERROR_MARKER = " ---\nError: " # Ends the header of every keyword or file that could not be read
+
+def fetch_github_file_content(repo_name: str, file_paths: list, index=None) -> str:
+    """Reads every file matching the keywords (basenames, path suffixes or globs) anywhere in the repository.
+
+    Pass the run's index from load_github_index so all questions resolve against one tree listing.
+    """
+    index = index or load_github_index(repo_name)
+    if index is None:
+        return f"Error: Could not connect to GitHub repository {repo_name}."
+
+    all_content = []
+    read_paths = set()
+    for keyword in file_paths:
+        paths = index.resolve(keyword)
+        if not paths:
+            print(f"Could not find a file matching '{keyword}' in repo '{repo_name}'")
+            all_content.append(f"--- Content from {keyword}{GITHUB_ERROR_MARKER}No file matching '{keyword}' was found in the repository.")
+        for file_path in paths:
+            if file_path in read_paths: continue
+            read_paths.add(file_path)
+            try:
+                all_content.append(f"--- Content from {file_path} ---\n{index.read(file_path)}")
+            except Exception as file_error:
+                # If a specific file cannot be read, we note it but don't crash.
+                print(f"Could not read file '{file_path}' in repo '{repo_name}': {file_error}")
+                all_content.append(f"--- Content from {file_path}{GITHUB_ERROR_MARKER}The file '{file_path}' could not be read from the repository.")
+    return "\n\n".join(all_content)
+
+# --- API COMMUNICATION ---
+BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000") # A load balancer in front of several backend workers/hosts
+
+def update_irf_and_ui(question: str, answer: str, explanation: str) -> str:
+    timestamp = datetime.datetime.now(datetime.timezone.utc)
+    run_id = st.session_state.get("run_id", "default_run")
+    question_id = get_current_checklist().resolve_id(question)
+    if question_id is None:
+        # The agent may paraphrase the question; the page records which one it is asking.
+        context_run_id, context_question_id = current_question()
+        question_id = context_question_id if context_run_id == run_id and context_question_id not in (None, INGEST_QUESTION_ID) else make_custom_question_id(question)
+    payload = { "run_id": run_id, "question_id": question_id, "question": question, "answer": answer, "explanation": explanation, "timestamp": timestamp.isoformat() }
+    try:
+        with stage_timer("backend_submit"):
+            response = requests.post(f"{BACKEND_URL}/submit_finding/", json=payload)
+            response.raise_for_status()
+        run_results = get_run_results(run_id)
+        if run_results is not None: run_results.add(question_id, question, answer, explanation)
+        return f"Successfully submitted finding to IRF tool. Response: {response.json()}"
+    except requests.exceptions.RequestException as e:
+        return f"Failed to submit finding to IRF tool. Error: {e}"
+
+def submit_run_metrics(run_id):
+    """Sends the run's per-question stage timings, token usage and cache hits to the backend."""
+    rows = get_run_metrics(run_id).snapshot()
+    discard_run_metrics(run_id) # The backend accumulates, so each submission only carries what is new
+    if not rows: return
+    try:
+        response = requests.post(f"{BACKEND_URL}/run_metrics/", json=rows)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"WARNING: Could not submit performance metrics for run '{run_id}': {e}")
+
+def iter_findings(run_id=None):
+    """Yields findings (all runs, or one run) as the backend streams them, without buffering the whole response."""
+    with requests.get(f"{BACKEND_URL}/get_findings/stream", params={"run_id": run_id} if run_id else None, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line: yield json.loads(line)
+
+def fetch_run_metrics(run_id) -> list:
+    try:
+        response = requests.get(f"{BACKEND_URL}/run_metrics/{run_id}")
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException:
+        return []
+
+EVIDENCE_UPLOAD_BATCH_CHARS = 4_000_000 # Text per upload request; only one batch of documents is decoded at a time
+
+def store_run_evidence(run_id, docs: dict):
+    """Saves extracted document text against a run so later sessions can reanalyse without re-uploading."""
+    if not docs: return None
+    totals = {"documents": 0, "new_blobs": 0, "deduplicated": 0, "stored_bytes": 0}
+    def upload(batch):
+        response = requests.post(f"{BACKEND_URL}/runs/{run_id}/evidence/", json=batch)
+        response.raise_for_status()
+        for key in totals: totals[key] += response.json()[key]
+    batch, batch_chars = [], 0
+    try:
+        for doc_name in docs:
+            text = docs[doc_name]
+            batch.append({"doc_name": doc_name, "text": text})
+            batch_chars += len(text)
+            if batch_chars >= EVIDENCE_UPLOAD_BATCH_CHARS:
+                upload(batch)
+                batch, batch_chars = [], 0
+        if batch: upload(batch)
+        return {"message": "Evidence stored", "run_id": run_id, **totals}
+    except requests.exceptions.RequestException as e:
+        st.error(f"Could not store evidence for run '{run_id}' in the IRF backend: {e}")
+        return None
+
+def list_run_evidence(run_id) -> list:
+    """The run's stored documents as [{doc_name, sha256, size, stored_size}], without their content."""
+    try:
+        response = requests.get(f"{BACKEND_URL}/runs/{run_id}/evidence/")
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException:
+        return []
+
+def fetch_run_evidence(run_id, doc_names=None, keywords=None) -> dict:
+    """Fetches {doc_name: text} for the given documents (all by default), optionally only passages mentioning the keywords."""
+    params = {"doc_names": list(doc_names or []), "keywords": list(keywords or [])}
+    try:
+        response = requests.get(f"{BACKEND_URL}/runs/{run_id}/evidence/content", params=params)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        st.error(f"Could not fetch evidence for run '{run_id}': {e}")
+        return {}
+
+def load_custom_questions(run_id):
+    """Loads a run's custom questions from the backend into the session's custom checklist."""
+    try:
+        response = requests.get(f"{BACKEND_URL}/custom_questions/", params={"run_id": run_id})
+        response.raise_for_status()
+        st.session_state.custom_checklist = [get_checklist_registry().make_custom_item(q['question'], q['weight'], q['question_id']) for q in response.json()]
+    except requests.exceptions.RequestException as e:
+        st.error(f"Could not load custom questions for run '{run_id}': {e}")
+    return st.session_state.get("custom_checklist", [])
+
+def register_custom_question(run_id, question, weight):
+    """Stores an ad-hoc question against a run so every page and session can score it."""
+    item = get_checklist_registry().make_custom_item(question, weight)
+    payload = {"run_id": run_id, "question_id": item.id, "question": question, "weight": weight}
+    try:
+        response = requests.post(f"{BACKEND_URL}/custom_questions/", json=payload)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        st.error(f"Could not save custom question to the IRF backend: {e}")
+    custom_checklist = [existing for existing in st.session_state.get("custom_checklist", []) if existing.id != item.id]
+    st.session_state.custom_checklist = custom_checklist + [item]
+    return item
@@ -0,0 +1,210 @@
+import os
+import time
+import heapq
+import random
+import itertools
+import threading
+import contextlib
+import contextvars
+from functools import lru_cache
+from metrics import stage_timer
+
+# --- LLM REQUEST SCHEDULER ---
+# Every model call in the process (all Streamlit sessions, agent steps, batch and digest workers) waits here for a
+# slot, so concurrent audits share one request/token budget instead of racing each other into 429s.
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 500))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", 300000))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 6))
+LLM_RETRY_BASE_SECONDS = 1.0
+LLM_RETRY_MAX_SECONDS = 60.0
+DEFAULT_COMPLETION_TOKENS = 1000 # Reserved per call when the model has no max_tokens; reconciled with real usage afterwards
+
+PRIORITY_INTERACTIVE = 0 # A reviewer is waiting on the result (reanalysis, custom questions)
+PRIORITY_BULK = 10 # Full audit runs
+_request_priority = contextvars.ContextVar("llm_request_priority", default=PRIORITY_BULK)
+
+_THROTTLED_ERRORS = ("RateLimitError",)
+_TRANSIENT_ERRORS = ("APITimeoutError", "APIConnectionError", "InternalServerError")
+
+@contextlib.contextmanager
+def llm_priority(priority):
+    """Runs every model call made inside the block (including worker threads LangChain starts) at this priority."""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+class TokenBucket:
+    """Refills continuously at `per_minute`; a withdrawal may overdraw it, which simply delays the next caller."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount) -> float:
+        self._refill()
+        needed = min(amount, self.capacity) - self.level
+        return needed / self.rate if needed > 0 else 0.0
+
+    def take(self, amount):
+        self._refill()
+        self.level -= amount
+
+def classify_llm_error(error):
+    """Returns 'throttled', 'transient' or None (not retryable). Works without importing the provider SDK."""
+    status_code = getattr(error, "status_code", None)
+    if status_code == 429 or type(error).__name__ in _THROTTLED_ERRORS:
+        return "throttled"
+    if (status_code is not None and status_code >= 500) or type(error).__name__ in _TRANSIENT_ERRORS:
+        return "transient"
+    return None
+
+def _retry_after_seconds(error):
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+class LLMScheduler:
+    """Token-bucket rate limits, AIMD concurrency and priority ordering for model calls.
+
+    Concurrency starts at `max_concurrency`, halves on every throttling response and grows back by one slot
+    per `concurrency_limit` successful calls. Waiting callers are served strictly by (priority, arrival order).
+    """
+
+    def __init__(self, requests_per_minute=LLM_REQUESTS_PER_MINUTE, tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+                 max_concurrency=LLM_MAX_CONCURRENCY, max_retries=LLM_MAX_RETRIES):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.concurrency_limit = float(max_concurrency)
+        self.in_flight = 0
+        self.throttled_count = 0
+        self.retry_count = 0
+        self._cooldown_until = 0.0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _acquire(self, estimated_tokens, priority):
+        ticket = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiting[0] == ticket and self.in_flight < max(1, int(self.concurrency_limit)):
+                        timeout = max(self._cooldown_until - time.monotonic(), self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                        if timeout <= 0:
+                            self.requests.take(1)
+                            self.tokens.take(estimated_tokens)
+                            self.in_flight += 1
+                            return
+                    self._condition.wait(timeout)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+
+    def _release(self, throttled=False, retry_after=None):
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled_count += 1
+                self.concurrency_limit = max(1.0, self.concurrency_limit / 2)
+                if retry_after:
+                    self._cooldown_until = max(self._cooldown_until, time.monotonic() + retry_after)
+            else:
+                self.concurrency_limit = min(float(self.max_concurrency), self.concurrency_limit + 1 / self.concurrency_limit)
+            self._condition.notify_all()
+
+    def reconcile_tokens(self, estimated_tokens, actual_tokens):
+        """Charges (or refunds) the difference between the reserved and the reported token usage."""
+        if actual_tokens:
+            with self._condition:
+                self.tokens.take(actual_tokens - estimated_tokens)
+                self._condition.notify_all()
+
+    def call(self, func, estimated_tokens, priority=None):
+        """Runs `func()` once a slot is free, retrying throttled and transient failures with full-jitter backoff."""
+        priority = _request_priority.get() if priority is None else priority
+        for attempt in range(self.max_retries + 1):
+            with stage_timer("llm_queue"):
+                self._acquire(estimated_tokens, priority)
+            try:
+                result = func()
+            except Exception as e:
+                kind = classify_llm_error(e)
+                retry_after = _retry_after_seconds(e)
+                self._release(throttled=kind == "throttled", retry_after=retry_after)
+                if kind is None or attempt == self.max_retries:
+                    raise
+                with self._condition:
+                    self.retry_count += 1
+                backoff = random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** attempt))
+                print(f"WARNING: Model call {kind} ({type(e).__name__}); retry {attempt + 1}/{self.max_retries} in {max(backoff, retry_after or 0):.1f}s.")
+                time.sleep(max(backoff, retry_after or 0))
+                continue
+            self._release()
+            return result
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {"concurrency_limit": round(self.concurrency_limit, 2), "in_flight": self.in_flight, "waiting": len(self._waiting),
+                    "throttled": self.throttled_count, "retries": self.retry_count}
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_llm_scheduler() -> LLMScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
+
+def estimate_tokens(messages, max_tokens=None) -> int:
+    """Rough prompt size (four characters per token) plus the completion budget."""
+    prompt_chars = sum(len(str(message.content)) for message in messages)
+    return prompt_chars // 4 + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+def _reported_tokens(result) -> int:
+    if isinstance(result, list): # Streamed chunks
+        return sum((getattr(chunk.message, "usage_metadata", None) or {}).get("total_tokens", 0) for chunk in result)
+    return ((result.llm_output or {}).get("token_usage") or {}).get("total_tokens", 0)
+
+@lru_cache(maxsize=None)
+def scheduled_chat_model(base_class):
+    """Returns a subclass of the chat model `base_class` whose calls go through the process-wide scheduler."""
+    from langchain_core.language_models.chat_models import BaseChatModel
+
+    class ScheduledChatModel(base_class):
+        def _scheduled(self, func, messages):
+            scheduler = get_llm_scheduler()
+            estimated_tokens = estimate_tokens(messages, getattr(self, "max_tokens", None))
+            result = scheduler.call(func, estimated_tokens)
+            scheduler.reconcile_tokens(estimated_tokens, _reported_tokens(result))
+            return result
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            return self._scheduled(lambda: super(ScheduledChatModel, self)._generate(messages, stop=stop, run_manager=run_manager, **kwargs), messages)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        # Buffered so a throttled stream can be retried from the start; nothing in the app renders tokens live.
+        yield from self._scheduled(lambda: list(super(ScheduledChatModel, self)._stream(messages, stop=stop, run_manager=run_manager, **kwargs)), messages)
+
+    if base_class._stream is not BaseChatModel._stream: # Only models that can stream keep streaming
+        ScheduledChatModel._stream = _stream
+    ScheduledChatModel.__name__ = ScheduledChatModel.__qualname__ = f"Scheduled{base_class.__name__}"
+    return ScheduledChatModel
\ No newline at end of file
@@ -0,0 +1,155 @@
+import time
+import threading
+import contextlib
+import contextvars
+from collections import defaultdict
+
+# --- PER-RUN PERFORMANCE METRICS ---
+# The (run_id, question_id) currently being processed. Context variables follow LangChain's worker threads,
+# so stage timings and token usage recorded deep inside a call are attributed to the right question.
+_current_question = contextvars.ContextVar("current_question", default=(None, None))
+INGEST_QUESTION_ID = "_ingest" # Work done before any question is asked (extraction, classification, ...)
+
+class RunMetrics:
+    """Thread-safe per-question stage durations, token usage and cache hits for one audit run."""
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._questions = defaultdict(lambda: {"stages": defaultdict(float), "prompt_tokens": 0, "completion_tokens": 0, "llm_calls": 0, "cache_hits": defaultdict(int)})
+
+    def record_stage(self, question_id, stage, seconds):
+        with self._lock:
+            self._questions[question_id]["stages"][stage] += seconds
+
+    def record_llm_call(self, question_id, prompt_tokens, completion_tokens):
+        with self._lock:
+            question = self._questions[question_id]
+            question["prompt_tokens"] += prompt_tokens
+            question["completion_tokens"] += completion_tokens
+            question["llm_calls"] += 1
+
+    def record_cache_hit(self, question_id, cache):
+        with self._lock:
+            self._questions[question_id]["cache_hits"][cache] += 1
+
+    def snapshot(self) -> list:
+        """One JSON-ready row per question."""
+        with self._lock:
+            return [
+                {"run_id": self.run_id, "question_id": question_id, "stages": dict(q["stages"]), "prompt_tokens": q["prompt_tokens"],
+                 "completion_tokens": q["completion_tokens"], "llm_calls": q["llm_calls"], "cache_hits": dict(q["cache_hits"])}
+                for question_id, q in self._questions.items()
+            ]
+
+_run_metrics = {}
+_run_metrics_lock = threading.Lock()
+
+def get_run_metrics(run_id) -> RunMetrics:
+    with _run_metrics_lock:
+        if run_id not in _run_metrics:
+            _run_metrics[run_id] = RunMetrics(run_id)
+        return _run_metrics[run_id]
+
+def discard_run_metrics(run_id):
+    with _run_metrics_lock:
+        _run_metrics.pop(run_id, None)
+
+def rename_run_metrics(old_run_id, new_run_id):
+    """Moves metrics recorded under a provisional key (e.g. document ingest before a run exists) to a run."""
+    with _run_metrics_lock:
+        run_metrics = _run_metrics.pop(old_run_id, None)
+        if run_metrics is not None and new_run_id not in _run_metrics:
+            run_metrics.run_id = new_run_id
+            _run_metrics[new_run_id] = run_metrics
+
+def set_current_question(run_id, question_id=INGEST_QUESTION_ID):
+    """Attributes everything recorded from now on (in this context) to this run and question."""
+    return _current_question.set((run_id, question_id))
+
+def current_question():
+    """The (run_id, question_id) set by set_current_question in this context, or (None, None)."""
+    return _current_question.get()
+
+def _current_run_metrics():
+    run_id, question_id = _current_question.get()
+    return (get_run_metrics(run_id), question_id) if run_id else (None, None)
+
+@contextlib.contextmanager
+def stage_timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run_metrics, question_id = _current_run_metrics()
+        if run_metrics:
+            run_metrics.record_stage(question_id, stage, time.perf_counter() - start)
+
+def record_cache_hit(cache):
+    run_metrics, question_id = _current_run_metrics()
+    if run_metrics:
+        run_metrics.record_cache_hit(question_id, cache)
+
+def record_llm_call(prompt_tokens, completion_tokens, seconds=None):
+    run_metrics, question_id = _current_run_metrics()
+    if run_metrics:
+        run_metrics.record_llm_call(question_id, prompt_tokens, completion_tokens)
+        if seconds is not None:
+            run_metrics.record_stage(question_id, "llm", seconds)
+
+# --- PROMETHEUS TEXT EXPOSITION ---
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels) + "}"
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name, self.help_text = name, help_text
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] += amount
+
+    def render(self) -> list:
+        with self._lock:
+            lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+            lines += [f"{self.name}{_format_labels(labels)} {value}" for labels, value in sorted(self._values.items())]
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name, self.help_text, self.buckets = name, help_text, tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            bucket_counts, totals = self._series.setdefault(key, ([0] * len(self.buckets), [0.0, 0]))
+            for i, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    bucket_counts[i] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+            for labels, (bucket_counts, (total, count)) in sorted(self._series.items()):
+                for upper_bound, bucket_count in zip(self.buckets, bucket_counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', upper_bound),))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+def render_prometheus(*metrics) -> str:
+    return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
@@ -1,5 +1,6 @@
 import streamlit as st
 import requests
+from integrations import BACKEND_URL
 
 st.set_page_config(page_title="Schedule Audit", layout="wide")
 
@@ -7,8 +8,6 @@ st.title("🗓️ Schedule a New Audit")
 st.markdown("Select a project and the specific compliance checks you want to perform. This will create a focused audit scope.")
 
 # --- API Communication ---
-BACKEND_URL = "http://127.0.0.1:8000"
-
 def fetch_projects():
     try:
         response = requests.get(f"{BACKEND_URL}/projects/")
@@ -3,31 +3,34 @@ import zipfile
 import io
 import datetime
 import requests
-import pandas as pd
+import uuid
 from itertools import groupby
-from thefuzz import fuzz # --- NEW IMPORT for fuzzy matching ---
-from utils import (
-    AUDIT_CHECKLIST,
-    extract_text_from_pdf,
-    extract_text_from_docx,
-    get_agent_executor,
-    fetch_sharepoint_docs,
-    fetch_github_file_content 
-)
+from checklist import get_checklist_registry
+from extraction import extract_text_from_pdf, extract_text_from_docx, pdf_normalization_report, classify_documents, match_documents
+from integrations import BACKEND_URL, fetch_sharepoint_docs, load_github_index, fetch_github_file_content, GITHUB_ERROR_MARKER, update_irf_and_ui, submit_run_metrics, fetch_run_metrics, store_run_evidence
+from agent import get_agent_executor, fit_documents_to_budget, CONTEXT_CHAR_BUDGET, evaluate_question_batch, evaluate_question_cascade, FAST_MODEL, STRONG_MODEL
+from scoring import summarize_run_metrics, summarize_cascade
+from metrics import set_current_question, rename_run_metrics
+from prescreen import PreScreener, not_assessed_finding
+from doc_store import DocumentSet, join_documents, prune_document_store
+from dedup import find_duplicates
+from results import start_run_results, discard_run_results
+
+CHECKLIST_REGISTRY = get_checklist_registry()
 
 st.set_page_config(page_title="Run Audit", layout="wide")
 
 # --- HELPER FUNCTIONS ---
-def notify_run_start(run_id, scope):
+def notify_run_start(run_id, scope, project_name=None):
     try:
-        payload = {"run_id": run_id, "scope": scope}
-        requests.post(f"http://127.0.0.1:8000/start_run/", json=payload)
+        payload = {"run_id": run_id, "scope": scope, "project_name": project_name}
+        requests.post(f"{BACKEND_URL}/start_run/", json=payload)
     except requests.exceptions.RequestException as e:
         st.error(f"Could not notify backend of run start: {e}")
 
 def notify_run_complete(run_id):
     try:
-        requests.put(f"http://127.0.0.1:8000/complete_run/{run_id}")
+        requests.put(f"{BACKEND_URL}/complete_run/{run_id}")
     except requests.exceptions.RequestException as e:
         st.error(f"Could not notify backend of run completion: {e}")
 
@@ -45,12 +48,12 @@ selected_checks = config['compliance_checks']
 
 st.info(f"**Project:** {project_name} | **Selected Checks:** {', '.join(selected_checks)}")
 
-filtered_checklist = [
-    item for item in AUDIT_CHECKLIST if any(tag in selected_checks for tag in item.get("tags", []))
-]
+filtered_checklist = CHECKLIST_REGISTRY.filter(selected_checks)
 
 if 'extracted_docs' not in st.session_state:
-    st.session_state.extracted_docs = {}
+    st.session_state.extracted_docs = DocumentSet() # Handles to memory-mapped text, not the text itself
+if 'evidence_index' not in st.session_state:
+    st.session_state.evidence_index = None
 
 # --- Hybrid Document Input Section ---
 st.header("1. Provide Evidence Sources")
@@ -89,13 +92,23 @@ uploaded_files = st.file_uploader(
     type=['pdf', 'docx', 'zip'],
     accept_multiple_files=True
 )
+dedup_mode = st.checkbox("Drop duplicate documents", value=True, help="Exact copies (e.g. the same file from SharePoint and a ZIP) and near-identical versions are removed before the audit. Only the newest version, going by the date or version number in its name, or else the most complete one, is sent to the model.")
 
 if st.button("Process All Non-GitHub Documents"):
-    st.session_state.extracted_docs = {}
+    st.session_state.extracted_docs.close()
+    st.session_state.extracted_docs = DocumentSet()
+    st.session_state.dropped_duplicates = []
+    prune_document_store()
+    # Ingest happens before the run exists; its timings are moved onto the run when it starts.
+    st.session_state.ingest_metrics_key = f"_ingest_{uuid.uuid4().hex}"
+    set_current_question(st.session_state.ingest_metrics_key)
+    # Without long-document mode no question can be sent more than the context budget of one document, so PDFs are only
+    # parsed that far; with it, oversized documents are summarized whole.
+    pdf_char_budget = None if st.session_state.get("long_document_mode", True) else CONTEXT_CHAR_BUDGET
     with st.spinner("Processing documents from SharePoint and local uploads..."):
         if "SharePoint" in selected_tools and st.session_state.sp_site_url and st.session_state.sp_folder_path:
             st.write("Connecting to SharePoint...")
-            sharepoint_texts = fetch_sharepoint_docs(st.session_state.sp_site_url, st.session_state.sp_folder_path)
+            sharepoint_texts = fetch_sharepoint_docs(st.session_state.sp_site_url, st.session_state.sp_folder_path, pdf_char_budget)
             if sharepoint_texts:
                 st.session_state.extracted_docs.update(sharepoint_texts)
                 st.success(f"Successfully processed {len(sharepoint_texts)} file(s) from SharePoint.")
@@ -103,15 +116,17 @@ if st.button("Process All Non-GitHub Documents"):
         if uploaded_files:
             st.write("Processing locally uploaded files...")
             local_file_count = 0
+            normalization_reports = {}
             for uploaded_file in uploaded_files:
                 file_name = uploaded_file.name
                 if file_name in st.session_state.extracted_docs:
                     file_name = f"local_{file_name}"
                 file_bytes = uploaded_file.getvalue()
                 if file_name.lower().endswith(('.pdf', '.docx')):
-                    text = extract_text_from_docx(file_bytes) if file_name.lower().endswith('.docx') else extract_text_from_pdf(file_bytes)
+                    text = extract_text_from_docx(file_bytes) if file_name.lower().endswith('.docx') else extract_text_from_pdf(file_bytes, pdf_char_budget)
                     st.session_state.extracted_docs[file_name] = text
                     local_file_count += 1
+                    if file_name.lower().endswith('.pdf'): normalization_reports[file_name] = pdf_normalization_report(file_bytes, pdf_char_budget)
                 elif file_name.lower().endswith('.zip'):
                     with zipfile.ZipFile(io.BytesIO(file_bytes)) as z:
                         for filename_in_zip in z.namelist():
@@ -121,27 +136,59 @@ if st.button("Process All Non-GitHub Documents"):
                                     zip_file_name = f"local_zip_{zip_file_name}"
                                 with z.open(filename_in_zip) as f:
                                     file_content_bytes = f.read()
-                                    text = extract_text_from_docx(file_content_bytes) if zip_file_name.lower().endswith('.docx') else extract_text_from_pdf(file_content_bytes)
+                                    text = extract_text_from_docx(file_content_bytes) if zip_file_name.lower().endswith('.docx') else extract_text_from_pdf(file_content_bytes, pdf_char_budget)
                                     st.session_state.extracted_docs[zip_file_name] = text
                                     local_file_count += 1
+                                    if zip_file_name.lower().endswith('.pdf'): normalization_reports[zip_file_name] = pdf_normalization_report(file_content_bytes, pdf_char_budget)
             st.success(f"Successfully processed {local_file_count} file(s) from local upload.")
+            if normalization_reports:
+                chars_saved = sum(report["chars_saved"] for report in normalization_reports.values())
+                tokens_saved = sum(report["tokens_saved"] for report in normalization_reports.values())
+                with st.expander(f"Removed {chars_saved:,} characters (~{tokens_saved:,} tokens) of PDF headers, footers and whitespace", expanded=False):
+                    for doc_name, report in normalization_reports.items():
+                        st.write(f"**{doc_name}:** {report['chars_saved']:,} of {report['chars_before']:,} characters (~{report['tokens_saved']:,} tokens), "
+                                 f"{report['boilerplate_lines_removed']} repeated header/footer lines, {report['empty_pages_dropped']} empty page(s)"
+                                 + (f", {report['pages_not_extracted']} page(s) past the context budget not read" if report['pages_not_extracted'] else ""))
+
+        if dedup_mode and len(st.session_state.extracted_docs) > 1:
+            st.session_state.dropped_duplicates = find_duplicates(st.session_state.extracted_docs)
+            for duplicate in st.session_state.dropped_duplicates:
+                del st.session_state.extracted_docs[duplicate["doc_name"]]
+            if st.session_state.dropped_duplicates:
+                with st.expander(f"Dropped {len(st.session_state.dropped_duplicates)} duplicate document(s)", expanded=False):
+                    for duplicate in st.session_state.dropped_duplicates:
+                        st.write(f"**{duplicate['doc_name']}:** {duplicate['reason']} of {duplicate['kept']} ({duplicate['similarity']:.0%} similar)")
 
     if not st.session_state.get('extracted_docs'):
+        st.session_state.evidence_index = None
         st.warning("No documents were processed from SharePoint or local upload.")
     else:
+        with st.spinner("Classifying document contents against the checklist..."):
+            st.session_state.evidence_index = classify_documents(st.session_state.extracted_docs)
+        with st.expander("Document classification", expanded=False):
+            for doc_name in st.session_state.evidence_index.doc_names:
+                doc_tags = st.session_state.evidence_index.tags(doc_name)
+                st.write(f"**{doc_name}:** {', '.join(sorted(doc_tags)) if doc_tags else 'No checklist topics detected'}")
         st.success(f"Total SharePoint/local documents processed: {len(st.session_state.extracted_docs)}. You can now run the audit.")
 
 st.divider()
 st.header("2. Start Analysis")
 default_run_name = f"{project_name.replace(' ', '_')}_{'_'.join(selected_checks).lower()}_{datetime.datetime.now().strftime('%Y%m%d')}"
 run_name = st.text_input("Enter a Name for this Audit Run:", value=default_run_name)
+batch_mode = st.checkbox("Batch questions that share the same evidence", value=True, help="Questions that resolve to exactly the same documents are answered together in one model call, so shared evidence is only sent once.")
+prescreen_mode = st.checkbox("Pre-screen clear-cut questions locally", value=True, help="Questions with no evidence, or whose checklist evidence rules are all satisfied, are answered by local rules without a model call. Their explanations start with 'Pre-screened locally'.")
+cascade_mode = st.checkbox("Model cascade", value=False, help=f"Each question is answered by the fast model ({FAST_MODEL}) first and only sent to the strong model ({STRONG_MODEL}) when the answer is 'Partial' or its confidence is low.")
+long_document_mode = st.checkbox("Long-document mode", value=True, key="long_document_mode", help="When the matched evidence for a question is too large for the model, oversized documents are replaced by cached summaries that are reused across questions and runs. When it is off while documents are processed, PDFs are only read up to the context budget.")
 
 if st.button("Start Audit Process", disabled=(not st.session_state.get('extracted_docs') and "GitHub" not in selected_tools) or not run_name):
     run_id = run_name.strip().lower().replace(" ", "_")
     st.session_state.run_id = run_id
     
-    notify_run_start(run_id, selected_checks)
-    st.session_state.audit_results = pd.DataFrame(columns=["Question", "Answer", "Explanation"])
+    notify_run_start(run_id, selected_checks, project_name)
+    store_run_evidence(run_id, st.session_state.extracted_docs)
+    if st.session_state.get("ingest_metrics_key"):
+        rename_run_metrics(st.session_state.pop("ingest_metrics_key"), run_id)
+    run_results = start_run_results(run_id)
     
     st.subheader("Live Audit Progress")
     st.divider()
@@ -150,11 +197,32 @@ if st.button("Start Audit Process", disabled=(not st.session_state.get('extracte
     uploaded_docs_dict = st.session_state.extracted_docs
     question_counter = 1
     last_subject = None
+
+    # Resolve evidence up front so questions sharing the same documents can be grouped into one call.
+    # Clear-cut questions are resolved locally first and kept out of the batches.
+    matched_docs_by_question = {}
+    prescreened = {}
+    screener = PreScreener(uploaded_docs_dict)
+    for item in filtered_checklist:
+        if item.source != "github":
+            set_current_question(run_id, item.id)
+            matched_docs_by_question[item.id] = match_documents(item.keywords, uploaded_docs_dict.keys(), st.session_state.evidence_index)
+            if prescreen_mode:
+                prescreened[item.id] = screener.screen(item, matched_docs_by_question[item.id])
+    evidence_groups = {}
+    if batch_mode:
+        for item in filtered_checklist:
+            if matched_docs_by_question.get(item.id) and not prescreened.get(item.id):
+                evidence_groups.setdefault(tuple(sorted(matched_docs_by_question[item.id])), []).append(item.question)
+    batch_results = {}
+    attempted_batches = set() # Each group is sent once; questions a failed or partial batch left out are answered one by one
+    github_index, github_index_loaded = None, False
     
     for item in filtered_checklist:
-        question = item['question']
-        subject = item['subject']
-        source = item.get("source", "sharepoint_or_local")
+        set_current_question(run_id, item.id)
+        question = item.question
+        subject = item.subject
+        source = item.source
 
         if subject != last_subject:
             st.subheader(f"📋 Audit Subject: {subject}")
@@ -164,42 +232,97 @@ if st.button("Start Audit Process", disabled=(not st.session_state.get('extracte
         placeholder.markdown(f"**{question_counter}. {question}**\n\n*Status: 🧠 Agent is processing...*")
         
         document_context = ""
+        matched_doc_names = []
         # --- Conditional logic to get context from the right source ---
         if source == "github":
             if "GitHub" in selected_tools and st.session_state.get('github_repo'):
-                files_to_check = item['keywords']
-                document_context = fetch_github_file_content(st.session_state.github_repo, files_to_check)
+                files_to_check = list(item.keywords)
+                if not github_index_loaded: # One tree listing (or one failed attempt) per run; every GitHub question resolves its files against it
+                    github_index, github_index_loaded = load_github_index(st.session_state.github_repo), True
+                if github_index is not None:
+                    with st.expander(f"Files used for question #{question_counter}", expanded=False):
+                        matched_paths = list(dict.fromkeys(path for keyword in files_to_check for path in github_index.resolve(keyword)))
+                        if matched_paths: st.write(f"Found matching file(s) at commit {github_index.commit_sha[:7]}: *{', '.join(matched_paths)}*")
+                        else: st.warning(f"No files in the repository match: {', '.join(files_to_check)}")
+                    document_context = fetch_github_file_content(st.session_state.github_repo, files_to_check, index=github_index)
+                    # Never pre-screen a repository that could not be read in full: missing evidence there is not absent evidence
+                    if prescreen_mode and item.rules and GITHUB_ERROR_MARKER not in document_context:
+                        prescreened[item.id] = PreScreener({st.session_state.github_repo: document_context}).screen(item, [st.session_state.github_repo])
+                else:
+                    document_context = f"Error: Could not connect to GitHub repository {st.session_state.github_repo}, so this question cannot be answered."
             else:
                 document_context = "The GitHub tool was not selected or configured for this audit run, so this question cannot be answered."
+                if prescreen_mode: # The answer is known without asking the model
+                    prescreened[item.id] = not_assessed_finding("the GitHub tool was not selected or configured for this audit run.")
         else: # This is the existing logic for SharePoint and local files
-            required_keywords = item.get('keywords', [])
-            matched_doc_names = []
-            
-            # --- FUZZY MATCHING LOGIC ---
-            MATCH_THRESHOLD = 85 # Similarity score from 0 to 100
-            for doc_name in uploaded_docs_dict.keys():
-                for keyword in required_keywords:
-                    similarity_score = fuzz.partial_ratio(keyword.lower(), doc_name.lower())
-                    if similarity_score >= MATCH_THRESHOLD:
-                        if doc_name not in matched_doc_names:
-                            matched_doc_names.append(doc_name)
-            
+            required_keywords = item.keywords
+            matched_doc_names = matched_docs_by_question[item.id]
+
             with st.expander(f"Documents used for question #{question_counter}", expanded=False):
                 if matched_doc_names: st.write(f"Found matching document(s): *{', '.join(matched_doc_names)}*")
                 else: st.warning(f"No documents found with a high similarity match for keywords: {', '.join(required_keywords)}")
 
-            context_texts = [f"--- Content from {doc_name} ---\n{uploaded_docs_dict[doc_name]}" for doc_name in matched_doc_names]
-            document_context = "\n\n".join(context_texts) if context_texts else "No relevant documents were provided."
+            matched_docs = {doc_name: uploaded_docs_dict.handle(doc_name) for doc_name in matched_doc_names} # Decoded by join_documents
+            if long_document_mode and not prescreened.get(item.id):
+                matched_docs = fit_documents_to_budget(matched_docs)
+            document_context = join_documents(matched_docs, "No relevant documents were provided.", char_budget=None if long_document_mode else CONTEXT_CHAR_BUDGET)
         
-        agent_input = f"Answer the audit question based *only* on the provided document content. Your answer MUST be one of 'Yes', 'No', or 'Partial'. After determining your answer, use the 'SubmitAuditFinding' tool.\n\nAUDIT QUESTION:\n{question}\n\nDOCUMENT CONTENT:\n---\n{document_context}\n---"
-        response = agent_executor.invoke({"input": agent_input})
-        latest_result = st.session_state.audit_results.iloc[-1]
-        answer, explanation = latest_result['Answer'], latest_result['Explanation']
+        group_key = tuple(sorted(matched_doc_names))
+        evidence_group = evidence_groups.get(group_key, [])
+        if question not in batch_results and group_key not in attempted_batches and len(evidence_group) > 1 and not prescreened.get(item.id):
+            attempted_batches.add(group_key)
+            placeholder.markdown(f"**{question_counter}. {question}**\n\n*Status: 🧠 Answering {len(evidence_group)} questions that share this evidence...*")
+            try:
+                batch_findings = evaluate_question_batch(evidence_group, document_context)
+            except Exception as e:
+                print(f"WARNING: Batched evaluation of {len(evidence_group)} questions failed, answering them one by one: {e}")
+                batch_findings = []
+            for grouped_question, finding in zip(evidence_group, batch_findings):
+                if finding:
+                    update_irf_and_ui(grouped_question, finding['answer'], finding['explanation'])
+                    batch_results[grouped_question] = finding
+
+        if prescreened.get(item.id):
+            answer, explanation = prescreened[item.id]['answer'], prescreened[item.id]['explanation']
+            update_irf_and_ui(question, answer, explanation)
+        elif question in batch_results:
+            answer, explanation = batch_results[question]['answer'], batch_results[question]['explanation']
+        elif cascade_mode:
+            finding = evaluate_question_cascade(question, document_context)
+            answer, explanation = finding['answer'], finding['explanation']
+            update_irf_and_ui(question, answer, explanation)
+        else: # Not batched, or the batched response skipped this question
+            agent_input = f"Answer the audit question based *only* on the provided document content. Your answer MUST be one of 'Yes', 'No', or 'Partial'. After determining your answer, use the 'SubmitAuditFinding' tool.\n\nAUDIT QUESTION:\n{question}\n\nDOCUMENT CONTENT:\n---\n{document_context}\n---"
+            response = agent_executor.invoke({"input": agent_input})
+            finding = run_results.get(item.id) # Keyed by question, however many tool calls the agent made
+            if finding:
+                answer, explanation = finding['answer'], finding['explanation']
+            else:
+                answer, explanation = "Not answered", "The agent finished without submitting a finding for this question."
         color = "green" if answer.lower() == 'yes' else "red" if answer.lower() == 'no' else "orange"
         placeholder.markdown(f"**{question_counter}. {question}**\n\n**Answer:** <span style='color:{color};'>{answer}</span>\n\n**Explanation:** {explanation}", unsafe_allow_html=True)
         st.divider()
         question_counter += 1
 
+    set_current_question(None, None)
+    results_table = run_results.to_dataframe() # Built once, from the accumulator, before it is discarded
+    discard_run_results(run_id)
+    submit_run_metrics(run_id)
     notify_run_complete(run_id)
     st.success("✅ Audit process complete!")
-    st.balloons()
\ No newline at end of file
+    st.balloons()
+
+    with st.expander(f"📋 Findings ({len(results_table)} questions)", expanded=False):
+        st.dataframe(results_table, use_container_width=True, hide_index=True)
+
+    with st.expander("⏱️ Performance Breakdown", expanded=False):
+        metric_rows = fetch_run_metrics(run_id)
+        totals, stage_totals, question_table = summarize_run_metrics(metric_rows)
+        st.write(f"**LLM calls:** {totals['llm_calls']} | **Prompt tokens:** {totals['prompt_tokens']:,} | **Completion tokens:** {totals['completion_tokens']:,} | **Cache hits:** {totals['cache_hits']}")
+        cascade = summarize_cascade(metric_rows)
+        if cascade:
+            saved = f"{cascade['latency_saved_seconds']:.1f}s" if cascade['latency_saved_seconds'] is not None else "n/a (no escalations)"
+            st.write(f"**Model cascade:** {cascade['escalated']} of {cascade['questions']} questions escalated ({cascade['escalation_rate']:.0%}) | **Latency saved:** {saved}")
+        if not stage_totals.empty:
+            st.bar_chart(stage_totals)
+            st.dataframe(question_table, use_container_width=True, hide_index=True)
\ No newline at end of file
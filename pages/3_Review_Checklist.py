@@ -1,25 +1,24 @@
 import streamlit as st
 import requests
+import pandas as pd
 import time
 import io
 from itertools import groupby
-from langchain.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from utils import (
-    AUDIT_CHECKLIST,
-    extract_text_from_pdf,
-    extract_text_from_docx,
-    get_agent_executor,
-    get_llm,
-    generate_word_report,
-    to_excel
-)
+from collections import ChainMap
+from checklist import get_checklist_registry
+from extraction import extract_text_from_pdf, extract_text_from_docx
+from integrations import BACKEND_URL, iter_findings, load_custom_questions, register_custom_question, submit_run_metrics, store_run_evidence, list_run_evidence, fetch_run_evidence
+from agent import get_agent_executor, get_llm, fit_documents_to_budget
+from scoring import generate_word_report, to_excel
+from metrics import set_current_question
+from llm_scheduler import llm_priority, PRIORITY_INTERACTIVE
+from doc_store import DocumentSet, join_documents
+
+CHECKLIST_REGISTRY = get_checklist_registry()
 
 st.set_page_config(page_title="Review Checklist", layout="wide")
 
 # --- API COMMUNICATION ---
-BACKEND_URL = "http://127.0.0.1:8000"
-
 def fetch_runs():
     try:
         response = requests.get(f"{BACKEND_URL}/get_runs/")
@@ -28,16 +27,60 @@ def fetch_runs():
     except requests.exceptions.RequestException:
         return []
 
-def fetch_data_for_run(run_id):
-    if not run_id: return []
+FINDINGS_CACHE_TTL_SECONDS = 60 # Other reviewers' edits show up at most this late; "Refresh" fetches them at once
+
+def fetch_run_status(run_id):
+    """The run's status; "completed" is remembered for the session, since a completed run stays completed."""
+    completed_runs = st.session_state.setdefault("completed_runs", set())
+    if run_id in completed_runs: return "completed"
     try:
-        response = requests.get(f"{BACKEND_URL}/get_findings/", params={"run_id": run_id})
+        response = requests.get(f"{BACKEND_URL}/get_run_status/{run_id}")
         response.raise_for_status()
-        return response.json()
+    except requests.exceptions.RequestException:
+        return None
+    if response.json() == "completed": completed_runs.add(run_id)
+    return response.json()
+
+def cached_for_run(cache_name, run_id, keep_cached):
+    """A cached value for the run, or None when it must be fetched again: it expired, or the run is still in progress
+    (findings are still arriving). `keep_cached` keeps any cached copy, for the bulk editor, which needs a stable one."""
+    entry = st.session_state.setdefault(cache_name, {}).get(run_id)
+    if entry is None: return None
+    fetched_at, value = entry
+    if keep_cached or (time.monotonic() - fetched_at < FINDINGS_CACHE_TTL_SECONDS and fetch_run_status(run_id) == "completed"):
+        return value
+    return None
+
+def fetch_data_for_run(run_id, keep_cached=False):
+    """Returns the run's findings from the session cache while it is valid (see cached_for_run), else from the backend."""
+    if not run_id: return []
+    cached = cached_for_run("findings_cache", run_id, keep_cached)
+    if cached is not None: return cached
+    try:
+        findings = list(iter_findings(run_id))
+        st.session_state.findings_cache[run_id] = (time.monotonic(), findings)
+        return findings
     except requests.exceptions.RequestException as e:
         st.error(f"Could not connect to the IRF Backend: {e}")
         return []
 
+def fetch_revisions(run_id):
+    """Superseded answers for the run (newest first), cached like the findings."""
+    cached = cached_for_run("revisions_cache", run_id, keep_cached=False)
+    if cached is not None: return cached
+    try:
+        response = requests.get(f"{BACKEND_URL}/finding_revisions/", params={"run_id": run_id})
+        response.raise_for_status()
+        st.session_state.revisions_cache[run_id] = (time.monotonic(), response.json())
+        return response.json()
+    except requests.exceptions.RequestException:
+        return []
+
+def invalidate_findings(run_id):
+    st.session_state.setdefault("findings_cache", {}).pop(run_id, None)
+    st.session_state.setdefault("revisions_cache", {}).pop(run_id, None)
+    st.session_state.findings_version = st.session_state.get("findings_version", 0) + 1 # Resets the bulk editor's pending edits
+
 def get_run_scope(run_id):
     if not run_id: return []
     try:
@@ -52,10 +95,23 @@ def save_changes(finding_id, answer, explanation):
         payload = {"answer": answer, "explanation": explanation}
         response = requests.put(f"{BACKEND_URL}/update_finding/{finding_id}", json=payload)
         response.raise_for_status()
+        invalidate_findings(response.json()['run_id'])
         st.toast(f"Finding #{finding_id} saved successfully!", icon="✅")
     except requests.exceptions.RequestException as e:
         st.error(f"Failed to save changes for finding #{finding_id}: {e}")
 
+def save_bulk_changes(run_id, updates):
+    """Commits all edited findings in a single backend transaction."""
+    try:
+        response = requests.put(f"{BACKEND_URL}/update_findings/", json=updates)
+        response.raise_for_status()
+        invalidate_findings(run_id)
+        st.toast(f"{len(updates)} findings saved successfully!", icon="✅")
+        return True
+    except requests.exceptions.RequestException as e:
+        st.error(f"Failed to save bulk changes: {e}")
+        return False
+
 # --- MAIN UI ---
 st.title("📝 Review & Edit Checklist")
 
@@ -66,51 +122,102 @@ else:
     if "custom_checklist" not in st.session_state:
         st.session_state.custom_checklist = []
     if 'extracted_docs' not in st.session_state:
-        st.session_state.extracted_docs = {}
+        st.session_state.extracted_docs = DocumentSet()
 
-    selected_run = st.selectbox("Select an Audit Run to review:", options=all_runs)
+    col1, col2 = st.columns([5, 1], vertical_alignment="bottom")
+    with col1:
+        selected_run = st.selectbox("Select an Audit Run to review:", options=all_runs)
+    with col2:
+        st.button("🔄 Refresh", use_container_width=True, disabled=not selected_run, on_click=invalidate_findings, args=(selected_run,),
+                  help="Fetch the latest findings, including other reviewers' edits and answers from a run still in progress.")
     if selected_run:
         st.session_state.run_id = selected_run
-        data = fetch_data_for_run(selected_run)
-        findings_data = {finding['question']: finding for finding in data}
+        load_custom_questions(selected_run)
+        data = fetch_data_for_run(selected_run, keep_cached=st.session_state.get("bulk_edit", False))
+        if fetch_run_status(selected_run) == "in_progress":
+            st.info("This run is still in progress; its findings are fetched again on every interaction.")
+        findings_data = {finding['question_id']: finding for finding in data}
 
         st.header("Detailed Checklist Findings")
 
         run_scope = get_run_scope(selected_run)
         if run_scope:
-            filtered_checklist = [item for item in AUDIT_CHECKLIST if any(tag in run_scope for tag in item.get("tags", []))]
+            filtered_checklist = CHECKLIST_REGISTRY.filter(run_scope)
         else:
-            filtered_checklist = AUDIT_CHECKLIST
-
-        current_checklist = filtered_checklist + [item for item in st.session_state.get("custom_checklist", []) if item['question'] in findings_data]
-        grouped_checklist = {k: list(v) for k, v in groupby(current_checklist, key=lambda item: item.get('subject', 'Custom Questions'))}
-
-        question_counter = 0
-        for subject, items in grouped_checklist.items():
-            with st.expander(f"**Audit Subject: {subject}**", expanded=True):
-                for item in items:
-                    question = item['question']
-                    finding = findings_data.get(question)
-
-                    st.markdown(f"**{question_counter + 1}. {question}** (Weight: {item.get('weight', 0)})")
-
-                    col1, col2 = st.columns([1, 2])
-                    with col1:
-                        answer_options = ["Yes", "No", "Partial", "N/A"]
-                        default_index = 3
-                        if finding:
-                            try: default_index = answer_options.index(finding['answer'])
-                            except ValueError: default_index = 3
-                        answer = st.selectbox("Answer", options=answer_options, index=default_index, key=f"answer_{question_counter}_{selected_run}", label_visibility="collapsed")
-
-                    with col2:
-                        default_explanation = finding['explanation'] if finding else ""
-                        explanation = st.text_area("Explanation", value=default_explanation, key=f"explanation_{question_counter}_{selected_run}", label_visibility="collapsed")
-                        if finding:
-                            st.button("Save", key=f"save_{question_counter}_{selected_run}", on_click=save_changes, args=(finding['id'], answer, explanation))
-
-                    st.divider()
-                    question_counter += 1
+            filtered_checklist = CHECKLIST_REGISTRY.items
+
+        current_checklist = filtered_checklist + [item for item in st.session_state.get("custom_checklist", []) if item.id in findings_data]
+        grouped_checklist = {k: list(v) for k, v in groupby(current_checklist, key=lambda item: item.subject)}
+
+        bulk_edit = st.toggle("Bulk edit mode", key="bulk_edit", help="Edit every answer in one grid and save all changes at once.")
+        if bulk_edit:
+            answer_options = ["Yes", "No", "Partial", "N/A"]
+            editable_items = [item for item in current_checklist if item.id in findings_data]
+            original = pd.DataFrame([
+                {"finding_id": findings_data[item.id]['id'], "#": number, "Subject": item.subject, "Question": item.question, "Weight": item.weight,
+                 "Answer": findings_data[item.id]['answer'], "Explanation": findings_data[item.id]['explanation']}
+                for number, item in enumerate(current_checklist, 1) if item.id in findings_data
+            ])
+            if len(editable_items) < len(current_checklist):
+                st.caption(f"{len(current_checklist) - len(editable_items)} questions without a finding are not shown.")
+            if not original.empty:
+                with st.form(key=f"bulk_edit_form_{selected_run}"): # Edits stay local until the form is submitted
+                    edited = st.data_editor(
+                        original, key=f"bulk_editor_{selected_run}_{st.session_state.get('findings_version', 0)}",
+                        hide_index=True, use_container_width=True, disabled=["#", "Subject", "Question", "Weight"],
+                        column_order=["#", "Subject", "Question", "Weight", "Answer", "Explanation"],
+                        column_config={
+                            "Answer": st.column_config.SelectboxColumn("Answer", options=answer_options, required=True),
+                            "Explanation": st.column_config.TextColumn("Explanation", width="large"),
+                        },
+                    )
+                    save_all = st.form_submit_button("💾 Save All Changes")
+                if save_all:
+                    changed = edited[(edited["Answer"] != original["Answer"]) | (edited["Explanation"] != original["Explanation"])]
+                    updates = [{"id": int(row.finding_id), "answer": row.Answer, "explanation": row.Explanation} for row in changed.itertuples()]
+                    if not updates:
+                        st.info("No changes to save.")
+                    elif save_bulk_changes(selected_run, updates):
+                        st.rerun()
+        else:
+            question_counter = 0
+            for subject, items in grouped_checklist.items():
+                with st.expander(f"**Audit Subject: {subject}**", expanded=True):
+                    for item in items:
+                        question = item.question
+                        finding = findings_data.get(item.id)
+
+                        st.markdown(f"**{question_counter + 1}. {question}** (Weight: {item.weight})")
+
+                        col1, col2 = st.columns([1, 2])
+                        with col1:
+                            answer_options = ["Yes", "No", "Partial", "N/A"]
+                            default_index = 3
+                            if finding:
+                                try: default_index = answer_options.index(finding['answer'])
+                                except ValueError: default_index = 3
+                            answer = st.selectbox("Answer", options=answer_options, index=default_index, key=f"answer_{item.id}_{selected_run}", label_visibility="collapsed")
+
+                        with col2:
+                            default_explanation = finding['explanation'] if finding else ""
+                            explanation = st.text_area("Explanation", value=default_explanation, key=f"explanation_{item.id}_{selected_run}", label_visibility="collapsed")
+                            if finding:
+                                st.button("Save", key=f"save_{item.id}_{selected_run}", on_click=save_changes, args=(finding['id'], answer, explanation))
+
+                        st.divider()
+                        question_counter += 1
+
+        with st.expander("🕘 Revision History", expanded=False):
+            revisions = fetch_revisions(selected_run)
+            if not revisions:
+                st.info("No answers in this run have been changed yet.")
+            else:
+                question_numbers = {item.id: number for number, item in enumerate(current_checklist, 1)}
+                history = pd.DataFrame([{
+                    "#": question_numbers.get(revision['question_id']), "Question ID": revision['question_id'], "Previous Answer": revision['answer'],
+                    "Previous Explanation": revision['explanation'], "Change": revision['reason'].capitalize(), "Replaced At (UTC)": revision['superseded_at'],
+                } for revision in revisions])
+                st.dataframe(history, use_container_width=True, hide_index=True)
 
         # --- REANALYSIS SECTION ---
         st.header("🔄 Reanalysis of Questions")
@@ -125,15 +232,20 @@ else:
                 try:
                     q_indices = [int(n.strip()) - 1 for n in q_numbers_str.split(',')]
                     
-                    with st.spinner("Re-running analysis on selected questions..."):
-                        original_docs_dict = st.session_state.get('extracted_docs', {})
+                    with st.spinner("Re-running analysis on selected questions..."), llm_priority(PRIORITY_INTERACTIVE):
+                        # The run's evidence is stored in the backend; only the documents a question matches are fetched.
+                        run_evidence_names = [entry['doc_name'] for entry in list_run_evidence(selected_run)]
+                        original_docs_dict = {} if run_evidence_names else st.session_state.get('extracted_docs', {}) # Runs stored before evidence was kept
                         new_docs_dict = {}
                         if new_docs:
                             for doc in new_docs:
                                 file_bytes = doc.getvalue()
                                 text = extract_text_from_docx(file_bytes) if doc.name.lower().endswith('.docx') else extract_text_from_pdf(file_bytes)
                                 new_docs_dict[doc.name] = text
+                            store_run_evidence(selected_run, new_docs_dict)
 
+                        from langchain.prompts import PromptTemplate
+                        from langchain_core.output_parsers import StrOutputParser
                         llm = get_llm()
                         prompt_template = PromptTemplate.from_template(
                             """
@@ -148,33 +260,45 @@ else:
                             """
                         )
                         chain = prompt_template | llm | StrOutputParser()
+                        reanalysis_updates = []
 
                         for idx in q_indices:
                             if 0 <= idx < len(current_checklist):
                                 item_to_rerun = current_checklist[idx]
-                                question_text = item_to_rerun['question']
-                                finding_to_update = findings_data.get(question_text)
+                                question_text = item_to_rerun.question
+                                finding_to_update = findings_data.get(item_to_rerun.id)
                                 
                                 if not finding_to_update:
                                     st.warning(f"Skipping Question #{idx + 1} as it has no initial result to update.")
                                     continue
 
                                 st.write(f"Processing Question #{idx + 1}: {question_text}")
+                                set_current_question(selected_run, item_to_rerun.id)
                                 
-                                combined_docs = {**original_docs_dict, **new_docs_dict}
-                                keywords = [kw.lower() for kw in item_to_rerun.get('keywords', [])]
-                                matched_docs = {name: text for name, text in combined_docs.items() if any(kw in name.lower() for kw in keywords)}
+                                keywords = [kw.lower() for kw in item_to_rerun.keywords]
+                                missing_names = [name for name in run_evidence_names if name not in original_docs_dict and name not in new_docs_dict and any(kw in name.lower() for kw in keywords)]
+                                if missing_names:
+                                    original_docs_dict.update(fetch_run_evidence(selected_run, missing_names))
+                                combined_docs = ChainMap(new_docs_dict, original_docs_dict) # Only matched documents are decoded
+                                matched_docs = {name: combined_docs[name] for name in combined_docs if any(kw in name.lower() for kw in keywords)}
+                                matched_docs = fit_documents_to_budget(matched_docs)
                                 
-                                context = "\n\n".join([f"--- Content from {name} ---\n{text}" for name, text in matched_docs.items()]) or "No relevant documents were provided for this question."
+                                context = join_documents(matched_docs, "No relevant documents were provided for this question.")
 
                                 response = chain.invoke({"question": question_text, "context": context})
                                 
                                 try:
                                     new_answer, new_explanation = response.strip().split('\n', 1)
-                                    save_changes(finding_to_update['id'], new_answer.strip(), new_explanation.strip())
+                                    if new_answer.strip() not in ("Yes", "No", "Partial", "N/A"): raise ValueError(f"unexpected answer '{new_answer.strip()}'")
+                                    reanalysis_updates.append({"id": finding_to_update['id'], "answer": new_answer.strip(), "explanation": new_explanation.strip()})
                                 except Exception as e:
                                     st.error(f"Failed to parse AI response for question #{idx + 1}: {e}")
 
+                        set_current_question(None, None)
+                        submit_run_metrics(selected_run)
+                        if reanalysis_updates:
+                            save_bulk_changes(selected_run, reanalysis_updates)
+
                     st.success("Reanalysis complete! The checklist has been updated.")
                     time.sleep(2)
                     st.rerun()
@@ -192,24 +316,31 @@ else:
             submitted = st.form_submit_button("Analyze Custom Question")
 
             if submitted and custom_question:
-                with st.spinner("Analyzing custom question..."):
+                with st.spinner("Analyzing custom question..."), llm_priority(PRIORITY_INTERACTIVE):
                     agent_executor = get_agent_executor()
                     
-                    custom_context_texts = []
+                    custom_docs_dict = {}
                     if custom_docs:
                         for doc in custom_docs:
                             file_bytes = doc.getvalue()
                             if doc.name.endswith('.pdf'): text = extract_text_from_pdf(file_bytes)
                             elif doc.name.endswith('.docx'): text = extract_text_from_docx(file_bytes)
-                            custom_context_texts.append(f"--- Content from {doc.name} ---\n{text}")
+                            custom_docs_dict[doc.name] = text
+                    store_run_evidence(selected_run, custom_docs_dict)
+                    custom_docs_dict = fit_documents_to_budget(custom_docs_dict)
+                    custom_context_texts = [f"--- Content from {name} ---\n{text}" for name, text in custom_docs_dict.items()]
                     
                     document_context = "\n\n".join(custom_context_texts) if custom_context_texts else "No document provided."
                     
-                    st.session_state.custom_checklist.append({"subject": "Custom Questions", "question": custom_question, "weight": custom_weight, "tags": ["PCI", "Custom"]})
+                    custom_item = register_custom_question(selected_run, custom_question, custom_weight)
+                    set_current_question(selected_run, custom_item.id)
 
                     agent_input = f"Answer the audit question based *only* on the provided document content. Your answer MUST be 'Yes', 'No', or 'Partial'. After determining your answer, use the 'SubmitAuditFinding' tool.\n\nAUDIT QUESTION:\n{custom_question}\n\nDOCUMENT CONTENT:\n---\n{document_context}\n---"
                     
                     response = agent_executor.invoke({"input": agent_input})
+                    set_current_question(None, None)
+                    submit_run_metrics(selected_run)
+                    invalidate_findings(selected_run)
                     st.success("Custom question analyzed and added to the run!")
                     time.sleep(1)
                     st.rerun()
@@ -1,16 +1,11 @@
 import streamlit as st
 import requests
 from streamlit_autorefresh import st_autorefresh
-from utils import (
-    calculate_all_scores,
-    get_answer_counts,
-    create_donut_chart
-)
+from scoring import calculate_all_scores, get_answer_counts, create_donut_chart, summarize_run_metrics, summarize_cascade
+from integrations import BACKEND_URL, iter_findings, load_custom_questions, fetch_run_metrics
 
 st.set_page_config(page_title="Summary Dashboard", layout="wide")
 
-BACKEND_URL = "http://127.0.0.1:8000"
-
 def fetch_runs():
     try:
         response = requests.get(f"{BACKEND_URL}/get_runs/")
@@ -19,15 +14,14 @@ def fetch_runs():
     except requests.exceptions.RequestException:
         return []
 
-def fetch_data_for_run(run_id):
-    if not run_id: return []
+def fetch_findings_by_question(run_id):
+    """{question_id: finding} for the run, built row by row as the findings stream in."""
+    if not run_id: return {}
     try:
-        response = requests.get(f"{BACKEND_URL}/get_findings/", params={"run_id": run_id})
-        response.raise_for_status()
-        return response.json()
+        return {finding['question_id']: finding for finding in iter_findings(run_id)}
     except requests.exceptions.RequestException as e:
         st.error(f"Could not connect to the IRF Backend: {e}")
-        return []
+        return {}
 
 def fetch_run_status(run_id):
     if not run_id: return None
@@ -65,8 +59,8 @@ else:
         elif run_status == "completed":
             st.success("This audit is complete.")
 
-        data = fetch_data_for_run(selected_run)
-        findings_data = {finding['question']: finding for finding in data}
+        load_custom_questions(selected_run)
+        findings_data = fetch_findings_by_question(selected_run)
         
         st.header("Compliance Scores & Status")
         run_scope = get_run_scope(selected_run)
@@ -76,7 +70,7 @@ else:
         if run_scope:
             # Add "Custom" to the scope if any custom questions exist for this run
             custom_questions_exist = any(
-                "Custom" in item.get("tags", []) and item['question'] in findings_data
+                "Custom" in item.tags and item.id in findings_data
                 for item in st.session_state.get("custom_checklist", [])
             )
             if custom_questions_exist and "Custom" not in run_scope:
@@ -103,4 +97,27 @@ else:
                             st.plotly_chart(chart, use_container_width=True, key=f"chart_{area}_{selected_run}")
                     col_idx += 1
         else:
-            st.warning("Could not determine the scope for this audit run.")
\ No newline at end of file
+            st.warning("Could not determine the scope for this audit run.")
+
+        st.header("⏱️ Performance Breakdown")
+        metric_rows = fetch_run_metrics(selected_run)
+        if not metric_rows:
+            st.info("No performance metrics have been recorded for this run yet.")
+        else:
+            totals, stage_totals, question_table = summarize_run_metrics(metric_rows)
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("LLM Calls", totals['llm_calls'])
+            col2.metric("Prompt Tokens", f"{totals['prompt_tokens']:,}")
+            col3.metric("Completion Tokens", f"{totals['completion_tokens']:,}")
+            col4.metric("Cache Hits", totals['cache_hits'])
+            cascade = summarize_cascade(metric_rows)
+            if cascade:
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Cascade Escalation Rate", f"{cascade['escalation_rate']:.0%}", help=f"{cascade['escalated']} of {cascade['questions']} questions were re-asked on the strong model.")
+                col2.metric("Fast / Strong Model Time", f"{cascade['fast_seconds']:.1f}s / {cascade['strong_seconds']:.1f}s")
+                col3.metric("Latency Saved", f"{cascade['latency_saved_seconds']:.1f}s" if cascade['latency_saved_seconds'] is not None else "n/a",
+                            help="Versus every question taking as long as the average escalated one did on the strong model.")
+            if not stage_totals.empty:
+                st.bar_chart(stage_totals)
+            with st.expander("Per-question breakdown", expanded=False):
+                st.dataframe(question_table, use_container_width=True, hide_index=True)
\ No newline at end of file
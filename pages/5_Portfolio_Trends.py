@@ -0,0 +1,88 @@
+import streamlit as st
+import requests
+import time
+import datetime
+import pandas as pd
+from checklist import COMPLIANCE_AREAS
+from integrations import BACKEND_URL
+
+st.set_page_config(page_title="Portfolio Trends", layout="wide")
+
+OVERALL_AREA = "Overall"
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_trends(area, since=None):
+    """Score rollups of every completed run for one area (precomputed by the backend, no findings are scanned)."""
+    try:
+        params = {"area": area}
+        if since: params["since"] = since.isoformat()
+        response = requests.get(f"{BACKEND_URL}/trends/", params=params)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        st.error(f"Could not connect to the IRF Backend: {e}")
+        return []
+
+st.title("📈 Portfolio Trends")
+st.markdown("Compliance score trajectories across projects, built from the score rollups saved when each audit run completes.")
+
+col1, col2 = st.columns(2)
+with col1:
+    area = st.selectbox("Compliance area:", options=[OVERALL_AREA, *COMPLIANCE_AREAS])
+with col2:
+    lookback = st.selectbox("Period:", options=["All time", "Last 12 months", "Last 90 days", "Last 30 days"])
+since = None
+if lookback != "All time":
+    days = {"Last 12 months": 365, "Last 90 days": 90, "Last 30 days": 30}[lookback]
+    # From midnight, so the cache key stays the same across reruns all day; the backend stores naive UTC timestamps
+    since = datetime.datetime.combine(datetime.datetime.utcnow().date(), datetime.time()) - datetime.timedelta(days=days)
+
+start_time = time.perf_counter()
+trend_points = fetch_trends(area, since)
+load_ms = (time.perf_counter() - start_time) * 1000
+
+if not trend_points:
+    st.info("No completed audit runs with scores for this area yet.")
+    st.stop()
+
+trends = pd.DataFrame(trend_points)
+trends['completed_at'] = pd.to_datetime(trends['completed_at'])
+st.caption(f"Loaded {len(trends):,} run scores across {trends['project_name'].nunique():,} projects in {load_ms:.0f} ms.")
+
+# --- PORTFOLIO SUMMARY ---
+st.header("Portfolio Summary")
+by_project = trends.groupby('project_name')
+summary = pd.DataFrame({
+    "Runs": by_project.size(),
+    "Latest Score (%)": by_project['percentage'].last(),
+    "Change vs Previous Run": by_project['percentage'].apply(lambda s: s.iloc[-1] - s.iloc[-2] if len(s) > 1 else 0.0),
+    "Best (%)": by_project['percentage'].max(),
+    "Worst (%)": by_project['percentage'].min(),
+    "Last Audit": by_project['completed_at'].last(),
+}).sort_values("Latest Score (%)")
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Projects", f"{len(summary):,}")
+col2.metric("Audit Runs", f"{len(trends):,}")
+col3.metric("Median Latest Score", f"{summary['Latest Score (%)'].median():.1f}%")
+col4.metric("Projects Declining", f"{int((summary['Change vs Previous Run'] < 0).sum()):,}")
+
+monthly = trends.set_index('completed_at')['percentage'].resample('MS').agg(['median', 'min', 'max']).dropna()
+monthly.columns = ["Median", "Lowest", "Highest"]
+st.subheader("Portfolio score by month")
+st.line_chart(monthly)
+
+st.dataframe(summary, use_container_width=True, column_config={
+    "Latest Score (%)": st.column_config.ProgressColumn("Latest Score (%)", min_value=0, max_value=100, format="%.1f"),
+    "Change vs Previous Run": st.column_config.NumberColumn("Change vs Previous Run", format="%+.1f"),
+    "Best (%)": st.column_config.NumberColumn("Best (%)", format="%.1f"),
+    "Worst (%)": st.column_config.NumberColumn("Worst (%)", format="%.1f"),
+})
+
+# --- PROJECT TRAJECTORIES ---
+st.header("Project Trajectories")
+default_projects = list(summary.sort_values("Change vs Previous Run").index[:5]) # The steepest recent declines
+selected_projects = st.multiselect("Projects to compare:", options=list(summary.index), default=default_projects)
+if selected_projects:
+    trajectories = trends[trends['project_name'].isin(selected_projects)].pivot_table(index='completed_at', columns='project_name', values='percentage')
+    st.line_chart(trajectories.ffill())
@@ -0,0 +1,87 @@
+import re
+from typing import Optional
+from collections import OrderedDict
+from checklist import ChecklistItem
+from metrics import stage_timer, record_cache_hit
+
+# --- LOCAL PRE-SCREENING ---
+# Clear-cut questions are answered before any model call: "No" when there is no evidence at all, "Yes" when every
+# rule the question declares is satisfied and at least one of them checked the documents' content (a file name alone,
+# or an empty template, is never enough). Everything in between goes to the model, which also sees what the rules
+# cannot (a differently named document, a paraphrase).
+PRESCREEN_LABEL = "Pre-screened locally"
+PRESCREEN_CACHE_DOCS = 8 # Documents kept decoded between questions; the rest are re-read from the document store
+
+_NAME_SEPARATORS = re.compile(r"[\W_]+")
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+def _normalize_name(name: str) -> str:
+    """Drops case, spaces and separators, so "Risk_Register_v2.pdf" contains "risk register"."""
+    return _NAME_SEPARATORS.sub("", name.lower())
+
+def no_evidence_finding(reason: str) -> dict:
+    return {"answer": "No", "explanation": f"{PRESCREEN_LABEL}: {reason}"}
+
+def not_assessed_finding(reason: str) -> dict:
+    """For questions whose evidence source was not part of the run: there is nothing a model could be asked about."""
+    return {"answer": "No", "explanation": f"{PRESCREEN_LABEL}: not assessed, {reason}"}
+
+class PreScreener:
+    """Checks checklist items against one run's documents, keeping the most recently used ones decoded."""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self._decoded = OrderedDict() # doc_name -> (text, normalized text)
+
+    def _decode(self, doc_name: str) -> tuple:
+        if doc_name in self._decoded:
+            self._decoded.move_to_end(doc_name)
+        else:
+            text = self.documents[doc_name]
+            self._decoded[doc_name] = (text, _normalize(text))
+            if len(self._decoded) > PRESCREEN_CACHE_DOCS:
+                self._decoded.popitem(last=False)
+        return self._decoded[doc_name]
+
+    def _raw(self, doc_name: str) -> str:
+        return self._decode(doc_name)[0]
+
+    def _text(self, doc_name: str) -> str:
+        return self._decode(doc_name)[1]
+
+    def _evaluate(self, rules, matched_doc_names) -> list:
+        """Returns [(requirement, doc_name it was found in or None)] for every rule."""
+        checks = []
+        required_docs = []
+        for name in rules.required_documents:
+            found = next((doc_name for doc_name in self.documents if _normalize_name(name) in _normalize_name(doc_name)), None)
+            checks.append((f"document '{name}'", found))
+            if found: required_docs.append(found)
+        search_docs = list(dict.fromkeys([*matched_doc_names, *required_docs]))
+        for phrase in rules.required_phrases:
+            checks.append((f"phrase '{phrase}'", next((d for d in search_docs if _normalize(phrase) in self._text(d)), None)))
+        for heading, pattern in zip(rules.required_headings, rules.heading_patterns):
+            checks.append((f"heading '{heading}'", next((d for d in search_docs if pattern.search(self._raw(d))), None)))
+        for source, pattern in zip(rules.patterns, rules.compiled_patterns):
+            checks.append((f"pattern '{source}'", next((d for d in search_docs if pattern.search(self._raw(d))), None)))
+        return checks
+
+    def screen(self, item: ChecklistItem, matched_doc_names) -> Optional[dict]:
+        """Returns {"answer", "explanation"} for a clear-cut item, or None when the model should decide."""
+        with stage_timer("prescreen"):
+            finding = self._screen(item, matched_doc_names)
+        if finding:
+            record_cache_hit("prescreen") # Counted with the caches: each one is a model call that was not needed
+        return finding
+
+    def _screen(self, item: ChecklistItem, matched_doc_names) -> Optional[dict]:
+        checks = self._evaluate(item.rules, matched_doc_names) if item.rules else []
+        checks_content = item.rules is not None and any((item.rules.required_phrases, item.rules.required_headings, item.rules.patterns))
+        if checks_content and all(doc_name for _, doc_name in checks):
+            evidence = "; ".join(f"{requirement} in {doc_name}" for requirement, doc_name in checks)
+            return {"answer": "Yes", "explanation": f"{PRESCREEN_LABEL}: all required evidence was found ({evidence})."}
+        if not matched_doc_names and not any(doc_name for _, doc_name in checks):
+            return no_evidence_finding(f"no relevant documents were provided for this question (searched for: {', '.join(item.keywords)}).")
+        return None
@@ -0,0 +1,61 @@
+import weakref
+import threading
+from typing import Optional
+
+# --- PER-RUN FINDINGS ACCUMULATOR ---
+# Findings submitted during a run (by the agent's tool, batches, the pre-screen or the cascade) are appended here
+# in constant time and looked up by question ID, so parallel workers and multi-call questions read back the right
+# answer. A DataFrame is only built when a view asks for one. Only runs in progress have one: the run loop holds it
+# and discards it when the run ends.
+RESULT_COLUMNS = ("Question ID", "Question", "Answer", "Explanation")
+
+class RunResults:
+    """Append-only, thread-safe columnar buffer of one run's findings, indexed by question ID."""
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._columns = {column: [] for column in RESULT_COLUMNS}
+        self._latest = {} # question_id -> row of its most recent finding
+
+    def add(self, question_id, question, answer, explanation):
+        with self._lock:
+            for column, value in zip(RESULT_COLUMNS, (question_id, question, answer, explanation)):
+                self._columns[column].append(value)
+            self._latest[question_id] = len(self._columns["Question ID"]) - 1
+
+    def get(self, question_id):
+        """The most recent finding for a question as {"question", "answer", "explanation"}, or None."""
+        with self._lock:
+            row = self._latest.get(question_id)
+            if row is None: return None
+            return {"question": self._columns["Question"][row], "answer": self._columns["Answer"][row], "explanation": self._columns["Explanation"][row]}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._latest)
+
+    def to_dataframe(self, latest_only=True):
+        """The findings as a DataFrame; by default only each question's most recent one, in submission order."""
+        import pandas as pd
+        with self._lock:
+            rows = sorted(self._latest.values()) if latest_only else range(len(self._columns["Question ID"]))
+            return pd.DataFrame({column: [values[row] for row in rows] for column, values in self._columns.items()}, columns=list(RESULT_COLUMNS))
+
+_run_results = weakref.WeakValueDictionary() # Also dropped when a failed run loop lets go of its accumulator
+_run_results_lock = threading.Lock()
+
+def start_run_results(run_id) -> RunResults:
+    """A fresh accumulator for a run that is starting; a re-run under the same name starts with no findings."""
+    with _run_results_lock:
+        run_results = _run_results[run_id] = RunResults(run_id)
+        return run_results
+
+def get_run_results(run_id) -> Optional[RunResults]:
+    """The accumulator of a run in progress in this process, or None (findings edited from the review pages)."""
+    with _run_results_lock:
+        return _run_results.get(run_id)
+
+def discard_run_results(run_id):
+    with _run_results_lock:
+        _run_results.pop(run_id, None)
@@ -0,0 +1,76 @@
+import os
+import re
+import glob
+import hashlib
+import threading
+
+# --- COLD STORAGE FOR COMPLETED RUNS ---
+# Archived runs keep their audit_runs row (and score rollups) in the database; their findings, revisions, custom
+# questions, metrics and evidence move to zstd-compressed Parquet files, one directory per project and month and one
+# file per run and table:
+#   <ARCHIVE_DIR>/project=<name>/period=<YYYY-MM>/<table>/<run>.parquet
+# A run's files are only ever written or deleted whole, so any number of workers can archive and restore runs of the
+# same partition at once without a lock.
+# Runs record their partition key (the path relative to ARCHIVE_DIR), so the directory can be moved or remounted.
+# pyarrow is imported where it is used, so the backend only loads it when archives are read or written.
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(".", "archive"))
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", 180))
+ARCHIVE_COMPRESSION = "zstd"
+_SAFE_NAME_PATTERN = re.compile(r"[^A-Za-z0-9_.-]+")
+
+def partition_key(project_name: str, period: str) -> str:
+    safe_project = _SAFE_NAME_PATTERN.sub("_", project_name) or "Unassigned"
+    return f"project={safe_project}/period={period}"
+
+def _run_path(partition: str, table: str, run_id: str) -> str:
+    file_name = _SAFE_NAME_PATTERN.sub("_", run_id)
+    if file_name != run_id: # Keep run IDs that only differ in replaced characters apart
+        file_name += "-" + hashlib.sha1(run_id.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(ARCHIVE_DIR, *partition.split("/"), table, f"{file_name}.parquet")
+
+def _read(path: str, filters=None, columns=None):
+    import pyarrow.parquet as pq
+    if not os.path.exists(path): return None
+    return pq.read_table(path, filters=filters, columns=columns)
+
+def _write(path: str, arrow_table):
+    import pyarrow.parquet as pq
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    pq.write_table(arrow_table, temp_path, compression=ARCHIVE_COMPRESSION)
+    os.replace(temp_path, path) # Readers see either the old or the new file, never a partial one
+
+def write_run_rows(partition: str, table: str, run_id: str, rows: list):
+    """Stores a run's rows in the partition, replacing any earlier copy of that run (so retries are idempotent)."""
+    import pyarrow as pa
+    if rows:
+        _write(_run_path(partition, table, run_id), pa.Table.from_pylist(rows))
+    else:
+        remove_run(partition, table, run_id)
+
+def read_run_rows(partition: str, table: str, run_id: str) -> list:
+    arrow_table = _read(_run_path(partition, table, run_id))
+    return arrow_table.to_pylist() if arrow_table is not None else []
+
+def remove_run(partition: str, table: str, run_id: str):
+    try:
+        os.remove(_run_path(partition, table, run_id))
+    except FileNotFoundError:
+        pass
+
+def find_runs_by_finding_ids(finding_ids) -> set:
+    """Returns the run IDs of archived findings with these IDs (scans only the id/run_id columns)."""
+    run_ids = set()
+    for path in glob.glob(os.path.join(ARCHIVE_DIR, "project=*", "period=*", "findings", "*.parquet")):
+        try:
+            arrow_table = _read(path, filters=[("id", "in", list(finding_ids))], columns=["id", "run_id"])
+        except FileNotFoundError: # Restored by another worker since the listing
+            continue
+        if arrow_table is not None:
+            run_ids.update(arrow_table["run_id"].to_pylist())
+    return run_ids
+
+def archive_summary() -> dict:
+    paths = glob.glob(os.path.join(ARCHIVE_DIR, "project=*", "period=*", "*", "*.parquet"))
+    return {"archive_dir": ARCHIVE_DIR, "partitions": len({os.path.dirname(os.path.dirname(path)) for path in paths}), "files": len(paths),
+            "archive_bytes": sum(os.path.getsize(path) for path in paths)}
\ No newline at end of file
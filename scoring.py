@@ -0,0 +1,158 @@
+import io
+import datetime
+import streamlit as st
+from checklist import get_current_checklist, score_answers, COMPLIANCE_AREAS, ANSWER_MULTIPLIERS
+
+# pandas, openpyxl, plotly and python-docx are imported where they are used, so the dashboard can import
+# the scoring helpers without paying for the export and charting libraries up front.
+
+# --- SCORING, CHARTING, AND EXCEL FUNCTIONS ---
+def to_excel(data: list) -> bytes:
+    if not data:
+        return b""
+    import pandas as pd
+    from openpyxl.styles import Alignment
+    current_checklist = get_current_checklist()
+    
+    report_data = []
+    for finding in data:
+        item = current_checklist.get(finding['question_id'])
+        weight = item.weight if item else 0
+        multiplier = ANSWER_MULTIPLIERS.get(finding.get('answer'), 0.0)
+        score = weight * multiplier
+        new_finding = finding.copy()
+        new_finding['weight'] = weight
+        new_finding['score'] = score
+        report_data.append(new_finding)
+        
+    df = pd.DataFrame(report_data)
+    df_report = df[['question', 'weight', 'answer', 'score', 'explanation', 'timestamp']].copy()
+    df_report.rename(columns={'question': 'Audit Question','weight': 'Weightage','answer': 'Answer','score': 'Achieved Score','explanation': 'Explanation/Comments','timestamp': 'Timestamp (UTC)'}, inplace=True)
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df_report.to_excel(writer, index=False, sheet_name='Audit_Results')
+        worksheet = writer.sheets['Audit_Results']
+        worksheet.column_dimensions['A'].width = 80
+        worksheet.column_dimensions['B'].width = 12
+        worksheet.column_dimensions['C'].width = 15
+        worksheet.column_dimensions['D'].width = 18
+        worksheet.column_dimensions['E'].width = 80
+        worksheet.column_dimensions['F'].width = 20
+        wrap_alignment = Alignment(wrap_text=True, vertical='top')
+        for row in worksheet.iter_rows(min_row=2, max_col=6): 
+            for cell in [row[0], row[4]]:
+                cell.alignment = wrap_alignment
+    return output.getvalue()
+
+def calculate_all_scores(run_data, selected_run_id):
+    current_checklist = get_current_checklist()
+    answers = {}
+    for item in current_checklist.items:
+        current_answer = st.session_state.get(f"answer_{item.id}_{selected_run_id}")
+        if current_answer is None:
+            finding = run_data.get(item.id)
+            if finding: current_answer = finding.get('answer')
+        answers[item.id] = current_answer
+    return {area: score_answers(current_checklist.filter([area]), answers) for area in COMPLIANCE_AREAS}
+
+def get_answer_counts(run_data, selected_run_id, compliance_area):
+    counts = {"Yes": 0, "No": 0, "Partial": 0}
+    for item in get_current_checklist().filter([compliance_area]):
+        current_answer = st.session_state.get(f"answer_{item.id}_{selected_run_id}")
+        if current_answer is None:
+            finding = run_data.get(item.id)
+            if finding: current_answer = finding.get('answer')
+        if current_answer in counts:
+            counts[current_answer] += 1
+    return counts
+
+def create_donut_chart(counts):
+    import plotly.graph_objects as go
+    labels = list(counts.keys())
+    values = list(counts.values())
+    colors = ['#2ca02c', '#d62728', '#ff7f0e']
+    fig = go.Figure(data=[go.Pie(labels=labels, values=values, hole=.4, marker_colors=colors, textinfo='value+percent', hoverinfo='label+percent')])
+    fig.update_layout(showlegend=True, legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5), margin=dict(l=20, r=20, t=20, b=20), height=250)
+    return fig
+
+# --- PERFORMANCE BREAKDOWN ---
+def summarize_run_metrics(rows: list):
+    """Turns per-question metric rows into (totals, per-stage seconds, per-question table) for display."""
+    import pandas as pd
+    totals = {
+        "prompt_tokens": sum(row['prompt_tokens'] for row in rows),
+        "completion_tokens": sum(row['completion_tokens'] for row in rows),
+        "llm_calls": sum(row['llm_calls'] for row in rows),
+        "cache_hits": sum(sum(row['cache_hits'].values()) for row in rows),
+    }
+    question_table = pd.DataFrame([
+        {"Question ID": row['question_id'], **{f"{stage} (s)": seconds for stage, seconds in row['stages'].items()},
+         "Prompt Tokens": row['prompt_tokens'], "Completion Tokens": row['completion_tokens'], "LLM Calls": row['llm_calls'],
+         "Cache Hits": sum(row['cache_hits'].values())}
+        for row in rows
+    ]).fillna(0.0)
+    stage_columns = [column for column in question_table.columns if column.endswith(" (s)")]
+    stage_totals = question_table[stage_columns].sum().rename(lambda column: column[:-4]) if stage_columns else pd.Series(dtype=float)
+    return totals, stage_totals, question_table
+
+def summarize_cascade(rows: list):
+    """Escalation rate and latency saved by the model cascade, read from its stage timings; None if it was not used.
+
+    The saving compares the cascade's total time with every cascaded question taking as long as the average
+    escalated one did on the strong model, so it is only known once at least one question has escalated.
+    """
+    cascaded = [row for row in rows if "cascade_fast" in row['stages']]
+    if not cascaded: return None
+    escalated = [row for row in cascaded if "cascade_strong" in row['stages']]
+    fast_seconds = sum(row['stages']['cascade_fast'] for row in cascaded)
+    strong_seconds = sum(row['stages']['cascade_strong'] for row in escalated)
+    latency_saved = len(cascaded) * strong_seconds / len(escalated) - (fast_seconds + strong_seconds) if escalated else None
+    return {"questions": len(cascaded), "escalated": len(escalated), "escalation_rate": len(escalated) / len(cascaded),
+            "fast_seconds": fast_seconds, "strong_seconds": strong_seconds, "latency_saved_seconds": latency_saved}
+
+# --- WORD REPORT GENERATION ---
+def generate_word_report(run_id: str, findings: list) -> io.BytesIO:
+    from docx import Document
+    document = Document()
+    document.add_heading(f'Audit Remediation Report for: {run_id}', level=1)
+    
+    document.add_paragraph(
+        f"Generated on {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}. "
+        "This report lists items requiring action."
+    )
+    
+    actionable_findings = [f for f in findings if f.get('answer') in ["No", "Partial"]]
+    
+    if not actionable_findings:
+        document.add_paragraph("\n✅ No actionable findings were identified for this audit run.")
+    else:
+        document.add_heading('Actionable Findings', level=2)
+        
+        # --- CHANGE: Loop and create paragraphs instead of a table ---
+        for finding in actionable_findings:
+            # Add the question as a distinct heading
+            p = document.add_paragraph()
+            p.add_run('Question: ').bold = True
+            p.add_run(finding.get('question', ''))
+            
+            # Add the finding (answer)
+            p = document.add_paragraph()
+            p.add_run('Finding: ').bold = True
+            run = p.add_run(finding.get('answer', ''))
+            # Optional: Add color to the finding
+            # This is more complex and depends on specific library versions.
+            # Sticking to bold for simplicity and reliability.
+
+            # Add the explanation
+            p = document.add_paragraph()
+            p.add_run('Auditronauts Explanation: ').bold = True
+            p.add_run(finding.get('explanation', ''))
+            
+            # Add a separator
+            document.add_paragraph("---")
+
+    # Save to a byte stream
+    doc_io = io.BytesIO()
+    document.save(doc_io)
+    doc_io.seek(0)
+    return doc_io